@@ -13,8 +13,8 @@ ENV_PATH = os.path.join(BACKEND_DIR, ".env")
 load_dotenv(ENV_PATH)
 
 from livekit import agents
-from livekit.agents import Agent, AgentServer, AgentSession, cli, room_io
-from livekit.plugins import google, noise_cancellation
+from livekit.agents import Agent, AgentServer, AgentSession, JobProcess, cli, room_io
+from livekit.plugins import google, noise_cancellation, silero
 
 from agent.prompts import AGENT_INSTRUCTION, SESSION_INSTRUCTION
 from agent.tools import (
@@ -39,9 +39,13 @@ from agent.tools import (
     get_order_detail,
     web_search,
 )
+from agent.tool_cache import tool_cache
+from agent.worker_load import LOAD_THRESHOLD, compute_worker_load
 
 from db.conversation_logs import insert_conversation_log
 from db.conversation_sessions import create_conversation_session
+from db.connection import get_supabase
+from db.room_lease import ROOM_LEASE_TTL, get_room_lease_registry, make_owner_id
 
 # ================= CONFIG =================
 SAMPLE_RATE = 16000
@@ -75,11 +79,29 @@ class ShoppingAgent(Agent):
             ],
         )
 
-# ================= SERVER =================
-server = AgentServer()
+# ================= PREWARM =================
+def prewarm(proc: JobProcess):
+    """Load heavy per-process assets once, before the first room arrives."""
+    start = time.time()
+
+    # Model ONNX Silero VAD (~2 MB, butuh beberapa ratus ms untuk load + inisialisasi
+    # session onnxruntime); dipakai AgentSession untuk deteksi bicara / interupsi
+    proc.userdata["vad"] = silero.VAD.load()
+
+    try:
+        get_supabase()
+    except Exception as e:
+        print("⚠️ Prewarm Supabase gagal:", e)
 
-_active_rooms: set[str] = set()
-_active_rooms_lock = asyncio.Lock()
+    print(f"🔥 Process prewarmed in {time.time() - start:.2f}s (pid={os.getpid()})")
+
+
+# ================= SERVER =================
+server = AgentServer(
+    load_fnc=compute_worker_load,
+    load_threshold=LOAD_THRESHOLD,
+)
+server.setup_fnc = prewarm
 
 @server.rtc_session()
 async def connect(ctx: agents.JobContext):
@@ -89,12 +111,43 @@ async def connect(ctx: agents.JobContext):
     if not room_name.startswith("user-"):
         return
 
-    # ✅ Cek duplikat agent secara atomic
-    async with _active_rooms_lock:
-        if room_name in _active_rooms:
-            print(f"⚠️ Agent sudah ada di room: {room_name}, skip")
-            return
-        _active_rooms.add(room_name)
+    # ✅ Cek duplikat agent lintas proses (room lease)
+    leases = get_room_lease_registry()
+    lease_owner = make_owner_id(ctx.job.id)
+
+    if not await asyncio.to_thread(leases.acquire, room_name, lease_owner):
+        print(f"⚠️ Agent sudah ada di room: {room_name}, skip")
+        return
+
+    # Di-set saat room disconnect atau lease hilang; connect() menunggu ini
+    disconnected_event = asyncio.Event()
+
+    async def heartbeat_lease():
+        while True:
+            await asyncio.sleep(ROOM_LEASE_TTL / 3)
+            try:
+                ok = await asyncio.to_thread(leases.heartbeat, room_name, lease_owner)
+                # Lease kedaluwarsa tapi belum diambil worker lain → ambil lagi
+                if not ok:
+                    ok = await asyncio.to_thread(leases.acquire, room_name, lease_owner)
+            except Exception as e:
+                print(f"⚠️ Heartbeat lease gagal: {room_name}: {e}")
+                continue
+
+            if not ok:
+                # Room sudah dimiliki agent lain → keluar, jangan ada dua agent di satu room
+                print(f"⚠️ Lease room hilang: {room_name} (owner={lease_owner}), shutdown session")
+                disconnected_event.set()
+                ctx.shutdown(reason="room lease lost")
+                return
+
+    heartbeat_task = asyncio.create_task(heartbeat_lease())
+
+    async def release_lease():
+        heartbeat_task.cancel()
+        await asyncio.to_thread(leases.release, room_name, lease_owner)
+
+    ctx.add_shutdown_callback(release_lease)
 
     print(f"🤖 Agent CONNECT ke room: {room_name}")
 
@@ -113,21 +166,26 @@ async def connect(ctx: agents.JobContext):
     auth_state["agent_state"] = room_state
     auth_state["room_ref"] = room
 
+    vad = ctx.proc.userdata.get("vad")
+    if vad is None:
+        print("⚠️ VAD belum di-prewarm, load di dalam session")
+        vad = silero.VAD.load()
+
     session = AgentSession(
         llm=google.beta.realtime.RealtimeModel(
             model="models/gemini-2.5-flash-native-audio-latest",
             voice="Kore",
-        )
+        ),
+        vad=vad,
     )
 
     # ================= DISCONNECT EVENT =================
-    disconnected_event = asyncio.Event()
-
     @room.on("disconnected")
     def on_room_disconnected():
         print(f"🔌 Room disconnected: {room_name}")
-        _active_rooms.discard(room_name)
+        asyncio.create_task(release_lease())
         print(f"🧹 Room released: {room_name}")
+        print(f"📊 Tool cache: {tool_cache.stats()}")
         disconnected_event.set()
 
     # ================= VOICE RESULT =================
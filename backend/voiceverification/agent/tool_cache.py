@@ -0,0 +1,171 @@
+"""TTL + LRU cache for agent function tools.
+
+Realtime LLMs often repeat the same tool call several times in one
+conversation. Read-only tools are wrapped with ``cached_tool`` so repeated
+calls within the TTL are answered from memory instead of hitting the
+e-commerce API / external services again.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "256"))
+
+
+@dataclass
+class ToolCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ToolCache:
+    """Size-bounded LRU cache with per-entry expiry, keyed per tool."""
+
+    def __init__(self, max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self._stats: dict[str, ToolCacheStats] = {}
+
+    def _tool_stats(self, tool_name: str) -> ToolCacheStats:
+        if tool_name not in self._stats:
+            self._stats[tool_name] = ToolCacheStats()
+        return self._stats[tool_name]
+
+    def get(self, key: tuple) -> tuple[bool, Any]:
+        tool_name = key[0]
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is None or entry[0] <= now:
+            if entry is not None:
+                del self._entries[key]
+            self._tool_stats(tool_name).misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self._tool_stats(tool_name).hits += 1
+        return True, entry[1]
+
+    def set(self, key: tuple, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            self._tool_stats(old_key[0]).evictions += 1
+
+    def invalidate(self, *tool_names: str) -> int:
+        """Drop every entry of the given tools (all tools if none given)."""
+        names = set(tool_names)
+        stale = [k for k in self._entries if not names or k[0] in names]
+        for k in stale:
+            del self._entries[k]
+            self._tool_stats(k[0]).invalidations += 1
+        return len(stale)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "tools": {
+                name: {
+                    "hits": s.hits,
+                    "misses": s.misses,
+                    "evictions": s.evictions,
+                    "invalidations": s.invalidations,
+                    "hit_rate": round(s.hit_rate, 4),
+                }
+                for name, s in self._stats.items()
+            },
+        }
+
+
+tool_cache = ToolCache()
+
+# Diisi oleh agent.tools supaya modul ini tidak import balik ke tools.py
+_auth_scope_fn: Callable[[], str] | None = None
+
+
+def set_auth_scope(fn: Callable[[], str]):
+    """Register the function that returns the current per-user auth scope."""
+    global _auth_scope_fn
+    _auth_scope_fn = fn
+
+
+def _args_key(sig: inspect.Signature, args, kwargs) -> str:
+    bound = sig.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return json.dumps(bound.arguments, sort_keys=True, default=str)
+
+
+def cached_tool(
+    ttl: float,
+    *,
+    per_user: bool = True,
+    cache_if: Callable[[Any], bool] | None = None,
+):
+    """
+    Cache the result of an async tool for ``ttl`` seconds.
+
+    Must sit *below* ``@function_tool`` so the LLM schema is still built from
+    the original signature and docstring (``functools.wraps`` keeps both).
+
+    Args:
+        ttl: Time-to-live in seconds.
+        per_user: Include the current auth scope in the key. Disable only for
+            tools whose output does not depend on who is logged in.
+        cache_if: Optional predicate; results for which it returns False
+            (e.g. error messages) are returned but not stored.
+    """
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        sig = inspect.signature(fn)
+        tool_name = fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            scope = ""
+            if per_user and _auth_scope_fn is not None:
+                scope = _auth_scope_fn()
+
+            key = (tool_name, scope, _args_key(sig, args, kwargs))
+
+            hit, value = tool_cache.get(key)
+            if hit:
+                logging.info(f"⚡ TOOL CACHE HIT: {tool_name}")
+                return value
+
+            value = await fn(*args, **kwargs)
+
+            if cache_if is None or cache_if(value):
+                tool_cache.set(key, value, ttl)
+
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def hash_scope(*parts: Any) -> str:
+    """Stable, non-reversible scope string (avoid keeping raw tokens in keys)."""
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
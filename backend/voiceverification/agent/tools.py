@@ -7,6 +7,8 @@ import requests
 from langchain_community.tools import DuckDuckGoSearchRun
 from livekit.agents.llm import function_tool
 
+from agent.tool_cache import cached_tool, hash_scope, set_auth_scope, tool_cache
+
 
 # Base URL untuk e-commerce website
 BASE_URL = "https://dummy-ecommerce-tau.vercel.app"
@@ -48,6 +50,31 @@ def get_headers():
     return headers
 
 
+def _auth_scope() -> str:
+    """Per-user cache scope: e-commerce login + LiveKit room user."""
+    state = auth_state.get("agent_state") or {}
+    return hash_scope(auth_state["user_id"], auth_state["token"], state.get("user_id"))
+
+
+set_auth_scope(_auth_scope)
+
+# Prefix pesan gagal/error — hasil seperti ini tidak disimpan di cache
+_UNCACHEABLE_PREFIXES = (
+    "Error",
+    "Gagal",
+    "Lo harus login",
+    "Could not retrieve",
+    "Weather service error",
+    "Search error",
+)
+
+_USER_SCOPED_TOOLS = ("get_cart", "get_order_history", "get_order_detail", "get_shopkupay_balance")
+
+
+def _cacheable(result) -> bool:
+    return isinstance(result, str) and not result.startswith(_UNCACHEABLE_PREFIXES)
+
+
 def require_voice_verification(action_name: str, params=None) -> str | None:
     """Soft gate for sensitive actions. Returns error string or None if OK."""
     state = auth_state.get("agent_state", {})
@@ -265,6 +292,7 @@ async def search_product(
 
 
 @function_tool
+@cached_tool(ttl=120, per_user=False, cache_if=_cacheable)
 async def get_product_detail(product_id: int) -> str:
     """
     Get detailed information about a specific product.
@@ -338,6 +366,7 @@ async def get_product_from_search_index(index: int) -> str:
 # ==================== GENERAL TOOLS ====================
 
 @function_tool
+@cached_tool(ttl=600, per_user=False, cache_if=_cacheable)
 async def get_weather(city: str) -> str:
     """Get current weather for a given city."""
     try:
@@ -353,6 +382,7 @@ async def get_weather(city: str) -> str:
 
 
 @function_tool
+@cached_tool(ttl=300, per_user=False, cache_if=_cacheable)
 async def web_search(query: str) -> str:
     """Search the internet for information."""
     try:
@@ -385,6 +415,7 @@ async def login(username: str, password: str) -> str:
                 auth_state["user_id"] = data.get("user", {}).get("id")
                 auth_state["username"] = data.get("user", {}).get("username")
                 auth_state["is_logged_in"] = True
+                tool_cache.invalidate(*_USER_SCOPED_TOOLS)
                 return f"Login berhasil! Selamat datang {auth_state['username']}."
 
         return "Login gagal. Username atau password salah."
@@ -423,6 +454,7 @@ async def logout() -> str:
     auth_state["user_id"] = None
     auth_state["username"] = None
     auth_state["is_logged_in"] = False
+    tool_cache.invalidate(*_USER_SCOPED_TOOLS)
     return "Berhasil logout."
 
 
@@ -466,6 +498,7 @@ async def check_voice_status() -> str:
 # ==================== USER TOOLS ====================
 
 @function_tool
+@cached_tool(ttl=30, cache_if=_cacheable)
 async def get_shopkupay_balance() -> str:
     """Get user's ShopKuPay balance/saldo."""
     if not auth_state["is_logged_in"]:
@@ -512,6 +545,7 @@ async def add_to_cart(product_id: int, quantity: int = 1) -> str:
         if response.status_code == 200:
             data = response.json()
             if data.get("success"):
+                tool_cache.invalidate("get_cart")
                 return f"Berhasil ditambahin ke keranjang! {data.get('message', '')}"
 
         return "Gagal nambahin ke keranjang."
@@ -522,6 +556,7 @@ async def add_to_cart(product_id: int, quantity: int = 1) -> str:
 
 
 @function_tool
+@cached_tool(ttl=30, cache_if=_cacheable)
 async def get_cart() -> str:
     """Get current items in the shopping cart with cart link."""
     if not auth_state["is_logged_in"]:
@@ -578,6 +613,7 @@ async def remove_from_cart(cart_id: int) -> str:
         )
 
         if response.status_code == 200:
+            tool_cache.invalidate("get_cart")
             return "Item berhasil dihapus dari keranjang!"
         return "Gagal menghapus item."
 
@@ -660,6 +696,8 @@ async def checkout(payment_method: str = "GoPay") -> str:
             if data.get("success"):
                 order = data.get("data", {})
 
+                tool_cache.invalidate("get_cart", "get_order_history", "get_shopkupay_balance")
+
                 for item in cart_items:
                     requests.delete(
                         f"{BASE_URL}/api/cart?cart_id={item.get('id')}",
@@ -689,6 +727,7 @@ async def checkout(payment_method: str = "GoPay") -> str:
 # ==================== ORDER TOOLS ====================
 
 @function_tool
+@cached_tool(ttl=60, cache_if=_cacheable)
 async def get_order_history() -> str:
     """Get order history with links."""
     if not auth_state["is_logged_in"]:
@@ -735,6 +774,7 @@ async def get_order_history() -> str:
 
 
 @function_tool
+@cached_tool(ttl=60, cache_if=_cacheable)
 async def get_order_detail(order_id: int) -> str:
     """Get detailed information about a specific order by order ID."""
     if not auth_state["is_logged_in"]:
@@ -832,6 +872,7 @@ async def pay_order(order_id: int) -> str:
         if response.status_code == 200:
             data = response.json()
             if data.get("success"):
+                tool_cache.invalidate("get_order_history", "get_order_detail", "get_shopkupay_balance")
                 return f"🎉 Pembayaran berhasil!\nOrder #{order_id} sudah dibayar.\nTotal: Rp {order_data.get('total', 0):,}"
 
         return "Pembayaran gagal. Coba lagi nanti."
@@ -0,0 +1,47 @@
+"""Worker load reporting for LiveKit dispatch.
+
+LiveKit only sends new rooms to workers whose reported load is below
+``load_threshold``. The load reported here is the worse of two signals:
+active rooms vs. capacity and host CPU.
+
+Event-loop lag is deliberately not part of it: ``load_fnc`` runs in the
+main worker process while every room runs in its own job process, so the
+main loop's lag says nothing about room pressure. Busy rooms show up in
+host CPU instead.
+"""
+
+import os
+
+try:
+    import psutil
+except ImportError:  # psutil ikut terinstall bersama livekit-agents
+    psutil = None
+
+MAX_ROOMS_PER_WORKER = int(os.getenv("AGENT_MAX_ROOMS_PER_WORKER", "8"))
+LOAD_THRESHOLD = float(os.getenv("AGENT_LOAD_THRESHOLD", "0.75"))
+
+# Panggilan pertama cpu_percent(interval=None) selalu 0.0; prime sekali di sini
+# supaya laporan load pertama sudah berupa CPU sejak import
+if psutil is not None:
+    psutil.cpu_percent(interval=None)
+
+
+def _cpu_load() -> float:
+    if psutil is not None:
+        return psutil.cpu_percent(interval=None) / 100.0
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        return 0.0
+
+
+def compute_worker_load(server) -> float:
+    """
+    load_fnc for AgentServer. Returns a value in [0, 1].
+    """
+    active_rooms = len(getattr(server, "active_jobs", []) or [])
+
+    room_load = active_rooms / max(MAX_ROOMS_PER_WORKER, 1)
+    cpu_load = _cpu_load()
+
+    return float(min(max(room_load, cpu_load), 1.0))
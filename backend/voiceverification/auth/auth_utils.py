@@ -1,7 +1,9 @@
 from fastapi import Request, HTTPException
 from db.supabase_client import get_supabase
+from utils.metrics import timed
 
 
+@timed("auth")
 def get_user_id_from_request(request: Request) -> str:
     """
     Extract & verify Supabase JWT from Authorization header.
@@ -1,50 +1,269 @@
+import hashlib
+import json
+import os
+import threading
+import time
 import warnings
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 
 import librosa
 import numpy as np
+import scipy.fft
+import scipy.signal
+
+from utils.feature_cache import feature_key, get_feature_cache
+from utils.metrics import Counter, register
 
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
+# Parameter bawaan, dipakai kalau artifact SPOOF_MODEL_PATH tidak ada / tidak valid
 MODEL_MEANS  = [0.011605034616271345, 0.03527778138717016, 0.0]
 MODEL_SCALES = [0.010305995506340091, 0.014120233215618267, 1.0]
 MODEL_COEFFS = [0.6451673888241342, 0.08283186796791177, 0.0]
 MODEL_BIAS   = 0.10828528294764354
 
+# Naikkan kalau cara hitung fitur berubah → cache fitur lama tidak terpakai lagi
+SPOOF_FEATURE_VERSION = "asvspoof-feats-v1"
+SPOOF_FEATURE_NAMES = ("flatness", "temporal_var", "highband")
+
+# Artifact hasil train_asvspoof_lite_v2 / calibrate --train. File dicek ulang
+# (mtime, size) paling sering tiap SPOOF_MODEL_RELOAD_S; 0 = tidak di-reload.
+SPOOF_MODEL_PATH = os.getenv("SPOOF_MODEL_PATH", "asvspoof_model.json")
+SPOOF_MODEL_RELOAD_S = float(os.getenv("SPOOF_MODEL_RELOAD_S", "5"))
+
+SPOOF_MODEL_FORMAT = "asvspoof-lite-logreg"
+
+# Batch scoring: clip dikelompokkan per panjang (kelipatan SPOOF_BUCKET_FRAMES
+# frame STFT) supaya padding kecil; satu batch STFT paling banyak
+# SPOOF_BATCH_MAX_FRAMES frame (≈ 2 KB per frame → default ~16 MB).
+SPOOF_BUCKET_FRAMES = int(os.getenv("SPOOF_BUCKET_FRAMES", "32"))
+SPOOF_BATCH_MAX_FRAMES = int(os.getenv("SPOOF_BATCH_MAX_FRAMES", "8192"))
+
+_N_FFT = 1024
+_HOP = 512
+
+SPOOF_MODEL_RELOADS = register(Counter(
+    "voiceverification_spoof_model_reloads_total",
+    "Spoof model artifact reload attempts by result (loaded, rejected).",
+    labelnames=("result",),
+))
+
 
 def _sigmoid(x):
     return 1 / (1 + np.exp(-x))
 
 
+def prepare_signal(y):
+    """Trim silence; too short / empty clips become a silent 1024-sample buffer."""
+    if len(y) == 0:
+        return np.zeros(1024)
+
+    y, _ = librosa.effects.trim(y, top_db=25)
+    return y if len(y) > 512 else np.zeros(1024)
+
+
 def _load_audio(path, sr=16000):
     try:
         y, _ = librosa.load(path, sr=sr, mono=True)
-        if len(y) == 0:
-            return np.zeros(1024)
-
-        y, _ = librosa.effects.trim(y, top_db=25)
-        return y if len(y) > 512 else np.zeros(1024)
+        return prepare_signal(y)
 
     except Exception:
         return np.zeros(1024)
 
 
-def compute_score(input_data, sr=16000):
-    if isinstance(input_data, str):
-        y = _load_audio(input_data, sr)
-    else:
-        y = input_data
+@dataclass(frozen=True)
+class SpoofModel:
+    """Standard scaler + logistic regression over SPOOF_FEATURE_NAMES."""
+    means: np.ndarray
+    scales: np.ndarray
+    coeffs: np.ndarray
+    bias: float
+    version: str = "builtin"
+    feature_version: str = SPOOF_FEATURE_VERSION
+    created_at: str | None = None
+    metrics: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        for name in ("means", "scales", "coeffs"):
+            arr = np.asarray(getattr(self, name), dtype=np.float64)
+            if arr.shape != (len(SPOOF_FEATURE_NAMES),):
+                raise ValueError(f"{name} must have {len(SPOOF_FEATURE_NAMES)} values, got {arr.shape}")
+            arr.setflags(write=False)
+            object.__setattr__(self, name, arr)
+        # skala 0 dari StandardScaler (fitur konstan) → dibagi 1
+        object.__setattr__(self, "scales", np.where(self.scales == 0, 1.0, self.scales))
+        object.__setattr__(self, "bias", float(self.bias))
+
+    def score(self, feats):
+        """Bona fide probability for one feature vector or an [N, 3] matrix."""
+        z = (np.asarray(feats, dtype=np.float64) - self.means) / self.scales
+        return _sigmoid(z @ self.coeffs + self.bias)
+
+    def to_dict(self) -> dict:
+        return {
+            "format": SPOOF_MODEL_FORMAT,
+            "version": self.version,
+            "feature_version": self.feature_version,
+            "features": list(SPOOF_FEATURE_NAMES),
+            "created_at": self.created_at,
+            "means": self.means.tolist(),
+            "scales": self.scales.tolist(),
+            "coeffs": self.coeffs.tolist(),
+            "bias": self.bias,
+            "metrics": self.metrics,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SpoofModel":
+        if data.get("format") != SPOOF_MODEL_FORMAT:
+            raise ValueError(f"unknown spoof model format {data.get('format')!r}")
+        if data.get("feature_version") != SPOOF_FEATURE_VERSION:
+            # Model dilatih di fitur versi lain → skornya tidak bermakna
+            raise ValueError(
+                f"feature version {data.get('feature_version')!r} != {SPOOF_FEATURE_VERSION!r}"
+            )
+        return cls(
+            means=data["means"],
+            scales=data["scales"],
+            coeffs=data["coeffs"],
+            bias=data["bias"],
+            version=data["version"],
+            feature_version=data["feature_version"],
+            created_at=data.get("created_at"),
+            metrics=data.get("metrics") or {},
+        )
+
+
+BUILTIN_SPOOF_MODEL = SpoofModel(MODEL_MEANS, MODEL_SCALES, MODEL_COEFFS, MODEL_BIAS)
+
+
+def new_spoof_model(means, scales, coeffs, bias, metrics: dict | None = None) -> SpoofModel:
+    """Model with a fresh version id: UTC timestamp + hash of the parameters."""
+    created = datetime.now(timezone.utc)
+    params = json.dumps([list(map(float, means)), list(map(float, scales)),
+                         list(map(float, coeffs)), float(bias), SPOOF_FEATURE_VERSION])
+    digest = hashlib.sha256(params.encode()).hexdigest()[:8]
+    return SpoofModel(
+        means=means,
+        scales=scales,
+        coeffs=coeffs,
+        bias=bias,
+        version=f"{created:%Y%m%dT%H%M%SZ}-{digest}",
+        created_at=created.isoformat(),
+        metrics=metrics or {},
+    )
+
+
+def save_spoof_model(model: SpoofModel, path: str, keep_versioned: bool = True) -> str:
+    """
+    Write ``model`` to ``path`` atomically (temp file + rename), so a
+    running server never reads a half-written artifact. With
+    ``keep_versioned`` a copy ``<name>.<version>.json`` is kept next to it
+    for rollback.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    payload = json.dumps(model.to_dict(), indent=2)
+
+    if keep_versioned:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        with open(os.path.join(directory, f"{stem}.{model.version}.json"), "w") as f:
+            f.write(payload)
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+def load_spoof_model(path: str) -> SpoofModel:
+    with open(path) as f:
+        return SpoofModel.from_dict(json.load(f))
+
+
+class SpoofModelHolder:
+    """
+    Current spoof model, hot-reloaded from ``path``.
+
+    ``current()`` re-stats the artifact at most every ``reload_interval``
+    seconds and swaps in the new model when (mtime, size) changed. The swap
+    is a single reference assignment, so concurrent requests see either the
+    old or the new model, never a mix. A missing or invalid artifact keeps
+    whatever model was active (the builtin one at first).
+    """
+
+    def __init__(self, path: str | None = SPOOF_MODEL_PATH,
+                 reload_interval: float = SPOOF_MODEL_RELOAD_S):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._model = BUILTIN_SPOOF_MODEL
+        self._stamp = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def current(self) -> SpoofModel:
+        if self.reload_interval > 0 and time.monotonic() >= self._next_check:
+            self.reload()
+        return self._model
+
+    def reload(self) -> bool:
+        """Load the artifact if it changed on disk. True if the model was swapped."""
+        if not self.path:
+            return False
+        with self._lock:
+            self._next_check = time.monotonic() + self.reload_interval
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                return False
+            stamp = (st.st_mtime_ns, st.st_size)
+            if stamp == self._stamp:
+                return False
+            self._stamp = stamp
+
+            try:
+                model = load_spoof_model(self.path)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                SPOOF_MODEL_RELOADS.inc(result="rejected")
+                print(f"⚠️ Spoof model {self.path} rejected, keeping {self._model.version}: {e}")
+                return False
+
+            previous, self._model = self._model, model
+            SPOOF_MODEL_RELOADS.inc(result="loaded")
+            print(f"✅ Spoof model {model.version} loaded (was {previous.version})")
+            return True
 
-    if np.max(np.abs(y)) < 1e-6:
-        return 0.0, {}
 
-    stft = np.abs(librosa.stft(y, n_fft=1024, hop_length=512)) + 1e-9
+_holder: SpoofModelHolder | None = None
+
+
+def get_spoof_model() -> SpoofModel:
+    global _holder
+    if _holder is None:
+        _holder = SpoofModelHolder()
+    return _holder.current()
+
+
+def score_features(feats, model: SpoofModel | None = None):
+    """Logistic model over one feature vector or an [N, 3] feature matrix."""
+    return (model or get_spoof_model()).score(feats)
+
+
+def extract_features(y, sr=16000) -> np.ndarray:
+    """[spectral flatness, temporal energy variance, high/voice band ratio]"""
+    stft = np.abs(librosa.stft(y, n_fft=_N_FFT, hop_length=_HOP)) + 1e-9
 
     flat = np.mean(librosa.feature.spectral_flatness(S=stft))
     energy = np.mean(stft, axis=0)
     energy /= np.max(energy) if np.max(energy) > 0 else 1
     temp_var = np.var(energy)
 
-    freqs = librosa.fft_frequencies(sr=sr, n_fft=1024)
+    freqs = librosa.fft_frequencies(sr=sr, n_fft=_N_FFT)
 
     voice_band = stft[(freqs > 300) & (freqs < 3400)]
     high_band  = stft[(freqs > 10000) & (freqs < 16000)]
@@ -54,14 +273,149 @@ def compute_score(input_data, sr=16000):
 
     highband = high / voice if voice > 1e-6 else 0.0
 
-    feats = np.array([flat, temp_var, highband])
-    z = (feats - MODEL_MEANS) / MODEL_SCALES
-    score = _sigmoid(np.dot(z, MODEL_COEFFS) + MODEL_BIAS)
+    return np.array([flat, temp_var, highband], dtype=np.float64)
+
+
+def _frames(n_samples: int) -> int:
+    # librosa.stft(center=True): 1 + len // hop frame
+    return 1 + n_samples // _HOP
+
+
+def _padded_batch_features(signals: list[np.ndarray], sr: int) -> np.ndarray:
+    """
+    ``extract_features`` for equal-ish length clips in one go: every clip is
+    zero-padded to the longest, framed as [B, F, n_fft], transformed with one
+    rfft call, and the per-clip statistics are computed over each clip's own
+    frames only. librosa pads with zeros (pad_mode="constant"), so the
+    frames of a padded clip equal those of the original.
+    """
+    n = np.array([_frames(len(y)) for y in signals])
+    width = (int(n.max()) - 1) * _HOP + _N_FFT
+    half = _N_FFT // 2
+
+    batch = np.zeros((len(signals), width), dtype=np.float32)
+    for i, y in enumerate(signals):
+        batch[i, half: half + len(y)] = y[: width - half]
+
+    frames = np.lib.stride_tricks.sliding_window_view(batch, _N_FFT, axis=1)[:, ::_HOP]
+    frames = frames[:, : n.max()] * scipy.signal.get_window("hann", _N_FFT, fftbins=True).astype(np.float32)
+    S = np.abs(scipy.fft.rfft(frames, axis=-1))  # [B, F, bins] float32
+    S += 1e-9
+
+    valid = np.arange(S.shape[1])[None, :] < n[:, None]  # [B, F]
+
+    # spectral flatness per frame (librosa: power=2, amin=1e-10)
+    power = np.square(S)
+    np.maximum(power, 1e-10, out=power)
+    log_mean = np.mean(np.log(power), axis=-1, dtype=np.float64)
+    flat_frame = np.exp(log_mean) / np.mean(power, axis=-1, dtype=np.float64)
+    del power
+    flat = np.sum(flat_frame * valid, axis=1) / n
+
+    energy = np.where(valid, S.mean(axis=-1, dtype=np.float64), 0.0)
+    peak = energy.max(axis=1, keepdims=True)
+    energy = energy / np.where(peak > 0, peak, 1.0)
+    mean = np.sum(energy, axis=1, keepdims=True) / n[:, None]
+    temp_var = np.sum(np.where(valid, (energy - mean) ** 2, 0.0), axis=1) / n
+
+    freqs = librosa.fft_frequencies(sr=sr, n_fft=_N_FFT)
+    voice_bins = (freqs > 300) & (freqs < 3400)
+    high_bins = (freqs > 10000) & (freqs < 16000)
+
+    def band_mean(bins):
+        if not bins.any():
+            return np.zeros(len(signals))
+        per_frame = S[:, :, bins].sum(axis=-1, dtype=np.float64)
+        return np.sum(per_frame * valid, axis=1) / (n * bins.sum())
+
+    voice, high = band_mean(voice_bins), band_mean(high_bins)
+    highband = np.where(voice > 1e-6, high / np.where(voice > 1e-6, voice, 1.0), 0.0)
+
+    return np.stack([flat, temp_var, highband], axis=1)
+
+
+def extract_features_batch(signals: list[np.ndarray], sr=16000) -> np.ndarray:
+    """
+    ``extract_features`` for many clips: [N, 3]. Clips are grouped into
+    length buckets and each bucket is processed as padded batches of at
+    most SPOOF_BATCH_MAX_FRAMES STFT frames.
+    """
+    out = np.zeros((len(signals), len(SPOOF_FEATURE_NAMES)), dtype=np.float64)
+    if not signals:
+        return out
+
+    n = np.array([_frames(len(y)) for y in signals])
+    bucket = -(-n // SPOOF_BUCKET_FRAMES)
+
+    for b in np.unique(bucket):
+        idx = np.flatnonzero(bucket == b)
+        per_batch = max(SPOOF_BATCH_MAX_FRAMES // (int(b) * SPOOF_BUCKET_FRAMES), 1)
+        for start in range(0, idx.size, per_batch):
+            chunk = idx[start: start + per_batch]
+            out[chunk] = _padded_batch_features([signals[i] for i in chunk], sr)
+    return out
+
+
+def compute_scores(inputs, sr=16000, model: SpoofModel | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Batch version of ``compute_score`` for offline scoring.
+
+    ``inputs`` is a list of paths and/or arrays at ``sr``. Returns
+    ``(scores [N], features [N, 3])``; silent clips score 0.0 with NaN
+    features, like ``compute_score``. Cached features are reused and only
+    the missing ones go through the batched STFT; the whole matrix is then
+    scored with one logistic evaluation.
+    """
+    signals = [_load_audio(x, sr) if isinstance(x, str) else x for x in inputs]
+    feats = np.full((len(signals), len(SPOOF_FEATURE_NAMES)), np.nan)
+
+    cache = get_feature_cache()
+    version = f"{SPOOF_FEATURE_VERSION}:{sr}"
+    todo, keys = [], []
+    for i, y in enumerate(signals):
+        if np.max(np.abs(y)) < 1e-6:
+            continue
+        key = feature_key(y, "asvspoof", version)
+        cached = cache.get(key, "asvspoof")
+        if cached is None:
+            todo.append(i)
+            keys.append(key)
+        else:
+            feats[i] = cached
+
+    if todo:
+        computed = extract_features_batch([signals[i] for i in todo], sr)
+        for i, key, row in zip(todo, keys, computed):
+            feats[i] = cache.put(key, row)
+
+    silent = np.isnan(feats).any(axis=1)
+    scores = np.where(silent, 0.0, (model or get_spoof_model()).score(np.nan_to_num(feats)))
+    return scores, feats
+
+
+def compute_score(input_data, sr=16000):
+    if isinstance(input_data, str):
+        y = _load_audio(input_data, sr)
+    else:
+        y = input_data
+
+    if np.max(np.abs(y)) < 1e-6:
+        return 0.0, {}
+
+    # Fitur di-cache per isi audio; koefisien model diterapkan sesudahnya
+    feats = get_feature_cache().get_or_compute(
+        y, "asvspoof", f"{SPOOF_FEATURE_VERSION}:{sr}", lambda: extract_features(y, sr)
+    )
+    flat, temp_var, highband = (float(v) for v in feats)
+
+    model = get_spoof_model()
+    score = float(model.score(feats))
 
     print(f"ASVspoof Score: {score:.4f} (flat: {flat:.4f}, var: {temp_var:.4f}, high: {highband:.4f})")
     return score, {
         "flatness": flat,
         "temporal_var": temp_var,
         "highband": highband,
-        "ml_prob": score
+        "ml_prob": score,
+        "model_version": model.version,
     }
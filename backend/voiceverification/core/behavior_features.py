@@ -0,0 +1,167 @@
+"""Pitch and syllable rate for behavior scoring.
+
+Replaces ``librosa.yin`` over the whole clip (and clip duration as "rate"):
+
+* a simple energy + zero-crossing VAD marks voiced 10 ms frames
+* pitch: only voiced 40 ms frames (at most one per 20 ms) are analysed,
+  all at once, with an FFT autocorrelation (``irfft(|rfft|^2)``)
+  normalized by the window's own autocorrelation; the best lag in
+  [sr/fmax, sr/fmin] is refined by parabolic interpolation, and the clip
+  pitch is the median over frames whose normalized peak is above
+  BEHAVIOR_VOICING_THRESHOLD
+* rate (with BEHAVIOR_SYLLABLE_RATE=1): syllable nuclei are peaks of the smoothed log-energy envelope that
+  fall on voiced frames, at least 100 ms apart and BEHAVIOR_PEAK_PROMINENCE_DB
+  above their surroundings; rate = nuclei / seconds between the first and
+  last voiced frame
+
+See ``services/benchmark_behavior.py`` for a comparison against yin.
+"""
+
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.fft
+import scipy.signal
+
+BEHAVIOR_FMIN = 50.0
+BEHAVIOR_FMAX = 300.0
+BEHAVIOR_VOICING_THRESHOLD = float(os.getenv("BEHAVIOR_VOICING_THRESHOLD", "0.5"))
+BEHAVIOR_PEAK_PROMINENCE_DB = float(os.getenv("BEHAVIOR_PEAK_PROMINENCE_DB", "3.0"))
+# Default 0: "rate" tetap durasi clip seperti sebelumnya, karena mean_rate /
+# var_rate profil yang tersimpan masih dalam detik. Baru set 1 setelah semua
+# profil dibangun ulang, kalau tidak dua satuan tercampur di statistik Welford.
+BEHAVIOR_SYLLABLE_RATE = os.getenv("BEHAVIOR_SYLLABLE_RATE", "0") == "1"
+
+_HOP_S = 0.010
+_FRAME_S = 0.040       # >= 2 periode di fmin 50 Hz
+_VAD_REL_DB = -30.0    # relatif ke frame paling keras
+_VAD_MAX_ZCR = 0.25    # zero-crossing per sampel; di atas ini frikatif / noise
+_SMOOTH_S = 0.050
+_MIN_SYLLABLE_GAP_S = 0.100
+_MIN_SPEECH_S = 0.5
+_PITCH_STRIDE = 2      # frame VAD per frame pitch
+
+
+@dataclass
+class BehaviorFeatures:
+    pitch: float | None       # Hz, median over voiced frames
+    rate: float | None        # syllables per second of speech
+    voiced_ratio: float
+    n_pitch_frames: int
+    n_syllables: int
+
+
+def _frame(y: np.ndarray, length: int, hop: int) -> np.ndarray:
+    if len(y) < length:
+        y = np.pad(y, (0, length - len(y)))
+    return np.lib.stride_tricks.sliding_window_view(y, length)[::hop]
+
+
+def voiced_frames(y: np.ndarray, sr: int) -> tuple[np.ndarray, np.ndarray]:
+    """(voiced mask, frame RMS) on a 10 ms grid of 10 ms frames."""
+    hop = int(sr * _HOP_S)
+    frames = _frame(y, hop, hop)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    zcr = np.mean(np.abs(np.diff(np.signbit(frames), axis=1)), axis=1)
+
+    thr = max(float(rms.max()) * 10 ** (_VAD_REL_DB / 20), 1e-4) if rms.size else 1e-4
+    return (rms > thr) & (zcr < _VAD_MAX_ZCR), rms
+
+
+def frame_pitch(frames: np.ndarray, sr: int,
+                fmin: float = BEHAVIOR_FMIN, fmax: float = BEHAVIOR_FMAX) -> tuple[np.ndarray, np.ndarray]:
+    """
+    f0 (Hz) and voicing strength (normalized autocorrelation peak, 0–1)
+    for every row of ``frames`` in one batched FFT.
+    """
+    n = frames.shape[1]
+    lo = max(int(sr / fmax), 1)
+    hi = min(int(np.ceil(sr / fmin)), n - 2)
+    # cukup n + lag maksimum supaya autokorelasi sirkular tidak membungkus
+    n_fft = 1 << int(np.ceil(np.log2(n + hi + 2)))
+    window = np.hanning(n).astype(np.float32)
+
+    x = frames.astype(np.float32)
+    x = (x - x.mean(axis=1, keepdims=True)) * window
+    spec = scipy.fft.rfft(x, n=n_fft, axis=1)
+    ac = scipy.fft.irfft(spec.real ** 2 + spec.imag ** 2, n=n_fft, axis=1)[:, :hi + 2]
+
+    # bagi autokorelasi window supaya lag panjang tidak dihukum (Boersma 1993)
+    w_spec = scipy.fft.rfft(window, n=n_fft)
+    w_ac = scipy.fft.irfft(np.abs(w_spec) ** 2, n=n_fft)[:hi + 2]
+    ac = ac / np.maximum(ac[:, :1], 1e-12) / np.maximum(w_ac / w_ac[0], 1e-3)
+
+    band = ac[:, lo:hi + 1]
+    strength = band.max(axis=1)
+
+    # Hindari kesalahan oktaf: puncak lokal pertama yang hampir setinggi puncak global
+    near = band >= 0.9 * strength[:, None]
+    cols = np.arange(band.shape[1])
+    first = np.argmax(near, axis=1)[:, None]
+    gap = ~near & (cols >= first)
+    end = np.where(gap.any(axis=1), np.argmax(gap, axis=1), band.shape[1])[:, None]
+    run = (cols >= first) & (cols < end)
+    lag = np.argmax(np.where(run, band, -np.inf), axis=1) + lo
+
+    # interpolasi parabola di sekitar puncak
+    rows = np.arange(len(ac))
+    a, b, c = ac[rows, lag - 1], ac[rows, lag], ac[rows, lag + 1]
+    denom = a - 2 * b + c
+    shift = np.where(np.abs(denom) > 1e-12, 0.5 * (a - c) / np.where(denom == 0, 1, denom), 0.0)
+    f0 = sr / (lag + np.clip(shift, -0.5, 0.5))
+    return f0, np.clip(ac[rows, lag], 0.0, 1.0)
+
+
+def syllable_count(rms: np.ndarray, voiced: np.ndarray) -> int:
+    """Peaks of the smoothed log-energy envelope that land on voiced frames."""
+    if rms.size < 3:
+        return 0
+    env = 20 * np.log10(rms + 1e-8)
+    k = max(int(round(_SMOOTH_S / _HOP_S)), 1)
+    env = np.convolve(env, np.ones(k) / k, mode="same")
+
+    peaks, _ = scipy.signal.find_peaks(
+        env,
+        distance=max(int(_MIN_SYLLABLE_GAP_S / _HOP_S), 1),
+        prominence=BEHAVIOR_PEAK_PROMINENCE_DB,
+    )
+    return int(np.count_nonzero(voiced[peaks]))
+
+
+def extract_behavior_features(y: np.ndarray, sr: int = 16000) -> BehaviorFeatures:
+    y = np.asarray(y, dtype=np.float64)
+    voiced, rms = voiced_frames(y, sr)
+    idx = np.flatnonzero(voiced)
+    if idx.size == 0:
+        return BehaviorFeatures(None, None, 0.0, 0, 0)
+
+    # frame pitch 40 ms berpusat di frame VAD voiced, paling rapat tiap 20 ms
+    hop, length = int(sr * _HOP_S), int(sr * _FRAME_S)
+    pitch_idx = idx[np.r_[True, np.diff(idx // _PITCH_STRIDE) > 0]]
+    starts = np.clip(pitch_idx * hop + hop // 2 - length // 2, 0, max(len(y) - length, 0))
+    frames = _frame(y, length, 1)[starts] if len(y) >= length else _frame(y, length, 1)[:1]
+
+    f0, strength = frame_pitch(frames, sr)
+    ok = strength >= BEHAVIOR_VOICING_THRESHOLD
+    pitch = float(np.median(f0[ok])) if ok.any() else None
+
+    n_syllables = syllable_count(rms, voiced)
+    speech_s = (idx[-1] - idx[0] + 1) * _HOP_S
+    rate = n_syllables / speech_s if speech_s >= _MIN_SPEECH_S else None
+
+    return BehaviorFeatures(
+        pitch=pitch,
+        rate=rate,
+        voiced_ratio=float(voiced.mean()),
+        n_pitch_frames=int(ok.sum()),
+        n_syllables=n_syllables,
+    )
+
+
+def behavior_pitch_rate(y: np.ndarray, sr: int = 16000) -> tuple[float | None, float | None]:
+    """(pitch, rate) as stored in BehaviorProfile; None when the clip has no usable speech."""
+    feats = extract_behavior_features(y, sr)
+    if not BEHAVIOR_SYLLABLE_RATE:
+        return feats.pitch, float(len(y) / sr)
+    return feats.pitch, feats.rate
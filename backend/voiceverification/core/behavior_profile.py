@@ -1,41 +1,163 @@
-import math
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from typing import Mapping, Sequence
+
+import numpy as np
+
+# Urutan fitur default; profil lama (kolom mean_pitch / mean_rate) memetakan ke sini
+BEHAVIOR_FEATURES = ("pitch", "rate")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
 
 
 @dataclass
 class BehaviorProfile:
+    """
+    Running statistics of an arbitrary behavior feature vector.
+
+    ``mean`` and ``m2`` are Welford accumulators, one entry per name in
+    ``features`` (``m2 / counts`` is the variance). A feature missing from
+    an update (None / NaN) is skipped and does not advance its ``counts``.
+    """
     n_samples: int = 0
-    mean_pitch: float = 0.0
-    var_pitch: float = 0.0
-    mean_rate: float = 0.0
-    var_rate: float = 0.0
-    last_update_ts: datetime = datetime.now(timezone.utc)
-    
+    features: tuple[str, ...] = BEHAVIOR_FEATURES
+    mean: np.ndarray = None
+    m2: np.ndarray = None
+    counts: np.ndarray = None
+    last_update_ts: datetime = field(default_factory=_now)
+
+    def __post_init__(self):
+        self.features = tuple(self.features)
+        k = len(self.features)
+        self.mean = np.zeros(k) if self.mean is None else np.asarray(self.mean, dtype=np.float64).copy()
+        self.m2 = np.zeros(k) if self.m2 is None else np.asarray(self.m2, dtype=np.float64).copy()
+        if self.counts is None:
+            self.counts = np.full(k, self.n_samples, dtype=np.int64)
+        else:
+            self.counts = np.asarray(self.counts, dtype=np.int64).copy()
+        if not (self.mean.shape == self.m2.shape == self.counts.shape == (k,)):
+            raise ValueError(f"mean / m2 / counts must have {k} entries")
+
+    @classmethod
+    def from_legacy(cls, n_samples, mean_pitch, var_pitch, mean_rate, var_rate,
+                    last_update_ts: datetime | None = None) -> "BehaviorProfile":
+        """
+        Profile from the old pitch / rate columns (``var_*`` are Welford M2).
+
+        The columns hold a single ``n_samples``, so every stored feature gets
+        that count; a NULL mean means the feature was never measured (count 0).
+        """
+        means = [mean_pitch, mean_rate]
+        m2s = [var_pitch, var_rate]
+        return cls(
+            n_samples=n_samples,
+            features=BEHAVIOR_FEATURES,
+            mean=[0.0 if m is None else m for m in means],
+            m2=[0.0 if m is None or v is None else v for m, v in zip(means, m2s)],
+            counts=[0 if m is None else n_samples for m in means],
+            last_update_ts=last_update_ts or _now(),
+        )
+
+    # ---- akses ----
+    def index(self, name: str) -> int:
+        return self.features.index(name)
+
+    def vector(self, values: Mapping[str, float | None] | Sequence[float]) -> np.ndarray:
+        """``values`` in this profile's feature order; missing → NaN."""
+        if isinstance(values, Mapping):
+            return np.array(
+                [np.nan if values.get(f) is None else values[f] for f in self.features],
+                dtype=np.float64,
+            )
+        vec = np.asarray(values, dtype=np.float64)
+        if vec.shape != (len(self.features),):
+            raise ValueError(f"expected {len(self.features)} values, got {vec.shape}")
+        return vec
+
     @property
-    def std_pitch(self):
-        # Calculate actual variance (M2 / n) before sqrt
-        actual_var = self.var_pitch / self.n_samples if self.n_samples > 0 else 0
-        return math.sqrt(actual_var) if actual_var > 1e-9 else 1e-6
-    
+    def std(self) -> np.ndarray:
+        # Variansi sebenarnya (M2 / n) sebelum sqrt; terlalu kecil → 1e-6
+        var = np.divide(self.m2, self.counts, out=np.zeros_like(self.m2), where=self.counts > 0)
+        return np.where(var > 1e-9, np.sqrt(np.maximum(var, 0.0)), 1e-6)
+
+    def mean_of(self, name: str) -> float:
+        return float(self.mean[self.index(name)])
+
+    def std_of(self, name: str) -> float:
+        return float(self.std[self.index(name)])
+
     @property
-    def std_rate(self):
-        actual_var = self.var_rate / self.n_samples if self.n_samples > 0 else 0
-        return math.sqrt(actual_var) if actual_var > 1e-9 else 1e-6
-    
-    def update(self, pitch: float, rate: float, ts: datetime):
+    def mean_pitch(self) -> float:
+        return self.mean_of("pitch")
+
+    @property
+    def mean_rate(self) -> float:
+        return self.mean_of("rate")
+
+    @property
+    def std_pitch(self) -> float:
+        return self.std_of("pitch")
+
+    @property
+    def std_rate(self) -> float:
+        return self.std_of("rate")
+
+    # ---- update ----
+    def update(self, values: Mapping[str, float | None] | Sequence[float], ts: datetime):
         if isinstance(ts, (int, float)):
             ts = datetime.fromtimestamp(ts, tz=timezone.utc)
+        x = self.vector(values)
+        ok = np.isfinite(x)
+
         self.n_samples += 1
-        
-        # Update pitch stats
-        dp = pitch - self.mean_pitch
-        self.mean_pitch += dp / self.n_samples
-        self.var_pitch += dp * (pitch - self.mean_pitch)
-
-        # Update rate stats
-        dr = rate - self.mean_rate
-        self.mean_rate += dr / self.n_samples
-        self.var_rate += dr * (rate - self.mean_rate)
-
-        self.last_update_ts = ts
\ No newline at end of file
+        self.counts = self.counts + ok
+        delta = np.where(ok, x - self.mean, 0.0)
+        self.mean = self.mean + np.divide(delta, self.counts, out=np.zeros_like(delta), where=ok)
+        self.m2 = self.m2 + np.where(ok, delta * (x - self.mean), 0.0)
+
+        self.last_update_ts = ts
+
+    # ---- serialisasi (kolom JSON) ----
+    def to_stats(self) -> dict:
+        return {
+            "features": list(self.features),
+            "mean": [float(v) for v in self.mean],
+            "m2": [float(v) for v in self.m2],
+            "counts": [int(v) for v in self.counts],
+        }
+
+    @classmethod
+    def from_stats(cls, stats: Mapping, n_samples: int, last_update_ts: datetime | None = None) -> "BehaviorProfile":
+        return cls(
+            n_samples=n_samples,
+            features=tuple(stats["features"]),
+            mean=stats["mean"],
+            m2=stats["m2"],
+            counts=stats.get("counts"),
+            last_update_ts=last_update_ts or _now(),
+        )
+
+
+def stack_profiles(profiles: Sequence[BehaviorProfile],
+                   features: Sequence[str] = BEHAVIOR_FEATURES) -> tuple[np.ndarray, np.ndarray]:
+    """
+    ``(means, stds)`` as [N, F] matrices in ``features`` order. Features a
+    profile does not track (or has no samples for) are NaN.
+    """
+    features = tuple(features)
+    means = np.full((len(profiles), len(features)), np.nan)
+    stds = np.full_like(means, np.nan)
+    for i, p in enumerate(profiles):
+        if p.features == features:
+            cols, src = slice(None), slice(None)
+        else:
+            pairs = [(j, p.features.index(f)) for j, f in enumerate(features) if f in p.features]
+            if not pairs:
+                continue
+            cols, src = (np.array(idx) for idx in zip(*pairs))
+        has = p.counts[src] > 0
+        means[i, cols] = np.where(has, p.mean[src], np.nan)
+        stds[i, cols] = np.where(has, p.std[src], np.nan)
+    return means, stds
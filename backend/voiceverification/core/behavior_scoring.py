@@ -1,22 +1,67 @@
+from typing import Mapping, Sequence
+
 import numpy as np
 
+from core.behavior_profile import BEHAVIOR_FEATURES, BehaviorProfile, stack_profiles
+
+
 def zscore(x, mean, std):
     """
-    Z-score normalization
+    Z-score normalization (element-wise for arrays)
     """
-    return (x - mean) / (std if std > 1e-6 else 1e-6)
+    std = np.asarray(std, dtype=np.float64)
+    return (np.asarray(x, dtype=np.float64) - mean) / np.where(std > 1e-6, std, 1e-6)
 
-def compute_behavior_score(live_pitch, live_rate, profile):
+
+def score_matrix(values, means, stds) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Compute behavior score based on z-scores of pitch and rate
+    Gaussian behavior score for N (live vector, profile) pairs at once.
+
+    ``values`` is [F] (one live sample against every profile) or [N, F];
+    ``means`` / ``stds`` are [N, F]. NaN entries (feature not measured or
+    not tracked by the profile) are left out of the average.
+    Returns ``(scores [N], z [N, F], per_feature [N, F])``; a row without
+    any usable feature scores NaN.
     """
-    z_pitch = zscore(live_pitch, profile.mean_pitch, profile.std_pitch)
-    z_rate = zscore(live_rate, profile.mean_rate, profile.std_rate)
+    z = zscore(values, means, stds)
+    per_feature = np.exp(-0.5 * z ** 2)
+    ok = np.isfinite(per_feature)
+    n = ok.sum(axis=-1)
+    total = np.where(ok, per_feature, 0.0).sum(axis=-1)
+    scores = np.divide(total, n, out=np.full(total.shape, np.nan), where=n > 0)
+    return scores, z, per_feature
 
-    # Combine z-scores into a behavior score
-    score_pitch = np.exp(-0.5 * z_pitch**2)
-    score_rate = np.exp(-0.5 * z_rate**2)
 
-    behavior_score = 0.5 * (score_pitch + score_rate)
+def score_profiles(values: Mapping[str, float | None],
+                   profiles: Mapping[str, BehaviorProfile],
+                   features: Sequence[str] = BEHAVIOR_FEATURES) -> dict[str, dict]:
+    """
+    Score one live feature set against every profile of a user (e.g. all
+    enrollment labels) in one vectorized call.
+    Returns ``{label: {"score", "z": {feature: z}}}``.
+    """
+    if not profiles:
+        return {}
+    features = tuple(features)
+    labels = list(profiles)
+    means, stds = stack_profiles([profiles[lbl] for lbl in labels], features)
+    live = np.array([np.nan if values.get(f) is None else values[f] for f in features], dtype=np.float64)
+    scores, z, _ = score_matrix(live, means, stds)
+
+    return {
+        lbl: {
+            "score": None if np.isnan(scores[i]) else float(scores[i]),
+            "z": {f: float(z[i, j]) for j, f in enumerate(features) if np.isfinite(z[i, j])},
+        }
+        for i, lbl in enumerate(labels)
+    }
 
-    return behavior_score, z_pitch, z_rate, score_pitch, score_rate 
\ No newline at end of file
+
+def compute_behavior_score(live_pitch, live_rate, profile):
+    """
+    Compute behavior score based on z-scores of pitch and rate
+    """
+    scores, z, per_feature = score_matrix(
+        [live_pitch, live_rate], *stack_profiles([profile], BEHAVIOR_FEATURES)
+    )
+    return float(scores[0]), float(z[0, 0]), float(z[0, 1]), float(per_feature[0, 0]), float(per_feature[0, 1])
@@ -1,30 +1,165 @@
+from dataclasses import dataclass
+
 import numpy as np
 
+DEFAULT_TARGET_FARS = (0.1, 0.01, 0.001)
+
+
+@dataclass
+class ErrorCurve:
+    """
+    FAR / FRR at every candidate threshold (ascending).
+
+    A trial is accepted when ``score >= threshold``:
+    FAR = fraction of impostor scores >= t, FRR = fraction of genuine < t.
+    """
+    thresholds: np.ndarray
+    far: np.ndarray
+    frr: np.ndarray
+
+    @property
+    def tpr(self) -> np.ndarray:
+        return 1.0 - self.frr
+
+    @property
+    def eer_index(self) -> int:
+        return int(np.argmin(np.abs(self.far - self.frr)))
+
+    @property
+    def eer_threshold(self) -> float:
+        return float(self.thresholds[self.eer_index])
+
+    @property
+    def eer(self) -> float:
+        i = self.eer_index
+        return float((self.far[i] + self.frr[i]) / 2)
+
+
+def det_curve(scores_genuine, scores_impostor, thresholds=None) -> ErrorCurve:
+    """
+    Full FAR / FRR curve in O(n log n): both score sets are sorted once and
+    every threshold is located with a binary search instead of re-scanning
+    all scores per threshold. Defaults to every unique score as threshold.
+    """
+    genuine = np.sort(np.asarray(scores_genuine, dtype=np.float64))
+    impostor = np.sort(np.asarray(scores_impostor, dtype=np.float64))
+
+    if thresholds is None:
+        thresholds = np.unique(np.concatenate([genuine, impostor]))
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+
+    far = (impostor.size - np.searchsorted(impostor, thresholds, side="left")) / impostor.size
+    frr = np.searchsorted(genuine, thresholds, side="left") / genuine.size
+    return ErrorCurve(thresholds=thresholds, far=far, frr=frr)
+
 
 def find_eer_threshold(scores_genuine, scores_impostor):
     """
     Cari threshold Equal Error Rate (EER)
     """
-    scores = np.concatenate([scores_genuine, scores_impostor])
-    labels = np.concatenate([
-        np.ones(len(scores_genuine)),     # genuine = 1
-        np.zeros(len(scores_impostor)),   # impostor = 0
-    ])
+    curve = det_curve(scores_genuine, scores_impostor)
+    return curve.eer_threshold, curve.eer
+
+
+def operating_points(curve: ErrorCurve, target_fars=DEFAULT_TARGET_FARS) -> list[dict]:
+    """
+    Lowest threshold whose FAR <= target, for each target FAR (i.e. the
+    best FRR achievable at that FAR). ``threshold`` is None if the target
+    cannot be met.
+    """
+    points = []
+    for target in target_fars:
+        ok = curve.far <= target
+        if not ok.any():
+            points.append({"target_far": target, "threshold": None, "far": None, "frr": None})
+            continue
+        i = int(np.argmax(ok))  # FAR turun monoton → indeks pertama = threshold terendah
+        points.append({
+            "target_far": target,
+            "threshold": float(curve.thresholds[i]),
+            "far": float(curve.far[i]),
+            "frr": float(curve.frr[i]),
+        })
+    return points
+
+
+def _grid(genuine: np.ndarray, impostor: np.ndarray, max_grid: int) -> np.ndarray:
+    pooled = np.concatenate([genuine, impostor])
+    grid = np.unique(pooled)
+    if grid.size > max_grid:
+        grid = np.unique(np.quantile(pooled, np.linspace(0, 1, max_grid)))
+    return grid
+
+
+def bootstrap_error_rates(
+    scores_genuine,
+    scores_impostor,
+    n_boot: int = 1000,
+    alpha: float = 0.05,
+    target_fars=DEFAULT_TARGET_FARS,
+    max_grid: int = 2000,
+    seed: int | None = 0,
+) -> dict:
+    """
+    Bootstrap confidence intervals for EER, EER threshold and FRR at target FARs.
+
+    Scores are histogrammed once over a threshold grid (all unique scores,
+    or ``max_grid`` quantiles for large sets). Resampling n scores with
+    replacement is the same as drawing multinomial counts over those bins,
+    so all ``n_boot`` replicates come from one [n_boot, bins] count matrix
+    and two cumulative sums, independent of the number of trials.
+    """
+    genuine = np.asarray(scores_genuine, dtype=np.float64)
+    impostor = np.asarray(scores_impostor, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+
+    grid = _grid(genuine, impostor, max_grid)
+
+    # bin 0 = di bawah grid[0], bin k+1 = [grid[k], grid[k+1])
+    def counts(x):
+        idx = np.searchsorted(grid, x, side="right")
+        return np.bincount(idx, minlength=grid.size + 1)
+
+    p_gen = counts(genuine) / genuine.size
+    p_imp = counts(impostor) / impostor.size
+
+    boot_gen = rng.multinomial(genuine.size, p_gen, size=n_boot)
+    boot_imp = rng.multinomial(impostor.size, p_imp, size=n_boot)
+
+    # FRR(grid[k]) = #genuine < grid[k] = bin 0..k
+    frr = np.cumsum(boot_gen, axis=1)[:, :-1] / genuine.size
+    # FAR(grid[k]) = #impostor >= grid[k] = bin k+1..end
+    far = np.cumsum(boot_imp[:, ::-1], axis=1)[:, ::-1][:, 1:] / impostor.size
+
+    eer_idx = np.argmin(np.abs(far - frr), axis=1)
+    rows = np.arange(n_boot)
+    eers = (far[rows, eer_idx] + frr[rows, eer_idx]) / 2
+    eer_thresholds = grid[eer_idx]
 
-    thresholds = np.unique(scores)
-    fars, frrs = [], []
+    q = [100 * alpha / 2, 100 * (1 - alpha / 2)]
 
-    for t in thresholds:
-        far = np.mean(scores_impostor >= t)   # false accept
-        frr = np.mean(scores_genuine < t)     # false reject
-        fars.append(far)
-        frrs.append(frr)
+    def interval(x):
+        lo, hi = np.percentile(x, q)
+        return [float(lo), float(hi)]
 
-    fars = np.array(fars)
-    frrs = np.array(frrs)
+    curve = det_curve(genuine, impostor)
+    out = {
+        "eer": curve.eer,
+        "eer_threshold": curve.eer_threshold,
+        "eer_ci": interval(eers),
+        "eer_threshold_ci": interval(eer_thresholds),
+        "operating_points": operating_points(curve, target_fars),
+        "n_boot": n_boot,
+        "alpha": alpha,
+    }
 
-    eer_idx = np.argmin(np.abs(fars - frrs))
-    eer_threshold = thresholds[eer_idx]
-    eer = (fars[eer_idx] + frrs[eer_idx]) / 2
+    for point in out["operating_points"]:
+        ok = far <= point["target_far"]
+        reachable = ok.any(axis=1)
+        if point["threshold"] is None or not reachable.any():
+            point["frr_ci"] = None
+            continue
+        first = np.argmax(ok, axis=1)
+        point["frr_ci"] = interval(frr[rows, first][reachable])
 
-    return float(eer_threshold), float(eer)
+    return out
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
+
 class Decision(Enum):
     VERIFIED = "VERIFIED"
     REPEAT = "REPEAT"
@@ -62,6 +64,42 @@ def decide(
     return Decision.DENIED, "Speaker verification failed"
 
 
+# Urutan kode untuk decide_batch
+DECISION_CODES = (Decision.VERIFIED, Decision.REPEAT, Decision.DENIED)
+VERIFIED_CODE, REPEAT_CODE, DENIED_CODE = 0, 1, 2
+
+
+def decide_batch(
+        speaker_scores,
+        replay_probs,
+        config: DecisionConfig | None = None,
+) -> np.ndarray:
+    """
+    Vectorized ``decide`` over arrays of scores.
+
+    Returns an int8 array of indices into DECISION_CODES; the rules and
+    their precedence are exactly those of ``decide``.
+    """
+    if config is None:
+        config = DecisionConfig()
+
+    s = np.asarray(speaker_scores, dtype=np.float64)
+    r = np.asarray(replay_probs, dtype=np.float64)
+
+    # np.select: kondisi pertama yang True menang, sama seperti if-chain di decide
+    return np.select(
+        [
+            s < config.abs_min_speaker,
+            r >= config.replay_deny,
+            r >= config.replay_warn,
+            s >= config.voice_accept,
+            s >= config.voice_repeat,
+        ],
+        [DENIED_CODE, DENIED_CODE, REPEAT_CODE, VERIFIED_CODE, REPEAT_CODE],
+        default=DENIED_CODE,
+    ).astype(np.int8)
+
+
 # def build_decision_config(
 #     user: UserProfile | None,
 #     base: DecisionConfig = DecisionConfig()
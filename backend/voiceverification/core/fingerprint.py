@@ -0,0 +1,113 @@
+"""Landmark (spectral-peak pair) audio fingerprint.
+
+Used to catch exact replays: an attacker re-submitting a recording of an
+earlier verification clip. Spectral-statistic checks in
+``core.replay_heuristic`` look at a single clip and cannot see that.
+
+A clip is reduced to its strongest local maxima in the log spectrogram.
+Each peak (anchor) is paired with a few following peaks, and every pair
+becomes a 24-bit hash ``f_anchor | f_target | dt`` plus the anchor frame.
+Peaks survive re-recording through a speaker and re-encoding, so a replay
+shares many hashes with the original *at a constant time offset*, while
+unrelated clips only collide by chance at scattered offsets.
+"""
+
+import os
+from dataclasses import dataclass
+
+import librosa
+import numpy as np
+from scipy.ndimage import maximum_filter
+
+FP_SR = 16000
+FP_N_FFT = 1024
+FP_HOP = 256  # 16 ms per frame
+
+# Ukuran tetangga peak: (bin frekuensi, frame)
+FP_PEAK_NEIGHBORHOOD = (21, 11)
+FP_PEAK_FLOOR_DB = 60.0
+FP_PEAKS_PER_SECOND = int(os.getenv("FINGERPRINT_PEAKS_PER_SECOND", "30"))
+FP_FAN_OUT = int(os.getenv("FINGERPRINT_FAN_OUT", "5"))
+FP_MAX_DT = 63   # frame, muat di 6 bit
+FP_MAX_DF = 96   # bin
+
+_F_BITS = 9      # bin 0..511
+_DT_BITS = 6
+
+
+@dataclass
+class Fingerprint:
+    hashes: np.ndarray   # uint32
+    offsets: np.ndarray  # int32, anchor frame
+
+    def __len__(self) -> int:
+        return int(self.hashes.size)
+
+
+def _peaks(S_db: np.ndarray, duration: float) -> tuple[np.ndarray, np.ndarray]:
+    """Strongest local maxima, sorted by time. Returns (freq_bins, frames)."""
+    local_max = S_db == maximum_filter(S_db, size=FP_PEAK_NEIGHBORHOOD, mode="constant", cval=-np.inf)
+    mask = local_max & (S_db > S_db.max() - FP_PEAK_FLOOR_DB)
+    f, t = np.nonzero(mask)
+
+    limit = max(int(np.ceil(duration * FP_PEAKS_PER_SECOND)), 1)
+    if f.size > limit:
+        top = np.argpartition(S_db[f, t], -limit)[-limit:]
+        f, t = f[top], t[top]
+
+    order = np.lexsort((f, t))
+    return f[order], t[order]
+
+
+def fingerprint_signal(y: np.ndarray, sr: int = FP_SR) -> Fingerprint:
+    if sr != FP_SR:
+        y = librosa.resample(y, orig_sr=sr, target_sr=FP_SR)
+
+    if y.size < FP_N_FFT:
+        return Fingerprint(np.empty(0, np.uint32), np.empty(0, np.int32))
+
+    S = np.abs(librosa.stft(y, n_fft=FP_N_FFT, hop_length=FP_HOP))[: 1 << _F_BITS]
+    S_db = librosa.amplitude_to_db(S + 1e-9, ref=np.max)
+    f, t = _peaks(S_db, y.size / FP_SR)
+
+    hashes, offsets = [], []
+    # Pasangkan tiap anchor dengan FP_FAN_OUT peak berikutnya (urut waktu)
+    for k in range(1, FP_FAN_OUT + 1):
+        if f.size <= k:
+            break
+        f1, t1 = f[:-k], t[:-k]
+        f2, t2 = f[k:], t[k:]
+        dt = t2 - t1
+        ok = (dt >= 1) & (dt <= FP_MAX_DT) & (np.abs(f2 - f1) <= FP_MAX_DF)
+        h = (
+            (f1[ok].astype(np.uint32) << (_F_BITS + _DT_BITS))
+            | (f2[ok].astype(np.uint32) << _DT_BITS)
+            | dt[ok].astype(np.uint32)
+        )
+        hashes.append(h)
+        offsets.append(t1[ok].astype(np.int32))
+
+    if not hashes:
+        return Fingerprint(np.empty(0, np.uint32), np.empty(0, np.int32))
+    return Fingerprint(np.concatenate(hashes), np.concatenate(offsets))
+
+
+def compute_fingerprint(wav_path) -> Fingerprint:
+    y, _ = librosa.load(wav_path, sr=FP_SR)
+    return fingerprint_signal(y)
+
+
+def best_offset_vote(clip_ids: np.ndarray, deltas: np.ndarray) -> tuple[int, int]:
+    """
+    Time-offset voting over index hits.
+
+    ``clip_ids[i]`` / ``deltas[i]`` (stored offset - query offset) describe one
+    matching hash. Returns (clip_id, votes) of the most voted
+    (clip, offset) pair, or (-1, 0) without hits.
+    """
+    if clip_ids.size == 0:
+        return -1, 0
+    pairs = np.stack([clip_ids.astype(np.int64), deltas.astype(np.int64)], axis=1)
+    uniq, counts = np.unique(pairs, axis=0, return_counts=True)
+    best = int(np.argmax(counts))
+    return int(uniq[best, 0]), int(counts[best])
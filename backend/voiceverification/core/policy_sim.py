@@ -0,0 +1,272 @@
+"""Replay historical (speaker_score, replay_prob) pairs through DecisionConfig candidates.
+
+``PolicySimulator`` loads the decision log once. ``evaluate(config)`` runs
+the vectorized ``decide_batch`` over every trial. ``grid_search`` and
+``coordinate_search`` do not re-run the rules per candidate at all: every
+threshold in the search space is placed on two sorted axes and a 2-D
+cumulative count table ``#(speaker >= a, replay < b)`` is built once. After
+that the VERIFIED / REPEAT / DENIED counts of any config are a handful of
+table lookups, so millions of candidates over months of logs take seconds.
+
+Expected retry count assumes each REPEAT is followed by an independent new
+attempt: with repeat rate p it is p / (1 - p), or sum(p^k, k=1..max_retries)
+when retries are capped.
+"""
+
+import csv
+import itertools
+from dataclasses import asdict, dataclass, fields
+
+import numpy as np
+
+from core.decision_engine import (
+    DENIED_CODE,
+    REPEAT_CODE,
+    VERIFIED_CODE,
+    DecisionConfig,
+    decide_batch,
+)
+
+SPEAKER_PARAMS = ("voice_accept", "voice_repeat", "abs_min_speaker")
+REPLAY_PARAMS = ("replay_deny", "replay_warn")
+SEARCH_PARAMS = SPEAKER_PARAMS + REPLAY_PARAMS
+
+
+@dataclass
+class PolicyStats:
+    n: int
+    verified_rate: float
+    repeat_rate: float
+    denied_rate: float
+    expected_retries: float
+
+
+def expected_retries(repeat_rate, max_retries: int | None = None):
+    p = np.clip(np.asarray(repeat_rate, dtype=np.float64), 0.0, 1.0 - 1e-12)
+    if max_retries is None:
+        return p / (1.0 - p)
+    # p + p^2 + ... + p^max_retries
+    return p * (1.0 - p ** max_retries) / (1.0 - p)
+
+
+def load_verify_log(path: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(speaker_scores, replay_probs, logged_decisions) from verify_log.csv."""
+    speaker, replay, decisions = [], [], []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                s = float(row["Speaker_Score"])
+                r = float(row["Replay_Prob"])
+            except (TypeError, ValueError, KeyError):
+                continue  # baris kosong / rusak
+            speaker.append(s)
+            replay.append(r)
+            decisions.append(row.get("Decision") or "")
+    return np.array(speaker), np.array(replay), np.array(decisions)
+
+
+def _limits(limits: dict) -> dict:
+    out = {
+        "min_verified": 0.0,
+        "max_verified": 1.0,
+        "max_denied": 1.0,
+        "max_expected_retries": np.inf,
+    }
+    unknown = set(limits) - set(out)
+    if unknown:
+        raise TypeError(f"Unknown limits: {sorted(unknown)}")
+    out.update({k: v for k, v in limits.items() if v is not None})
+    return out
+
+
+class PolicySimulator:
+    def __init__(self, speaker_scores, replay_probs, max_retries: int | None = None):
+        self.speaker = np.asarray(speaker_scores, dtype=np.float64)
+        self.replay = np.asarray(replay_probs, dtype=np.float64)
+        self.max_retries = max_retries
+        self.n = int(self.speaker.size)
+
+    @classmethod
+    def from_log(cls, path: str, **kwargs) -> "PolicySimulator":
+        speaker, replay, _ = load_verify_log(path)
+        return cls(speaker, replay, **kwargs)
+
+    def _stats(self, verified, repeat, denied) -> PolicyStats:
+        n = max(self.n, 1)
+        return PolicyStats(
+            n=self.n,
+            verified_rate=float(verified) / n,
+            repeat_rate=float(repeat) / n,
+            denied_rate=float(denied) / n,
+            expected_retries=float(expected_retries(repeat / n, self.max_retries)),
+        )
+
+    def evaluate(self, config: DecisionConfig | None = None) -> PolicyStats:
+        codes = decide_batch(self.speaker, self.replay, config)
+        counts = np.bincount(codes, minlength=3)
+        return self._stats(counts[VERIFIED_CODE], counts[REPEAT_CODE], counts[DENIED_CODE])
+
+    # ---- fast search ----
+    def _count_table(self, speaker_axis: np.ndarray, replay_axis: np.ndarray) -> np.ndarray:
+        """
+        C[i, j] = #(speaker >= speaker_axis[i] and replay < replay_axis[j]);
+        column ``len(replay_axis)`` means no replay bound.
+        """
+        # s >= axis[i]  <=>  s_bin >= i
+        s_bin = np.searchsorted(speaker_axis, self.speaker, side="right") - 1
+        # r < axis[j]  <=>  r_bin <= j
+        r_bin = np.searchsorted(replay_axis, self.replay, side="right")
+
+        keep = s_bin >= 0
+        hist = np.zeros((speaker_axis.size, replay_axis.size + 1), dtype=np.int64)
+        np.add.at(hist, (s_bin[keep], r_bin[keep]), 1)
+
+        table = np.cumsum(hist[::-1], axis=0)[::-1]
+        return np.cumsum(table, axis=1)
+
+    def search_space(self, grid: dict[str, list[float]], base: DecisionConfig | None = None) -> dict:
+        """All combinations of ``grid`` (missing params fixed to ``base``) as arrays."""
+        base = base or DecisionConfig()
+        values = {p: list(grid.get(p, [getattr(base, p)])) for p in SEARCH_PARAMS}
+        combos = np.array(list(itertools.product(*(values[p] for p in SEARCH_PARAMS))), dtype=np.float64)
+        return {p: combos[:, i] for i, p in enumerate(SEARCH_PARAMS)}
+
+    def evaluate_many(self, space: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        """VERIFIED / REPEAT / DENIED rates for every config in ``space`` at once."""
+        accept = space["voice_accept"]
+        repeat = space["voice_repeat"]
+        abs_min = space["abs_min_speaker"]
+        deny = space["replay_deny"]
+        warn = np.minimum(space["replay_warn"], deny)
+
+        # Setelah guard abs_min: verified butuh s >= max(accept, abs_min),
+        # repeat dari skor butuh s >= max(repeat, abs_min) tapi di bawah batas verified
+        eff_accept = np.maximum(accept, abs_min)
+        eff_repeat = np.minimum(np.maximum(repeat, abs_min), eff_accept)
+
+        speaker_axis = np.unique(np.concatenate([eff_accept, eff_repeat, abs_min]))
+        replay_axis = np.unique(np.concatenate([warn, deny]))
+        table = self._count_table(speaker_axis, replay_axis)
+
+        def idx(axis, x):
+            return np.searchsorted(axis, x)
+
+        ia, ir, im = idx(speaker_axis, eff_accept), idx(speaker_axis, eff_repeat), idx(speaker_axis, abs_min)
+        jw, jd = idx(replay_axis, warn), idx(replay_axis, deny)
+
+        verified = table[ia, jw]
+        repeat_replay = table[im, jd] - table[im, jw]
+        repeat_score = table[ir, jw] - table[ia, jw]
+        repeats = repeat_replay + repeat_score
+        denied = self.n - verified - repeats
+
+        n = max(self.n, 1)
+        return {
+            "verified_rate": verified / n,
+            "repeat_rate": repeats / n,
+            "denied_rate": denied / n,
+            "expected_retries": expected_retries(repeats / n, self.max_retries),
+        }
+
+    @staticmethod
+    def _valid(space: dict[str, np.ndarray]) -> np.ndarray:
+        return (
+            (space["voice_repeat"] <= space["voice_accept"])
+            & (space["abs_min_speaker"] <= space["voice_accept"])
+            & (space["replay_warn"] <= space["replay_deny"])
+        )
+
+    def _objective(self, metrics, space, objective: str, limits: dict,
+                   penalize: bool = False) -> np.ndarray:
+        """
+        Objective to minimize. Infeasible configs get +inf, or with
+        ``penalize`` a large value growing with the constraint violation
+        (lets coordinate search walk towards the feasible region).
+        """
+        sign = -1.0 if objective == "verified_rate" else 1.0
+        value = sign * metrics[objective]
+
+        violation = (
+            np.maximum(limits["min_verified"] - metrics["verified_rate"], 0)
+            + np.maximum(metrics["verified_rate"] - limits["max_verified"], 0)
+            + np.maximum(metrics["denied_rate"] - limits["max_denied"], 0)
+            + np.maximum(metrics["expected_retries"] - limits["max_expected_retries"], 0)
+        )
+        feasible = self._valid(space) & (violation <= 0)
+        if penalize:
+            return np.where(feasible, value, np.where(self._valid(space), 1e6 + violation, np.inf))
+        return np.where(feasible, value, np.inf)
+
+    def grid_search(
+        self,
+        grid: dict[str, list[float]],
+        objective: str = "expected_retries",
+        top: int = 10,
+        base: DecisionConfig | None = None,
+        **limits,
+    ) -> list[dict]:
+        """
+        Rank every combination of ``grid`` by ``objective`` (minimized;
+        ``verified_rate`` is maximized) among configs meeting the limits
+        (``min_verified``, ``max_verified``, ``max_denied``,
+        ``max_expected_retries``).
+        """
+        space = self.search_space(grid, base)
+        metrics = self.evaluate_many(space)
+        score = self._objective(metrics, space, objective, _limits(limits))
+
+        order = np.argsort(score, kind="stable")[:top]
+        return [self._result(space, metrics, i) for i in order if np.isfinite(score[i])]
+
+    def coordinate_search(
+        self,
+        grid: dict[str, list[float]],
+        objective: str = "expected_retries",
+        start: DecisionConfig | None = None,
+        max_rounds: int = 20,
+        **limits,
+    ) -> dict | None:
+        """
+        Optimize one parameter at a time over its ``grid`` values, keeping the
+        others fixed, until a full round changes nothing. Cheaper than the
+        full product when the grid is large; may stop at a local optimum.
+        Returns None if no feasible config was reached.
+        """
+        limits = _limits(limits)
+        current = asdict(start or DecisionConfig())
+        best, best_score = None, np.inf
+        for _ in range(max_rounds):
+            changed = False
+            for param in SEARCH_PARAMS:
+                if param not in grid:
+                    continue
+                fixed = {p: [current[p]] for p in SEARCH_PARAMS}
+                fixed[param] = list(grid[param])
+                space = self.search_space(fixed)
+                metrics = self.evaluate_many(space)
+                score = self._objective(metrics, space, objective, limits, penalize=True)
+                i = int(np.argmin(score))
+                if not np.isfinite(score[i]):
+                    continue
+                # Kalau seri, pertahankan nilai sekarang supaya tidak bolak-balik
+                tied = np.flatnonzero((score == score[i]) & (space[param] == current[param]))
+                if tied.size:
+                    i = int(tied[0])
+                if space[param][i] != current[param]:
+                    current[param] = float(space[param][i])
+                    changed = True
+                best, best_score = self._result(space, metrics, i), score[i]
+            if not changed:
+                break
+        return best if best_score < 1e6 else None
+
+    @staticmethod
+    def _result(space, metrics, i: int) -> dict:
+        config = DecisionConfig(**{
+            f.name: float(space[f.name][i]) if f.name in space else f.default
+            for f in fields(DecisionConfig)
+        })
+        return {
+            "config": config,
+            **{k: float(v[i]) for k, v in metrics.items()},
+        }
@@ -3,12 +3,17 @@ import numpy as np
 
 def replay_heuristic(wav_path, sr=16000):
     """
+    ``wav_path`` can also be an already decoded signal at ``sr``.
+
     Return:
     - suspicion_score (int)
     - details (dict)
     """
 
-    y, _ = librosa.load(wav_path, sr=sr)
+    if isinstance(wav_path, str):
+        y, _ = librosa.load(wav_path, sr=sr)
+    else:
+        y = wav_path
 
     stft = np.abs(librosa.stft(y, n_fft=1024, hop_length=512)) + 1e-9
 
@@ -31,6 +36,17 @@ def replay_heuristic(wav_path, sr=16000):
 
     mod_ratio = low / (high + 1e-9)
 
+    return {
+        "replay_prob": replay_score(centroid_var, rolloff_var, am_var, mod_ratio),
+        "centroid_var": centroid_var,
+        "rolloff_var": rolloff_var,
+        "am_var": am_var,
+        "mod_ratio": mod_ratio
+    }
+
+
+def replay_score(centroid_var, rolloff_var, am_var, mod_ratio):
+    """Average of the four clipped suspicion terms, 0–1."""
     score = 0.0
 
     score += np.clip((50 - centroid_var) / 50, 0, 1)
@@ -38,13 +54,4 @@ def replay_heuristic(wav_path, sr=16000):
     score += np.clip((1e-4 - am_var) / 1e-4, 0, 1)
     score += np.clip((mod_ratio - 1.5) / 1.5, 0, 1)
 
-    score /= 4.0  # normalize 0–1
-    
-
-    return {
-        "replay_prob": score,
-        "centroid_var": centroid_var,
-        "rolloff_var": rolloff_var,
-        "am_var": am_var,
-        "mod_ratio": mod_ratio
-    }
+    return score / 4.0  # normalize 0–1
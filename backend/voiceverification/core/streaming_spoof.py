@@ -0,0 +1,309 @@
+"""Incremental spoof / replay features for streaming audio.
+
+``SpoofStream`` consumes PCM blocks of any size (e.g. LiveKit audio frames
+already resampled to 16 kHz) and keeps only running statistics, so memory
+per stream is constant no matter how long the stream runs:
+
+* ``core.asvspoof`` features — mean spectral flatness, normalized energy
+  variance and high/voice band ratio — from running sums and a Welford
+  variance of the frame energy (``var(e / max e) = var(e) / max(e)^2``)
+* ``core.replay_heuristic`` features — centroid / rolloff variance and the
+  variance of the envelope difference — from Welford variances
+
+``spoof_prob()`` / ``snapshot()`` can be called at any time.
+
+Differences from the whole-clip functions:
+
+* frames are the same 1024 / 512 STFT frames, but the stream has no
+  right-hand padding, so the last 1024 samples are not scored yet
+* ``compute_score`` trims leading / trailing silence 25 dB below the clip
+  peak. The stream cannot know the final peak, so it keeps the frames
+  before the current peak as segments that each start at a new running
+  RMS maximum (the only frames that can become the first one above a
+  rising threshold) and drops a segment once the peak is 25 dB above its
+  start. Frames after the last loud frame are held back until speech
+  resumes. Loudness is the RMS of the same centered 2048-sample frames
+  ``librosa.effects.trim`` uses, so frames are scored one hop (32 ms)
+  later than they arrive. Both edges then match the offline trim up to
+  frame alignment (offline re-frames the trimmed clip) and, for a lead-in
+  that keeps getting louder for more than STREAM_MAX_SEGMENTS new maxima,
+  the merging of the two closest segments
+* the modulation ratio of ``replay_heuristic`` is an FFT over the whole
+  envelope; here it is computed over the last STREAM_MOD_WINDOW frames
+"""
+
+import os
+
+import numpy as np
+import scipy.signal
+
+from core.asvspoof import _HOP, _N_FFT, SPOOF_FEATURE_NAMES, SpoofModel, get_spoof_model
+from core.replay_heuristic import replay_score
+
+STREAM_TRIM_DB = 25.0
+# panjang frame RMS untuk trim, sama dengan default librosa.effects.trim
+_TRIM_FRAME = 2048
+# ≈ 8 detik envelope @ 16 kHz / hop 512
+STREAM_MOD_WINDOW = int(os.getenv("STREAM_MOD_WINDOW", "256"))
+# batas segmen lead-in (lihat _new_peak); memory per stream tetap konstan
+STREAM_MAX_SEGMENTS = 64
+
+
+class RunningStats:
+    """Welford mean / variance; batches and other instances merge in O(1) (Chan et al.)."""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def merge(self, n: int, mean: float, m2: float):
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    def add(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size:
+            mean = float(values.mean())
+            self.merge(values.size, mean, float(np.sum((values - mean) ** 2)))
+
+    def merge_stats(self, other: "RunningStats"):
+        self.merge(other.n, other.mean, other.m2)
+
+    @property
+    def var(self) -> float:
+        """Population variance, like ``np.var``."""
+        return self.m2 / self.n if self.n else 0.0
+
+
+class _SpoofSums:
+    """Sufficient statistics of the asvspoof features over a run of frames."""
+
+    def __init__(self):
+        self.flat_sum = 0.0
+        self.energy = RunningStats()
+        self.energy_max = 0.0
+        self.voice_sum = 0.0
+        self.high_sum = 0.0
+
+    def add(self, flat, energy, voice, high):
+        self.flat_sum += float(np.sum(flat))
+        self.energy.add(energy)
+        if len(energy):
+            self.energy_max = max(self.energy_max, float(np.max(energy)))
+        self.voice_sum += float(np.sum(voice))
+        self.high_sum += float(np.sum(high))
+
+    def merge(self, other: "_SpoofSums"):
+        self.flat_sum += other.flat_sum
+        self.energy.merge_stats(other.energy)
+        self.energy_max = max(self.energy_max, other.energy_max)
+        self.voice_sum += other.voice_sum
+        self.high_sum += other.high_sum
+
+    @property
+    def n(self) -> int:
+        return self.energy.n
+
+
+def _sums(flat, energy, voice, high) -> _SpoofSums:
+    out = _SpoofSums()
+    out.add(flat, energy, voice, high)
+    return out
+
+
+class SpoofStream:
+    def __init__(self, sr: int = 16000, model: SpoofModel | None = None):
+        self.sr = sr
+        self.model = model
+        self._window = scipy.signal.get_window("hann", _N_FFT, fftbins=True)
+
+        freqs = np.fft.rfftfreq(_N_FFT, d=1.0 / sr)
+        self._voice_bins = (freqs > 300) & (freqs < 3400)
+        self._high_bins = (freqs > 10000) & (freqs < 16000)
+        # replay_heuristic memanggil spectral_centroid / rolloff tanpa sr →
+        # librosa memakai default 22050 Hz; threshold-nya dikalibrasi di skala itu
+        self._replay_freqs = np.fft.rfftfreq(_N_FFT, d=1.0 / 22050)
+        self.reset()
+
+    def reset(self):
+        # librosa.stft / feature.rms (center=True): frame pertama berpusat di sampel 0.
+        # Buffer mulai setengah frame trim sebelum pusat frame berikutnya.
+        self._tail = np.zeros(_TRIM_FRAME // 2, dtype=np.float64)
+        self.n_samples = 0
+        self.n_frames = 0
+
+        self._peak_rms = 0.0
+        # [(rms maksimum di awal segmen, sums)] sebelum peak saat ini, urut naik
+        self._segments: list[tuple[float, _SpoofSums]] = []
+        self._speech = _SpoofSums()   # dari peak saat ini sampai frame keras terakhir
+        self._pending = _SpoofSums()  # frame hening setelah frame keras terakhir
+
+        self._centroid = RunningStats()
+        self._rolloff = RunningStats()
+        self._env_diff = RunningStats()
+        self._last_env: float | None = None
+        self._env_ring = np.zeros(STREAM_MOD_WINDOW)
+        self._ring_pos = 0
+
+    # ---- input ----
+    def push(self, pcm: np.ndarray):
+        """Append one block of mono PCM (float in [-1, 1] or int16)."""
+        pcm = np.asarray(pcm)
+        if pcm.dtype == np.int16:
+            pcm = pcm.astype(np.float64) / 32768.0
+        pcm = pcm.astype(np.float64, copy=False).reshape(-1)
+        self.n_samples += pcm.size
+
+        buf = np.concatenate([self._tail, pcm])
+        n = 0 if buf.size < _TRIM_FRAME else 1 + (buf.size - _TRIM_FRAME) // _HOP
+        # sisa sampel yang belum jadi frame trim penuh (< 2048 + hop)
+        self._tail = buf[n * _HOP:]
+        if n == 0:
+            return
+
+        # Frame RMS 2048 dan frame STFT 1024 dengan pusat yang sama
+        wide = np.lib.stride_tricks.sliding_window_view(buf, _TRIM_FRAME)[::_HOP][:n]
+        rms = np.sqrt(np.mean(wide ** 2, axis=-1))
+        off = (_TRIM_FRAME - _N_FFT) // 2
+        self._add_frames(wide[:, off:off + _N_FFT], rms)
+
+    def _add_frames(self, frames: np.ndarray, rms: np.ndarray):
+        S = np.abs(np.fft.rfft(frames * self._window, axis=-1)) + 1e-9
+        self.n_frames += len(frames)
+
+        power = np.maximum(S ** 2, 1e-10)
+        flat = np.exp(np.mean(np.log(power), axis=-1)) / np.mean(power, axis=-1)
+        energy = S.mean(axis=-1)
+        voice = S[:, self._voice_bins].mean(axis=-1) if self._voice_bins.any() else np.zeros(len(S))
+        high = S[:, self._high_bins].mean(axis=-1) if self._high_bins.any() else np.zeros(len(S))
+
+        self._add_spoof(rms, flat, energy, voice, high)
+        self._add_replay(S, energy)
+
+    def _add_spoof(self, rms, flat, energy, voice, high):
+        # frame yang melewati semua frame sebelumnya = maksimum baru
+        before = np.maximum.accumulate(np.r_[self._peak_rms, rms])[:-1]
+        bounds = np.r_[0, np.flatnonzero(rms > before), len(rms)]
+
+        for i, (a, b) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if i > 0:
+                self._new_peak(float(rms[a]))
+            if b <= a:
+                continue
+            sums_of = lambda sl: _sums(flat[sl], energy[sl], voice[sl], high[sl])
+            loud = np.flatnonzero(rms[a:b] > self._peak_rms * 10 ** (-STREAM_TRIM_DB / 20))
+            if loud.size == 0:
+                self._pending.merge(sums_of(slice(a, b)))
+                continue
+            last = a + int(loud[-1])
+            self._speech.merge(self._pending)
+            self._speech.merge(sums_of(slice(a, last + 1)))
+            self._pending = sums_of(slice(last + 1, b))
+
+    def _new_peak(self, rms: float):
+        """Close the frames since the previous peak into a segment, drop what is now leading silence."""
+        seg = _SpoofSums()
+        seg.merge(self._speech)
+        seg.merge(self._pending)
+        self._segments.append((self._peak_rms, seg))
+        self._speech, self._pending = _SpoofSums(), _SpoofSums()
+        self._peak_rms = rms
+
+        threshold = rms * 10 ** (-STREAM_TRIM_DB / 20)
+        # awal trim = maksimum pertama di atas threshold; segmen sebelumnya dibuang
+        while self._segments and self._segments[0][0] <= threshold:
+            self._segments.pop(0)
+
+        if len(self._segments) > STREAM_MAX_SEGMENTS:
+            # gabungkan dua segmen dengan rasio maksimum terdekat ke segmen berikutnya
+            levels = np.array([level for level, _ in self._segments])
+            i = int(np.argmin(levels[1:] / np.maximum(levels[:-1], 1e-12)))
+            merged = _SpoofSums()
+            merged.merge(self._segments[i][1])
+            merged.merge(self._segments[i + 1][1])
+            self._segments[i:i + 2] = [(self._segments[i + 1][0], merged)]
+
+    def _speech_sums(self) -> _SpoofSums:
+        out = _SpoofSums()
+        for _, seg in self._segments:
+            out.merge(seg)
+        out.merge(self._speech)
+        return out
+
+    def _add_replay(self, S, energy):
+        total = S.sum(axis=-1)
+        self._centroid.add((S @ self._replay_freqs) / total)
+
+        # rolloff: frekuensi pertama dengan energi kumulatif >= 85%
+        cum = np.cumsum(S, axis=-1)
+        idx = np.argmax(cum >= 0.85 * cum[:, -1:], axis=-1)
+        self._rolloff.add(self._replay_freqs[idx])
+
+        env = energy if self._last_env is None else np.concatenate([[self._last_env], energy])
+        self._env_diff.add(np.diff(env))
+        self._last_env = float(energy[-1])
+
+        recent = energy[-STREAM_MOD_WINDOW:]
+        pos = (self._ring_pos + len(energy) - len(recent) + np.arange(len(recent))) % STREAM_MOD_WINDOW
+        self._env_ring[pos] = recent
+        self._ring_pos += len(energy)
+
+    # ---- output ----
+    def features(self) -> np.ndarray | None:
+        """[flatness, temporal_var, highband] so far, or None if no speech yet."""
+        sp = self._speech_sums()
+        if sp.n < 2:
+            return None
+        peak = sp.energy_max if sp.energy_max > 0 else 1.0
+        voice = sp.voice_sum / sp.n
+        high = sp.high_sum / sp.n
+        return np.array([
+            sp.flat_sum / sp.n,
+            sp.energy.var / (peak * peak),
+            high / voice if voice > 1e-6 else 0.0,
+        ])
+
+    def spoof_prob(self) -> float:
+        """Current bona fide probability; 0.0 while silent, like ``compute_score``."""
+        feats = self.features()
+        if feats is None:
+            return 0.0
+        return float((self.model or get_spoof_model()).score(feats))
+
+    def replay(self) -> dict:
+        """``replay_heuristic``-style result over the stream so far."""
+        n = min(self._ring_pos, STREAM_MOD_WINDOW)
+        # urutkan ring buffer dari frame terlama
+        env = np.roll(self._env_ring, -self._ring_pos % STREAM_MOD_WINDOW)[STREAM_MOD_WINDOW - n:]
+        mod = np.abs(np.fft.rfft(env - env.mean())) if n else np.zeros(1)
+        low = np.mean(mod[:10])
+        high = np.mean(mod[10:50]) if mod.size > 10 else 0.0
+        mod_ratio = low / (high + 1e-9)
+
+        centroid_var, rolloff_var, am_var = self._centroid.var, self._rolloff.var, self._env_diff.var
+        return {
+            "replay_prob": float(replay_score(centroid_var, rolloff_var, am_var, mod_ratio)),
+            "centroid_var": centroid_var,
+            "rolloff_var": rolloff_var,
+            "am_var": am_var,
+            "mod_ratio": float(mod_ratio),
+        }
+
+    def snapshot(self) -> dict:
+        feats = self.features()
+        return {
+            "seconds": self.n_samples / self.sr,
+            "frames": self.n_frames,
+            "speech_frames": self._speech_sums().n,
+            "spoof_prob": self.spoof_prob(),
+            "features": None if feats is None else dict(zip(SPOOF_FEATURE_NAMES, feats.tolist())),
+            "replay": self.replay(),
+        }
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Mapping
 from time import time
 from urllib import response
 
@@ -22,8 +23,7 @@ class TrustedUpdatePolicy:
             spoof_prob: float,
             behavior_score: float,
             n_samples: int,
-            z_pitch: float,
-            z_rate: float,
+            zscores: Mapping[str, float],
             last_update_time: float | None,
             is_retry: bool,
     ) -> bool:
@@ -57,8 +57,8 @@ class TrustedUpdatePolicy:
         if last_update_time is not None and (now - last_update_time) < self.min_update_interval:
             return False
         
-        # 7. Z-score checks
-        if abs(z_pitch) > self.max_zscore or abs(z_rate) > self.max_zscore:
+        # 7. Z-score checks (semua fitur behavior yang terukur)
+        if any(abs(z) > self.max_zscore for z in zscores.values()):
             return False
         
         return True
\ No newline at end of file
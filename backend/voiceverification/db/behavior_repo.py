@@ -1,10 +1,29 @@
+import math
+import os
 from datetime import datetime, timezone
-from datetime import datetime, timezone
+from typing import Mapping
 
 from core.behavior_profile import BehaviorProfile
+from utils.metrics import timed
+from .behavior_writer import BEHAVIOR_WRITE_BEHIND, get_behavior_writer
 from .connection import get_supabase
 
+# Kolom jsonb berisi statistik semua fitur behavior (BehaviorProfile.to_stats).
+# Kosong = hanya kolom lama mean/var pitch & rate yang ditulis, fitur lain hilang,
+# dan hitungan sampel per fitur tidak tersimpan (hanya satu n_samples).
+#   alter table behavior_profiles add column stats jsonb;
+BEHAVIOR_STATS_COLUMN = os.getenv("BEHAVIOR_STATS_COLUMN", "")
+
+_LEGACY_COLUMNS = {"pitch": ("mean_pitch", "var_pitch"), "rate": ("mean_rate", "var_rate")}
+
+@timed("db_load_behavior_profile")
 def load_behavior_profile(user_id: str, label:str) -> BehaviorProfile:
+    # Versi yang masih antre di write-behind lebih baru dari baris di DB
+    if BEHAVIOR_WRITE_BEHIND:
+        pending = get_behavior_writer().pending(user_id, label)
+        if pending is not None:
+            return pending
+
     sb = get_supabase()
 
     res = (
@@ -28,29 +47,66 @@ def load_behavior_profile(user_id: str, label:str) -> BehaviorProfile:
     elif last_ts is None:
         last_ts = datetime.now(timezone.utc)
 
-    return BehaviorProfile(
+    stats = row.get(BEHAVIOR_STATS_COLUMN) if BEHAVIOR_STATS_COLUMN else None
+    if stats:
+        return BehaviorProfile.from_stats(stats, row["n_samples"], last_ts)
+
+    return BehaviorProfile.from_legacy(
         n_samples=row["n_samples"],
-        mean_pitch=row["mean_pitch"],
-        var_pitch=row["var_pitch"],
-        mean_rate=row["mean_rate"],
-        var_rate=row["var_rate"],
+        mean_pitch=row.get("mean_pitch"),
+        var_pitch=row.get("var_pitch"),
+        mean_rate=row.get("mean_rate"),
+        var_rate=row.get("var_rate"),
         last_update_ts=last_ts,
     )
 
 
+def behavior_values_storable(values: Mapping[str, float | None]) -> bool:
+    """
+    Whether a sample may create or update a stored profile.
+
+    With BEHAVIOR_STATS_COLUMN every feature keeps its own count, so any
+    measured feature is enough. The legacy columns hold one ``n_samples``
+    for all features, so every feature they store must be measured;
+    otherwise the per-feature counts drift apart and are lost on reload.
+    """
+    measured = {k for k, v in values.items() if v is not None and math.isfinite(v)}
+    if BEHAVIOR_STATS_COLUMN:
+        return bool(measured)
+    return all(feature in measured for feature in _LEGACY_COLUMNS)
+
+
+def behavior_profile_row(user_id: str, label: str, profile: BehaviorProfile) -> dict:
+    row = {
+        "user_id": user_id,
+        "label": label,
+        "n_samples": profile.n_samples,
+        "last_update_ts": profile.last_update_ts.isoformat(),
+    }
+    for feature, (mean_col, var_col) in _LEGACY_COLUMNS.items():
+        if feature in profile.features:
+            i = profile.index(feature)
+            # Belum pernah terukur → NULL, bukan 0.0 yang terbaca seperti hasil ukur
+            measured = profile.counts[i] > 0
+            row[mean_col] = float(profile.mean[i]) if measured else None
+            row[var_col] = float(profile.m2[i]) if measured else None
+    if BEHAVIOR_STATS_COLUMN:
+        row[BEHAVIOR_STATS_COLUMN] = profile.to_stats()
+    return row
+
+
+@timed("db_save_behavior_profile")
 def save_behavior_profile(user_id: str, label: str, profile: BehaviorProfile):
     sb = get_supabase()
 
     sb.table("behavior_profiles").upsert(
-        {
-            "user_id": user_id,
-            "label": label,
-            "n_samples": profile.n_samples,
-            "mean_pitch": profile.mean_pitch,
-            "var_pitch": profile.var_pitch,
-            "mean_rate": profile.mean_rate,
-            "var_rate": profile.var_rate,
-            "last_update_ts": profile.last_update_ts.isoformat(),
-
-        },
+        behavior_profile_row(user_id, label, profile),
     ).execute()
+
+
+def queue_behavior_profile(user_id: str, label: str, profile: BehaviorProfile):
+    """Save without waiting on the database (BEHAVIOR_WRITE_BEHIND=0 → synchronous upsert)."""
+    if BEHAVIOR_WRITE_BEHIND:
+        get_behavior_writer().submit(user_id, label, profile)
+    else:
+        save_behavior_profile(user_id, label, profile)
@@ -0,0 +1,265 @@
+"""Coalescing write-behind queue for behavior profile upserts.
+
+``/verify-voice`` used to upsert the updated behavior profile before
+responding. The profile does not affect the current decision, so the
+request now only hands it to ``BehaviorProfileWriter.submit``:
+
+- pending writes are keyed by (user_id, label); a newer profile replaces
+  the queued one, so a burst of verifications costs one upsert
+- a daemon thread flushes every BEHAVIOR_WRITE_FLUSH_S (or as soon as
+  BEHAVIOR_WRITE_BATCH keys are pending) with batched upserts
+- a failed batch is put back unless a newer version was queued meanwhile
+- ``load_behavior_profile`` reads the pending version first, so this
+  process never sees a stale row for a profile it has not written yet
+- ``rename()`` / ``delete()`` run the label rename / row delete with the
+  writer paused (and move / drop the queued writes), so no batch taken
+  before them can land after them
+- ``close()`` (server shutdown) writes everything still pending
+
+Other worker processes only see the update after the flush, i.e. at most
+~BEHAVIOR_WRITE_FLUSH_S later.
+"""
+
+import copy
+import os
+import threading
+import time
+
+from utils.metrics import Counter, Gauge, Histogram, register
+
+BEHAVIOR_WRITE_BEHIND = os.getenv("BEHAVIOR_WRITE_BEHIND", "1") == "1"
+BEHAVIOR_WRITE_FLUSH_S = float(os.getenv("BEHAVIOR_WRITE_FLUSH_S", "1.0"))
+BEHAVIOR_WRITE_BATCH = int(os.getenv("BEHAVIOR_WRITE_BATCH", "100"))
+
+BEHAVIOR_WRITES = register(Counter(
+    "voiceverification_behavior_writes_total",
+    "Behavior profile rows handled by the write-behind queue (written, coalesced, failed, discarded).",
+    labelnames=("result",),
+))
+BEHAVIOR_WRITE_LAG = register(Histogram(
+    "voiceverification_behavior_write_lag_seconds",
+    "Time from the first queued, unwritten version of a profile to its upsert.",
+))
+
+
+class BehaviorProfileWriter:
+    def __init__(
+        self,
+        upsert=None,
+        flush_interval: float = BEHAVIOR_WRITE_FLUSH_S,
+        batch_size: int = BEHAVIOR_WRITE_BATCH,
+    ):
+        # upsert(rows: list[dict]); default: tabel behavior_profiles di Supabase
+        self._upsert = upsert or _supabase_upsert
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        # (user_id, label) -> (row, profile, first_enqueued_monotonic)
+        self._pending: dict[tuple[str, str], tuple[dict, object, float]] = {}
+        self._lock = threading.Lock()
+        # Dipegang writer thread selama ambil batch + upsert; rename() memakainya untuk pause
+        self._write_lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._flushed = threading.Condition(self._lock)
+        self._generation = 0  # naik setiap kali satu putaran flush selesai
+        # key di batch yang sedang ditulis, dan yang di-discard selama itu (tidak di-requeue)
+        self._inflight: set[tuple[str, str]] = set()
+        self._dropped: set[tuple[str, str]] = set()
+        self._closing = False
+        self._thread: threading.Thread | None = None
+
+    # ---- request path ----
+    def submit(self, user_id: str, label: str, profile):
+        """Queue the latest state of a profile; never blocks on the database."""
+        from db.behavior_repo import behavior_profile_row
+
+        # Snapshot: caller boleh terus meng-update profilnya in place
+        profile = copy.deepcopy(profile)
+        row = behavior_profile_row(user_id, label, profile)
+        key = (user_id, label)
+        self._ensure_thread()
+        with self._lock:
+            previous = self._pending.get(key)
+            if previous is not None:
+                BEHAVIOR_WRITES.inc(result="coalesced")
+            first = previous[2] if previous is not None else time.monotonic()
+            self._pending[key] = (row, profile, first)
+            if len(self._pending) >= self.batch_size:
+                self._wake.notify()
+
+    def pending(self, user_id: str, label: str):
+        """Copy of the queued (not yet written) profile for this key, or None."""
+        with self._lock:
+            entry = self._pending.get((user_id, label))
+        return copy.deepcopy(entry[1]) if entry is not None else None
+
+    def discard(self, user_id: str, label: str | None = None):
+        """Drop queued writes (e.g. before deleting the profile rows)."""
+        match = lambda k: k[0] == user_id and (label is None or k[1] == label)
+        with self._lock:
+            keys = [k for k in self._pending if match(k)]
+            for k in keys:
+                del self._pending[k]
+            self._dropped.update(k for k in self._inflight if match(k))
+        if keys:
+            BEHAVIOR_WRITES.inc(len(keys), result="discarded")
+
+    def rename(self, user_id: str, old_label: str, new_label: str, apply):
+        """
+        Run ``apply()`` (the database rename) while no batch is being
+        written, and re-key queued writes from ``old_label`` to ``new_label``.
+        """
+        with self._write_lock:
+            with self._lock:
+                entry = self._pending.pop((user_id, old_label), None)
+                if entry is not None:
+                    row, profile, first = entry
+                    self._pending[(user_id, new_label)] = (dict(row, label=new_label), profile, first)
+            apply()
+
+    def delete(self, user_id: str, label: str | None, apply):
+        """
+        Drop queued writes and run ``apply()`` (the database delete) while
+        no batch is being written, so an upsert taken earlier cannot bring
+        the deleted rows back.
+        """
+        with self._write_lock:
+            self.discard(user_id, label)
+            apply()
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def oldest_age(self) -> float:
+        with self._lock:
+            if not self._pending:
+                return 0.0
+            return time.monotonic() - min(first for _, _, first in self._pending.values())
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything queued so far has been attempted once."""
+        if self._thread is None:
+            return True
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            if not self._pending:
+                return True
+            # satu putaran penuh: yang sedang jalan mungkin sudah ambil batch sebelum submit terakhir
+            target = self._generation + 2
+            self._wake.notify()
+            while self._generation < target:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self._flushed.wait(left)
+                self._wake.notify()
+            return True
+
+    def close(self, timeout: float = 10.0):
+        if self._thread is None:
+            return
+        with self._lock:
+            self._closing = True
+            self._wake.notify()
+        self._thread.join(timeout)
+        self._thread = None
+
+    # ---- writer thread ----
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._closing = False
+                self._thread = threading.Thread(
+                    target=self._run, name="behavior-profile-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._closing and len(self._pending) < self.batch_size:
+                    self._wake.wait(self.flush_interval)
+
+            with self._write_lock:
+                with self._lock:
+                    batch, self._pending = self._pending, {}
+                    closing = self._closing
+                    self._inflight = set(batch)
+                if batch:
+                    self._write(batch)
+                with self._lock:
+                    self._inflight, self._dropped = set(), set()
+
+            with self._lock:
+                self._generation += 1
+                self._flushed.notify_all()
+                if closing:
+                    # Saat shutdown hanya satu percobaan terakhir; sisanya dilaporkan
+                    if self._pending:
+                        print(f"⚠️ {len(self._pending)} behavior profile writes lost at shutdown")
+                    return
+
+    def _write(self, batch: dict):
+        # Upsert massal butuh kolom yang sama di setiap baris
+        groups: dict[tuple, list] = {}
+        for key, entry in batch.items():
+            groups.setdefault(tuple(sorted(entry[0])), []).append(key)
+
+        for keys in groups.values():
+            for start in range(0, len(keys), self.batch_size):
+                chunk = keys[start: start + self.batch_size]
+                try:
+                    self._upsert([batch[k][0] for k in chunk])
+                except Exception as e:
+                    print(f"⚠️ Behavior profile write failed ({len(chunk)} rows): {e}")
+                    BEHAVIOR_WRITES.inc(len(chunk), result="failed")
+                    self._requeue({k: batch[k] for k in chunk})
+                    continue
+
+                now = time.monotonic()
+                for k in chunk:
+                    BEHAVIOR_WRITE_LAG.observe(now - batch[k][2])
+                BEHAVIOR_WRITES.inc(len(chunk), result="written")
+
+    def _requeue(self, failed: dict):
+        with self._lock:
+            for key, entry in failed.items():
+                if key in self._dropped:
+                    continue  # profil sudah dihapus selama batch ini ditulis
+                # Versi yang lebih baru sudah antre → yang gagal tidak perlu ditulis lagi,
+                # tapi lag dihitung dari versi gagal yang lebih lama
+                if key not in self._pending:
+                    self._pending[key] = entry
+                else:
+                    row, profile, _ = self._pending[key]
+                    self._pending[key] = (row, profile, entry[2])
+
+
+def _supabase_upsert(rows: list[dict]):
+    from db.connection import get_supabase
+    get_supabase().table("behavior_profiles").upsert(rows).execute()
+
+
+_writer: BehaviorProfileWriter | None = None
+
+
+def get_behavior_writer() -> BehaviorProfileWriter:
+    global _writer
+    if _writer is None:
+        _writer = BehaviorProfileWriter()
+    return _writer
+
+
+register(Gauge(
+    "voiceverification_behavior_write_queue_depth",
+    "Behavior profiles waiting for the write-behind flush.",
+    fn=lambda: _writer.queue_depth() if _writer is not None else 0,
+))
+register(Gauge(
+    "voiceverification_behavior_write_oldest_seconds",
+    "Age of the oldest queued behavior profile write.",
+    fn=lambda: _writer.oldest_age() if _writer is not None else 0.0,
+))
@@ -1,10 +1,14 @@
 import os
 from supabase import create_client, Client
 
+from .fake_supabase import LOCAL_STANDIN, get_fake_supabase
+
 _supabase: Client | None = None
 
 def get_supabase() -> Client:
     global _supabase
+    if LOCAL_STANDIN:
+        return get_fake_supabase()
     if _supabase is None:
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
@@ -0,0 +1,216 @@
+"""In-memory Supabase stand-in for local load testing.
+
+Enabled with LOCAL_STANDIN=1. ``get_supabase()`` then returns a
+``FakeSupabaseClient`` that supports the subset of the postgrest query
+builder this backend uses (select/insert/upsert/update/delete, eq, order,
+limit, single, count="exact") on the tables ``speaker_profiles``,
+``behavior_profiles``, ``conversation_sessions``, ``conversation_logs`` and
+``product_cards``.
+
+Every ``execute()`` sleeps STANDIN_DB_LATENCY_MS (± STANDIN_DB_JITTER_MS)
+to mimic a network round trip. ``auth.get_user(token)`` accepts any
+non-empty bearer token and uses the token itself as the user id.
+"""
+
+import copy
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+LOCAL_STANDIN = os.getenv("LOCAL_STANDIN", "0") == "1"
+STANDIN_DB_LATENCY_MS = float(os.getenv("STANDIN_DB_LATENCY_MS", "20"))
+STANDIN_DB_JITTER_MS = float(os.getenv("STANDIN_DB_JITTER_MS", "5"))
+
+TABLES = (
+    "speaker_profiles",
+    "behavior_profiles",
+    "conversation_sessions",
+    "conversation_logs",
+    "product_cards",
+)
+
+# Kolom unik untuk upsert per tabel (sama dengan constraint di Supabase)
+UPSERT_KEYS = {
+    "behavior_profiles": ("user_id", "label"),
+}
+
+
+@dataclass
+class FakeResponse:
+    data: Any
+    count: int | None = None
+
+
+@dataclass
+class FakeUser:
+    id: str
+
+
+@dataclass
+class FakeUserResponse:
+    user: FakeUser | None
+
+
+class FakeAuth:
+    def get_user(self, token: str) -> FakeUserResponse:
+        _sleep_latency()
+        return FakeUserResponse(user=FakeUser(id=token) if token else None)
+
+
+def _sleep_latency():
+    delay = STANDIN_DB_LATENCY_MS + random.uniform(-STANDIN_DB_JITTER_MS, STANDIN_DB_JITTER_MS)
+    if delay > 0:
+        time.sleep(delay / 1000.0)
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabaseClient", table: str):
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        self._client = client
+        self._table = table
+        self._op = "select"
+        self._columns: list[str] | None = None
+        self._payload: Any = None
+        self._filters: list[tuple[str, Any]] = []
+        self._order: tuple[str, bool] | None = None
+        self._limit: int | None = None
+        self._single = False
+        self._count = False
+
+    # ---- builders ----
+    def select(self, columns: str = "*", count: str | None = None):
+        self._op = "select"
+        cols = [c.strip() for c in columns.split(",")]
+        self._columns = None if cols == ["*"] else cols
+        self._count = count is not None
+        return self
+
+    def insert(self, payload):
+        self._op, self._payload = "insert", payload
+        return self
+
+    def upsert(self, payload, **_):
+        self._op, self._payload = "upsert", payload
+        return self
+
+    def update(self, payload):
+        self._op, self._payload = "update", payload
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    def eq(self, column: str, value):
+        self._filters.append((column, value))
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self._order = (column, desc)
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    # ---- execution ----
+    def _match(self, row: dict) -> bool:
+        return all(str(row.get(c)) == str(v) for c, v in self._filters)
+
+    def _project(self, row: dict) -> dict:
+        if self._columns is None:
+            return copy.deepcopy(row)
+        return {c: copy.deepcopy(row.get(c)) for c in self._columns}
+
+    def execute(self) -> FakeResponse:
+        _sleep_latency()
+        with self._client.lock:
+            rows = self._client.tables[self._table]
+            return getattr(self, f"_exec_{self._op}")(rows)
+
+    def _exec_select(self, rows):
+        matched = [r for r in rows if self._match(r)]
+        if self._order:
+            col, desc = self._order
+            matched.sort(key=lambda r: str(r.get(col) or ""), reverse=desc)
+        count = len(matched) if self._count else None
+        if self._limit is not None:
+            matched = matched[: self._limit]
+        data = [self._project(r) for r in matched]
+        if self._single:
+            data = data[0] if data else None
+        return FakeResponse(data=data, count=count)
+
+    @staticmethod
+    def _new_row(payload: dict) -> dict:
+        row = copy.deepcopy(payload)
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        return row
+
+    def _exec_insert(self, rows):
+        payloads = self._payload if isinstance(self._payload, list) else [self._payload]
+        inserted = [self._new_row(p) for p in payloads]
+        rows.extend(inserted)
+        return FakeResponse(data=copy.deepcopy(inserted))
+
+    def _exec_upsert(self, rows):
+        keys = UPSERT_KEYS.get(self._table, ("id",))
+        payloads = self._payload if isinstance(self._payload, list) else [self._payload]
+        out = []
+        for p in payloads:
+            existing = next(
+                (r for r in rows if all(r.get(k) == p.get(k) for k in keys)), None
+            )
+            if existing is not None:
+                existing.update(copy.deepcopy(p))
+                out.append(copy.deepcopy(existing))
+            else:
+                row = self._new_row(p)
+                rows.append(row)
+                out.append(copy.deepcopy(row))
+        return FakeResponse(data=out)
+
+    def _exec_update(self, rows):
+        updated = []
+        for r in rows:
+            if self._match(r):
+                r.update(copy.deepcopy(self._payload))
+                updated.append(copy.deepcopy(r))
+        return FakeResponse(data=updated)
+
+    def _exec_delete(self, rows):
+        deleted = [r for r in rows if self._match(r)]
+        rows[:] = [r for r in rows if not self._match(r)]
+        return FakeResponse(data=deleted)
+
+
+class FakeSupabaseClient:
+    def __init__(self):
+        self.tables: dict[str, list[dict]] = {t: [] for t in TABLES}
+        self.lock = threading.Lock()
+        self.auth = FakeAuth()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+
+_fake: FakeSupabaseClient | None = None
+
+
+def get_fake_supabase() -> FakeSupabaseClient:
+    global _fake
+    if _fake is None:
+        _fake = FakeSupabaseClient()
+        print("⚠️ LOCAL_STANDIN aktif: pakai in-memory Supabase")
+    return _fake
@@ -0,0 +1,276 @@
+"""Per-user inverted index of verification clip fingerprints.
+
+Every verification clip's landmark hashes (``core.fingerprint``) are stored
+per user as ``(user_id, hash) -> (clip_id, offset)``. A new clip is checked
+by looking up only its own hashes for that user and voting on
+``(clip_id, stored_offset - query_offset)``; a replay of an earlier clip
+piles its votes onto one pair. Lookup cost depends on the query and the
+user's retained history, not on the total number of clips stored.
+
+Retention is bounded per user by FINGERPRINT_MAX_CLIPS (newest kept) and
+FINGERPRINT_RETENTION_DAYS.
+
+Backend is chosen with FINGERPRINT_BACKEND:
+- ``sqlite`` (default): file at FINGERPRINT_DB with a covering
+  ``(user_id, hash)`` index, shared by every worker on the host.
+- ``memory``: single-process only, handy for local dev.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+from core.fingerprint import Fingerprint, best_offset_vote
+
+FINGERPRINT_ENABLED = os.getenv("FINGERPRINT_ENABLED", "1") == "1"
+FINGERPRINT_BACKEND = os.getenv("FINGERPRINT_BACKEND", "sqlite")
+FINGERPRINT_DB = os.getenv("FINGERPRINT_DB", "/tmp/voiceverification_fingerprints.db")
+FINGERPRINT_MAX_CLIPS = int(os.getenv("FINGERPRINT_MAX_CLIPS", "500"))
+FINGERPRINT_RETENTION_DAYS = float(os.getenv("FINGERPRINT_RETENTION_DAYS", "30"))
+
+# Ambang replay: jumlah vote di satu (clip, offset) dan rasionya terhadap hash query
+FINGERPRINT_MIN_VOTES = int(os.getenv("FINGERPRINT_MIN_VOTES", "15"))
+FINGERPRINT_MIN_RATIO = float(os.getenv("FINGERPRINT_MIN_RATIO", "0.10"))
+# replay_prob minimum yang dikirim ke decide() kalau clip cocok
+FINGERPRINT_REPLAY_PROB = float(os.getenv("FINGERPRINT_REPLAY_PROB", "0.95"))
+
+_SQL_CHUNK = 500
+
+
+@dataclass
+class FingerprintMatch:
+    clip_id: int
+    votes: int
+    n_hashes: int
+
+    @property
+    def ratio(self) -> float:
+        return self.votes / self.n_hashes if self.n_hashes else 0.0
+
+    @property
+    def is_replay(self) -> bool:
+        return self.votes >= FINGERPRINT_MIN_VOTES and self.ratio >= FINGERPRINT_MIN_RATIO
+
+
+class FingerprintIndex(ABC):
+    @abstractmethod
+    def _lookup(self, user_id: str, hashes: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Hits for ``hashes``: (hash, clip_id, stored_offset) arrays."""
+
+    @abstractmethod
+    def add(self, user_id: str, fp: Fingerprint) -> int | None:
+        """Store a clip and apply retention. Returns the new clip id."""
+
+    def match(self, user_id: str, fp: Fingerprint) -> FingerprintMatch:
+        if len(fp) == 0:
+            return FingerprintMatch(clip_id=-1, votes=0, n_hashes=0)
+
+        hit_hash, hit_clip, hit_offset = self._lookup(user_id, np.unique(fp.hashes))
+        if hit_hash.size == 0:
+            return FingerprintMatch(clip_id=-1, votes=0, n_hashes=len(fp))
+
+        # Join hit dengan semua kemunculan hash yang sama di query
+        order = np.argsort(fp.hashes, kind="stable")
+        q_hash, q_offset = fp.hashes[order], fp.offsets[order]
+        lo = np.searchsorted(q_hash, hit_hash, side="left")
+        hi = np.searchsorted(q_hash, hit_hash, side="right")
+        reps = hi - lo
+
+        clip_ids = np.repeat(hit_clip, reps)
+        stored = np.repeat(hit_offset, reps)
+        starts = np.cumsum(reps) - reps
+        q_idx = np.repeat(lo, reps) + np.arange(reps.sum()) - np.repeat(starts, reps)
+        deltas = stored - q_offset[q_idx]
+
+        clip_id, votes = best_offset_vote(clip_ids, deltas)
+        return FingerprintMatch(clip_id=clip_id, votes=votes, n_hashes=len(fp))
+
+
+class InMemoryFingerprintIndex(FingerprintIndex):
+    def __init__(self, max_clips: int = FINGERPRINT_MAX_CLIPS,
+                 retention_days: float = FINGERPRINT_RETENTION_DAYS):
+        self.max_clips = max_clips
+        self.retention_s = retention_days * 86400
+        # user -> hash -> list[(clip_id, offset)]
+        self._index: dict[str, dict[int, list[tuple[int, int]]]] = {}
+        # user -> deque[(clip_id, created_at, hashes)]
+        self._clips: dict[str, deque] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def _lookup(self, user_id, hashes):
+        out_h, out_c, out_o = [], [], []
+        with self._lock:
+            index = self._index.get(user_id, {})
+            for h in hashes.tolist():
+                for clip_id, offset in index.get(h, ()):
+                    out_h.append(h)
+                    out_c.append(clip_id)
+                    out_o.append(offset)
+        return (
+            np.asarray(out_h, dtype=np.uint32),
+            np.asarray(out_c, dtype=np.int64),
+            np.asarray(out_o, dtype=np.int64),
+        )
+
+    def _evict(self, user_id: str, now: float):
+        clips = self._clips[user_id]
+        index = self._index[user_id]
+        while clips and (len(clips) > self.max_clips or clips[0][1] < now - self.retention_s):
+            clip_id, _, hashes = clips.popleft()
+            for h in set(hashes.tolist()):
+                entries = [e for e in index.get(h, ()) if e[0] != clip_id]
+                if entries:
+                    index[h] = entries
+                else:
+                    index.pop(h, None)
+
+    def add(self, user_id, fp):
+        if len(fp) == 0:
+            return None
+        now = time.time()
+        with self._lock:
+            clip_id = self._next_id
+            self._next_id += 1
+
+            index = self._index.setdefault(user_id, {})
+            for h, offset in zip(fp.hashes.tolist(), fp.offsets.tolist()):
+                index.setdefault(h, []).append((clip_id, offset))
+            self._clips.setdefault(user_id, deque()).append((clip_id, now, fp.hashes))
+
+            self._evict(user_id, now)
+        return clip_id
+
+
+class SQLiteFingerprintIndex(FingerprintIndex):
+    """
+    Hash table in a local SQLite file.
+
+    ``fp_hashes`` has a covering index on ``(user_id, hash, clip_id, t)``, so
+    a lookup is one index range scan per query hash and never touches the
+    table itself.
+    """
+
+    def __init__(self, path: str = FINGERPRINT_DB, max_clips: int = FINGERPRINT_MAX_CLIPS,
+                 retention_days: float = FINGERPRINT_RETENTION_DAYS):
+        self.path = path
+        self.max_clips = max_clips
+        self.retention_s = retention_days * 86400
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fp_clips (
+                    clip_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    n_hashes INTEGER NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS fp_clips_user ON fp_clips (user_id, created_at)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fp_hashes (
+                    user_id TEXT NOT NULL,
+                    hash INTEGER NOT NULL,
+                    clip_id INTEGER NOT NULL,
+                    t INTEGER NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS fp_hashes_lookup "
+                "ON fp_hashes (user_id, hash, clip_id, t)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS fp_hashes_clip ON fp_hashes (clip_id)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        return conn
+
+    def _lookup(self, user_id, hashes):
+        rows = []
+        conn = self._connect()
+        try:
+            values = hashes.tolist()
+            for i in range(0, len(values), _SQL_CHUNK):
+                chunk = values[i:i + _SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(conn.execute(
+                    f"SELECT hash, clip_id, t FROM fp_hashes "
+                    f"WHERE user_id = ? AND hash IN ({placeholders})",
+                    (user_id, *chunk),
+                ).fetchall())
+        finally:
+            conn.close()
+
+        if not rows:
+            empty = np.empty(0, dtype=np.int64)
+            return np.empty(0, dtype=np.uint32), empty, empty
+        arr = np.asarray(rows, dtype=np.int64)
+        return arr[:, 0].astype(np.uint32), arr[:, 1], arr[:, 2]
+
+    def add(self, user_id, fp):
+        if len(fp) == 0:
+            return None
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            clip_id = conn.execute(
+                "INSERT INTO fp_clips (user_id, created_at, n_hashes) VALUES (?, ?, ?)",
+                (user_id, now, len(fp)),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO fp_hashes (user_id, hash, clip_id, t) VALUES (?, ?, ?, ?)",
+                ((user_id, h, clip_id, t) for h, t in zip(fp.hashes.tolist(), fp.offsets.tolist())),
+            )
+
+            # Retention: clip lama / di luar FINGERPRINT_MAX_CLIPS terbaru
+            expired = [r[0] for r in conn.execute(
+                "SELECT clip_id FROM fp_clips WHERE user_id = ? "
+                "AND (created_at < ? OR clip_id NOT IN ("
+                "  SELECT clip_id FROM fp_clips WHERE user_id = ? "
+                "  ORDER BY created_at DESC LIMIT ?))",
+                (user_id, now - self.retention_s, user_id, self.max_clips),
+            )]
+            for i in range(0, len(expired), _SQL_CHUNK):
+                chunk = expired[i:i + _SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                conn.execute(f"DELETE FROM fp_hashes WHERE clip_id IN ({placeholders})", chunk)
+                conn.execute(f"DELETE FROM fp_clips WHERE clip_id IN ({placeholders})", chunk)
+
+            conn.execute("COMMIT")
+            return clip_id
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+
+_index: FingerprintIndex | None = None
+
+
+def get_fingerprint_index() -> FingerprintIndex:
+    global _index
+    if _index is None:
+        if FINGERPRINT_BACKEND == "memory":
+            _index = InMemoryFingerprintIndex()
+        elif FINGERPRINT_BACKEND == "sqlite":
+            _index = SQLiteFingerprintIndex()
+        else:
+            raise RuntimeError(f"Unknown FINGERPRINT_BACKEND: {FINGERPRINT_BACKEND}")
+    return _index
@@ -0,0 +1,187 @@
+"""Room ownership leases shared by agent workers and the API server.
+
+Only one agent may own a ``user-<id>`` room at a time. A worker acquires a
+lease with a TTL, renews it with heartbeats while the session is alive and
+releases it on disconnect. A crashed worker simply stops heartbeating, so
+its lease expires and the room can be claimed again.
+
+Backend is chosen with ROOM_LEASE_BACKEND:
+- ``sqlite`` (default): file at ROOM_LEASE_DB, shared by every process on
+  the host / every container mounting the same volume.
+- ``memory``: single-process only, handy for local dev.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import closing
+
+ROOM_LEASE_BACKEND = os.getenv("ROOM_LEASE_BACKEND", "sqlite")
+ROOM_LEASE_DB = os.getenv("ROOM_LEASE_DB", "/tmp/voiceverification_room_leases.db")
+ROOM_LEASE_TTL = float(os.getenv("ROOM_LEASE_TTL", "30"))
+
+
+def make_owner_id(suffix: str = "") -> str:
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    return f"{owner}:{suffix}" if suffix else owner
+
+
+class RoomLeaseRegistry(ABC):
+    @abstractmethod
+    def acquire(self, room: str, owner: str, ttl: float = ROOM_LEASE_TTL) -> bool:
+        """Take the room if it is free or its lease expired. True if owned."""
+
+    @abstractmethod
+    def heartbeat(self, room: str, owner: str, ttl: float = ROOM_LEASE_TTL) -> bool:
+        """Extend the lease. False if ``owner`` no longer holds it."""
+
+    @abstractmethod
+    def release(self, room: str, owner: str) -> None:
+        """Drop the lease if still held by ``owner``."""
+
+    @abstractmethod
+    def current_owner(self, room: str) -> str | None:
+        """Owner of a live (non-expired) lease, or None."""
+
+    def is_live(self, room: str) -> bool:
+        return self.current_owner(room) is not None
+
+
+class InMemoryRoomLeaseRegistry(RoomLeaseRegistry):
+    def __init__(self):
+        self._leases: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, room, owner, ttl=ROOM_LEASE_TTL):
+        now = time.time()
+        with self._lock:
+            lease = self._leases.get(room)
+            if lease and lease[1] > now and lease[0] != owner:
+                return False
+            self._leases[room] = (owner, now + ttl)
+            return True
+
+    def heartbeat(self, room, owner, ttl=ROOM_LEASE_TTL):
+        now = time.time()
+        with self._lock:
+            lease = self._leases.get(room)
+            if not lease or lease[0] != owner or lease[1] <= now:
+                return False
+            self._leases[room] = (owner, now + ttl)
+            return True
+
+    def release(self, room, owner):
+        with self._lock:
+            lease = self._leases.get(room)
+            if lease and lease[0] == owner:
+                del self._leases[room]
+
+    def current_owner(self, room):
+        with self._lock:
+            lease = self._leases.get(room)
+            if lease and lease[1] > time.time():
+                return lease[0]
+            return None
+
+
+class SQLiteRoomLeaseRegistry(RoomLeaseRegistry):
+    """
+    Lease table in a local SQLite file.
+
+    Every write runs in a ``BEGIN IMMEDIATE`` transaction, which takes the
+    database write lock, so acquire is atomic across processes.
+    """
+
+    def __init__(self, path: str = ROOM_LEASE_DB):
+        self.path = path
+        # closing(): "with conn" saja hanya commit/rollback, koneksinya tidak ditutup
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS room_leases (
+                    room TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        return conn
+
+    def acquire(self, room, owner, ttl=ROOM_LEASE_TTL):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT owner, expires_at FROM room_leases WHERE room = ?",
+                (room,),
+            ).fetchone()
+
+            if row and row[1] > now and row[0] != owner:
+                conn.execute("ROLLBACK")
+                return False
+
+            conn.execute(
+                "INSERT OR REPLACE INTO room_leases (room, owner, expires_at) VALUES (?, ?, ?)",
+                (room, owner, now + ttl),
+            )
+            conn.execute("COMMIT")
+            return True
+        finally:
+            conn.close()
+
+    def heartbeat(self, room, owner, ttl=ROOM_LEASE_TTL):
+        now = time.time()
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "UPDATE room_leases SET expires_at = ? "
+                "WHERE room = ? AND owner = ? AND expires_at > ?",
+                (now + ttl, room, owner, now),
+            )
+            return cur.rowcount == 1
+        finally:
+            conn.close()
+
+    def release(self, room, owner):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "DELETE FROM room_leases WHERE room = ? AND owner = ?",
+                (room, owner),
+            )
+        finally:
+            conn.close()
+
+    def current_owner(self, room):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT owner FROM room_leases WHERE room = ? AND expires_at > ?",
+                (room, time.time()),
+            ).fetchone()
+            return row[0] if row else None
+        finally:
+            conn.close()
+
+
+_registry: RoomLeaseRegistry | None = None
+
+
+def get_room_lease_registry() -> RoomLeaseRegistry:
+    global _registry
+    if _registry is None:
+        if ROOM_LEASE_BACKEND == "memory":
+            _registry = InMemoryRoomLeaseRegistry()
+        elif ROOM_LEASE_BACKEND == "sqlite":
+            _registry = SQLiteRoomLeaseRegistry()
+        else:
+            raise RuntimeError(f"Unknown ROOM_LEASE_BACKEND: {ROOM_LEASE_BACKEND}")
+    return _registry
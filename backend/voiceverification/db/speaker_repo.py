@@ -1,5 +1,6 @@
 import numpy as np
 
+from utils.metrics import timed
 from .connection import get_supabase
 
 def load_embedding(user_id: str) -> np.ndarray | None:
@@ -19,6 +20,7 @@ def load_embedding(user_id: str) -> np.ndarray | None:
     return np.array(res.data["embedding"], dtype=np.float32)
 
 
+@timed("db_save_embedding")
 def save_embedding(user_id: str, emb: np.ndarray, label: str):
     sb = get_supabase()
 
@@ -30,6 +32,7 @@ def save_embedding(user_id: str, emb: np.ndarray, label: str):
         },
     ).execute()
 
+@timed("db_load_all_embeddings")
 def load_all_embeddings(user_id: str) -> list[np.ndarray]:
     sb = get_supabase()
 
@@ -51,6 +54,7 @@ def load_all_embeddings(user_id: str) -> list[np.ndarray]:
     return profiles
 
 
+@timed("db_count_enrollments")
 def count_enrollments(user_id: str) -> int:
     sb = get_supabase()
     res = (
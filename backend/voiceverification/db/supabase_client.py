@@ -2,12 +2,17 @@ import os
 
 from supabase import create_client
 
+from .fake_supabase import LOCAL_STANDIN, get_fake_supabase
+
 _supabase = None
 
 
 def get_supabase():
     global _supabase
 
+    if LOCAL_STANDIN:
+        return get_fake_supabase()
+
     if _supabase is None:
         supabase_url = os.getenv("SUPABASE_URL")
         supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
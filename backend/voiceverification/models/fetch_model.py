@@ -0,0 +1,47 @@
+"""Download the ECAPA speaker model once into a pinned artifact directory.
+
+Resolves symlinks into real files (so the directory can be copied into an
+image) and writes a sha256 manifest that ``SpeakerVerifier`` verifies
+before loading with ``SPEAKER_MODEL_DIR`` set.
+
+Usage:
+  python -m models.fetch_model --out model_artifacts/spkrec-ecapa-voxceleb
+"""
+
+import argparse
+import os
+import shutil
+
+from models.speaker_verifier import MANIFEST_NAME, MODEL_SOURCE, sha256_file
+
+
+def fetch_model(out_dir: str) -> str:
+    from speechbrain.pretrained import SpeakerRecognition
+
+    SpeakerRecognition.from_hparams(source=MODEL_SOURCE, savedir=out_dir)
+
+    lines = []
+    for name in sorted(os.listdir(out_dir)):
+        path = os.path.join(out_dir, name)
+        if name == MANIFEST_NAME or os.path.isdir(path):
+            continue
+        # speechbrain menaruh symlink ke cache HF; ganti dengan file asli
+        if os.path.islink(path):
+            target = os.path.realpath(path)
+            os.remove(path)
+            shutil.copy2(target, path)
+        lines.append(f"{sha256_file(path)}  {name}")
+
+    manifest = os.path.join(out_dir, MANIFEST_NAME)
+    with open(manifest, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+    print(f"✅ Model artifact ready: {out_dir} ({len(lines)} files)")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch pinned speaker model artifact")
+    parser.add_argument("--out", default="model_artifacts/spkrec-ecapa-voxceleb")
+    args = parser.parse_args()
+    fetch_model(args.out)
@@ -1,32 +1,212 @@
+import hashlib
+import os
+
 import numpy as np
+import soundfile as sf
 import torch
 from numpy.linalg import norm
 
 from speechbrain.pretrained import SpeakerRecognition
 
+from utils.audio import resample_to_target
+from utils.feature_cache import get_feature_cache
+
+MODEL_SOURCE = "speechbrain/spkrec-ecapa-voxceleb"
+MODEL_SAVEDIR = "pretrained_models/spkrec-ecapa-voxceleb"
+
+# Direktori artifact model yang sudah di-pin (lihat models/fetch_model.py).
+# Kalau di-set, model di-load dari sini tanpa akses jaringan.
+SPEAKER_MODEL_DIR = os.getenv("SPEAKER_MODEL_DIR")
+MANIFEST_NAME = "MANIFEST.sha256"
+
+SAMPLE_RATE = 16000
+
+# Windowed embedding: audio panjang dipotong jadi window yang di-encode per
+# batch lalu di-pool, supaya memory & CPU per request tetap terbatas.
+EMBED_WINDOW_S = float(os.getenv("EMBED_WINDOW_S", "3.0"))
+EMBED_HOP_S = float(os.getenv("EMBED_HOP_S", "1.5"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "8"))
+# Batas keras audio yang diproses; sisanya diabaikan
+EMBED_MAX_AUDIO_S = float(os.getenv("EMBED_MAX_AUDIO_S", "30"))
+# Clip lebih pendek dari ini tetap satu forward pass seperti sebelumnya
+EMBED_WINDOWED_MIN_S = float(os.getenv("EMBED_WINDOWED_MIN_S", "6.0"))
+EMBED_SPEECH_WEIGHTING = os.getenv("EMBED_SPEECH_WEIGHTING", "1") == "1"
+
+_VAD_FRAME = 320  # 20 ms @ 16 kHz
+_VAD_REL_DB = -35.0
+
+
+def window_starts(n_samples: int, win: int, hop: int) -> list[int]:
+    """Window start offsets covering the clip; last window is end-aligned."""
+    if n_samples <= win:
+        return [0]
+    starts = list(range(0, n_samples - win + 1, hop))
+    if n_samples - (starts[-1] + win) > hop // 2:
+        starts.append(n_samples - win)
+    return starts
+
+
+def speech_ratios(y: np.ndarray, starts: list[int], win: int) -> np.ndarray:
+    """Fraction of 20 ms frames per window whose RMS is within 35 dB of the clip peak."""
+    usable = len(y) - len(y) % _VAD_FRAME
+    if usable == 0:
+        return np.ones(len(starts))
+
+    rms = np.sqrt(np.mean(y[:usable].reshape(-1, _VAD_FRAME) ** 2, axis=1))
+    thr = max(rms.max() * 10 ** (_VAD_REL_DB / 20), 1e-5)
+    voiced = rms > thr
+
+    ratios = []
+    for s in starts:
+        f0, f1 = s // _VAD_FRAME, max((s + win) // _VAD_FRAME, s // _VAD_FRAME + 1)
+        seg = voiced[f0:f1]
+        ratios.append(float(seg.mean()) if seg.size else 0.0)
+    return np.asarray(ratios)
+
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def artifact_version(model_dir: str | None = SPEAKER_MODEL_DIR) -> str:
+    """Short id of the loaded model, used to key cached embeddings."""
+    if model_dir:
+        return sha256_file(os.path.join(model_dir, MANIFEST_NAME))[:16]
+    return MODEL_SOURCE
+
+
+def embedding_config_version() -> str:
+    """Settings that change windowed embeddings (see extract_embedding)."""
+    return (
+        f"w{EMBED_WINDOW_S}:{EMBED_HOP_S}:{int(EMBED_SPEECH_WEIGHTING)}"
+        f":max{EMBED_MAX_AUDIO_S}:min{EMBED_WINDOWED_MIN_S}"
+    )
+
+
+def verify_model_artifact(model_dir: str):
+    """Check every file listed in the manifest (sha256sum format)."""
+    manifest = os.path.join(model_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest):
+        raise RuntimeError(f"Model manifest not found: {manifest}")
+
+    with open(manifest) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            expected, name = line.split(maxsplit=1)
+            path = os.path.join(model_dir, name.strip())
+            if not os.path.exists(path):
+                raise RuntimeError(f"Model file missing: {path}")
+            if sha256_file(path) != expected:
+                raise RuntimeError(f"Checksum mismatch for model file: {path}")
+
 
 class SpeakerVerifier:
-    def __init__(self, device="cpu"):
+    def __init__(self, device="cpu", model_dir: str | None = SPEAKER_MODEL_DIR):
+        if model_dir:
+            verify_model_artifact(model_dir)
+            # Jangan sampai speechbrain / huggingface_hub mencoba ke network
+            os.environ.setdefault("HF_HUB_OFFLINE", "1")
+            source = savedir = model_dir
+        else:
+            source, savedir = MODEL_SOURCE, MODEL_SAVEDIR
+
+        # Versi model untuk key cache embedding: hash manifest kalau artifact di-pin
+        self.model_version = artifact_version(model_dir)
+
         self.model = SpeakerRecognition.from_hparams(
-            source="speechbrain/spkrec-ecapa-voxceleb",
-            savedir="pretrained_models/spkrec-ecapa-voxceleb",
+            source=source,
+            savedir=savedir,
             run_opts={"device": device},
         )
         self.device = device
 
-    def extract_embedding(self, wav_path) -> np.ndarray:
+    def _load_capped(self, wav_path, max_samples: int) -> torch.Tensor:
+        """Read at most ``max_samples`` of mono 16 kHz audio (1-D tensor)."""
+        try:
+            src_sr = sf.info(wav_path).samplerate
+        except RuntimeError:
+            src_sr = None
+
+        if src_sr is not None:
+            # Batasi saat decode (dalam sample rate asli), baru resample
+            frames = -(-max_samples * src_sr // SAMPLE_RATE)
+            y, _ = sf.read(wav_path, frames=frames, dtype="float32", always_2d=True)
+            y = resample_to_target(y.mean(axis=1), src_sr)
+        else:
+            # Format yang tidak dikenal libsndfile: librosa/audioread berhenti decode setelah `duration`
+            import librosa
+            y, _ = librosa.load(wav_path, sr=SAMPLE_RATE, mono=True, duration=max_samples / SAMPLE_RATE)
+
+        return torch.from_numpy(np.ascontiguousarray(y[:max_samples], dtype=np.float32))
+
+    def _encode(self, batch: torch.Tensor) -> np.ndarray:
+        """Encode a [B, T] batch into L2-normalized [B, D] embeddings."""
+        emb = self.model.encode_batch(batch)
+        emb = emb.reshape(batch.shape[0], -1).cpu().numpy()
+        return emb / np.linalg.norm(emb, axis=1, keepdims=True)
+
+    def _windowed_embedding(self, waveform: torch.Tensor) -> np.ndarray:
+        win = int(EMBED_WINDOW_S * SAMPLE_RATE)
+        hop = max(int(EMBED_HOP_S * SAMPLE_RATE), 1)
+        starts = window_starts(waveform.shape[-1], win, hop)
+
+        if EMBED_SPEECH_WEIGHTING:
+            weights = np.maximum(speech_ratios(waveform.numpy(), starts, win), 1e-3)
+        else:
+            weights = np.ones(len(starts))
+
+        pooled = None
+        for i in range(0, len(starts), EMBED_BATCH_SIZE):
+            idx = starts[i:i + EMBED_BATCH_SIZE]
+            batch = torch.stack([waveform[s:s + win] for s in idx])
+            part = weights[i:i + len(idx)] @ self._encode(batch)
+            pooled = part if pooled is None else pooled + part
+
+        return pooled / np.linalg.norm(pooled)
+
+    def extract_embedding(self, wav_path, windowed: bool | None = None) -> np.ndarray:
         """
-        Extract speaker embedding from wavn
+        Extract speaker embedding from wav.
+
+        Audio beyond EMBED_MAX_AUDIO_S is ignored. Clips longer than
+        EMBED_WINDOWED_MIN_S (or any clip with ``windowed=True``) are split
+        into EMBED_WINDOW_S windows with EMBED_HOP_S hop, encoded
+        EMBED_BATCH_SIZE windows at a time and mean-pooled, weighted by the
+        speech ratio of each window.
+
+        Results are cached by decoded PCM + model version
+        (``utils.feature_cache``), so identical audio is encoded only once.
         """
+        max_samples = int(EMBED_MAX_AUDIO_S * SAMPLE_RATE)
+        return self.embed_signal(self._load_capped(wav_path, max_samples), windowed)
+
+    def embed_signal(self, y, windowed: bool | None = None) -> np.ndarray:
+        """``extract_embedding`` for audio already decoded to 16 kHz mono."""
+        max_samples = int(EMBED_MAX_AUDIO_S * SAMPLE_RATE)
+        if not isinstance(y, torch.Tensor):
+            y = torch.from_numpy(np.ascontiguousarray(y[:max_samples], dtype=np.float32))
+        waveform = y[:max_samples]
+
         self.model.eval()
         with torch.no_grad():
-            waveform = self.model.load_audio(wav_path)
-            if waveform.dim() == 1:
-                waveform = waveform.unsqueeze(0)
-            emb = self.model.encode_batch(waveform)
-        emb = emb.squeeze().cpu().numpy()
-        emb = emb / np.linalg.norm(emb)
-        return emb
+            if windowed is None:
+                windowed = waveform.shape[-1] > EMBED_WINDOWED_MIN_S * SAMPLE_RATE
+
+            if windowed:
+                version = f"{self.model_version}:{embedding_config_version()}"
+                compute = lambda: self._windowed_embedding(waveform)
+            else:
+                version = f"{self.model_version}:single"
+                compute = lambda: self._encode(waveform.unsqueeze(0))[0]
+
+            return get_feature_cache().get_or_compute(
+                waveform.numpy(), "ecapa", version, compute
+            )
     
     def compare_embeddings(self, emb1: np.ndarray, emb2: np.ndarray) -> float:
         """
@@ -37,5 +217,8 @@ class SpeakerVerifier:
 
 
     def verify(self, live, enroll):
-        score, _ = self.model.verify_files(live, enroll)
-        return float(score.item())
\ No newline at end of file
+        # Lewat extract_embedding supaya file yang sama (mis. enroll.wav) tidak di-encode ulang
+        return self.compare_embeddings(
+            self.extract_embedding(live),
+            self.extract_embedding(enroll),
+        )
\ No newline at end of file
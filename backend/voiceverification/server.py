@@ -6,32 +6,65 @@ verification services for speaker enrollment and spoof detection.
 
 import asyncio
 import os
+import threading
 import time
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING
 
-import librosa
-import numpy as np
-import torch
 from dotenv import load_dotenv
 from fastapi import File, FastAPI, Form, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from livekit.api import (
-    AccessToken,
-    CreateAgentDispatchRequest,
-    LiveKitAPI,
-    VideoGrants,
-)
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 
 from auth.auth_utils import get_user_id_from_request
 from core.behavior_profile import BehaviorProfile
-from db.behavior_repo import load_behavior_profile, save_behavior_profile
+from db.behavior_repo import (
+    behavior_values_storable,
+    load_behavior_profile,
+    queue_behavior_profile,
+    save_behavior_profile,
+)
+from db.behavior_writer import BEHAVIOR_WRITE_BEHIND, get_behavior_writer
 from db.connection import get_supabase
+from db.fake_supabase import LOCAL_STANDIN
 from db.conversation_sessions import update_conversation_session_label
+from db.room_lease import get_room_lease_registry
 from db.speaker_repo import count_enrollments, load_all_embeddings, save_embedding
-from models.speaker_verifier import SpeakerVerifier
-from services.biometric_service import BiometricService
-from utils.audio import normalize_audio, save_audio
+from services.admission import (
+    PRIORITY_ENROLL,
+    PRIORITY_LIVE_SESSION,
+    PRIORITY_VERIFY,
+    AdmissionRejected,
+    get_admission,
+)
+from services.livekit_service import LiveKitService, StubLiveKitService
+from utils.audio import parse_pcm_format, save_upload
+from utils.decision_log import DECISION_LOG_ENABLED, get_decision_log
+from utils.metrics import (
+    DECISIONS_TOTAL,
+    Gauge,
+    collect_stages,
+    current_stages,
+    register,
+    render_metrics,
+    stage_timer,
+)
+from utils.profiler import (
+    PROFILE_ADMIN_TOKEN,
+    PROFILE_SLOW_MS,
+    profile_access_allowed,
+    profile_store,
+    profiling_enabled,
+    sampler,
+    should_profile,
+    to_folded,
+)
+
+# torch / librosa / speechbrain baru di-import saat model di-load,
+# supaya proses bisa start (dan /livez hijau) tanpa menunggu import berat.
+if TYPE_CHECKING:
+    from services.biometric_service import BiometricService
 
 # Environment setup
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -43,9 +76,16 @@ load_dotenv(ENV_PATH)
 LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
 LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
 
-if not LIVEKIT_API_KEY or not LIVEKIT_API_SECRET:
+if not LOCAL_STANDIN and (not LIVEKIT_API_KEY or not LIVEKIT_API_SECRET):
     raise RuntimeError("LIVEKIT credentials not set")
 
+# FAST_START=1: startup tidak menunggu model; load jalan di background
+# dan progresnya bisa dilihat di /readyz.
+FAST_START = os.getenv("FAST_START", "0") == "1"
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+# Retry-After (detik) untuk verify/enroll selama model belum ready
+MODEL_RETRY_AFTER_S = int(os.getenv("MODEL_RETRY_AFTER_S", "5"))
+
 
 # FastAPI application
 app = FastAPI()
@@ -59,70 +99,238 @@ app.add_middleware(
 )
 
 
-biometric: BiometricService | None = None
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=503,
+        content={"status": "BUSY", "detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
-def get_biometric() -> BiometricService:
-    """Lazily initialize and return the singleton BiometricService instance."""
-    global biometric
-    if biometric is None:
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        biometric = BiometricService(device=device)
-        print(f"BiometricService initialized on device: {device}")
+class ModelNotReady(Exception):
+    def __init__(self, status: str, retry_after: int = MODEL_RETRY_AFTER_S):
+        super().__init__(f"Speaker model not ready ({status})")
+        self.status = status
+        self.retry_after = retry_after
+
+
+@app.exception_handler(ModelNotReady)
+async def model_not_ready_handler(request: Request, exc: ModelNotReady):
+    return JSONResponse(
+        status_code=503,
+        content={"status": "NOT_READY", "detail": str(exc), "model_status": exc.status},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+PROFILED_PATHS = ("/verify-voice", "/enroll-voice")
+
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    if request.url.path not in PROFILED_PATHS:
+        return await call_next(request)
+
+    profile, sampled = should_profile()
+    if not profile:
+        # stage timing tetap dikumpulkan untuk decision log
+        with collect_stages():
+            return await call_next(request)
+
+    with collect_stages() as stages:
+        sub_id = sampler.start()
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            samples = sampler.stop(sub_id)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+    slow = PROFILE_SLOW_MS > 0 and duration_ms >= PROFILE_SLOW_MS
+    if sampled or slow:
+        await asyncio.to_thread(profile_store.save, {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "path": request.url.path,
+            "status_code": response.status_code,
+            "duration_ms": round(duration_ms, 2),
+            "reason": "slow" if slow else "sampled",
+            "stages": {k: round(v * 1000, 2) for k, v in stages.items()},
+            "interval_ms": sampler.interval * 1000,
+            "samples": dict(samples),
+        })
+
+    return response
+
+
+biometric: "BiometricService | None" = None
+_biometric_lock = threading.Lock()
+
+model_state = {
+    "status": "pending",  # pending → importing → loading_model → warming_up → ready | failed
+    "started_at": None,
+    "ready_at": None,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "error": None,
+}
+
+
+def require_biometric() -> "BiometricService":
+    """
+    Loaded BiometricService for request handlers; never loads or waits.
+
+    While the model is still loading / warming up (or the load failed) this
+    raises ModelNotReady (→ 503 + Retry-After) instead of blocking the event
+    loop on ``_biometric_lock``.
+    """
+    if model_state["status"] != "ready" or biometric is None:
+        raise ModelNotReady(model_state["status"])
     return biometric
 
 
+def get_biometric() -> "BiometricService":
+    """Lazily initialize and return the singleton BiometricService instance."""
+    global biometric
+    if biometric is not None:
+        return biometric
+
+    with _biometric_lock:
+        if biometric is None:
+            start = time.time()
+            model_state["started_at"] = datetime.now(timezone.utc).isoformat()
+            model_state["error"] = None
+            try:
+                model_state["status"] = "importing"
+                import torch
+                from services.biometric_service import BiometricService
+
+                model_state["status"] = "loading_model"
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                bio = BiometricService(device=device)
+            except Exception as e:
+                model_state["status"] = "failed"
+                model_state["error"] = str(e)
+                raise
+
+            # Publish dulu, warm-up di luar lock; handler tetap 503 sampai status "ready"
+            if WARMUP_ENABLED:
+                model_state["status"] = "warming_up"
+            biometric = bio
+            print(f"BiometricService initialized on device: {device}")
+        else:
+            return biometric
+
+    if WARMUP_ENABLED:
+        try:
+            from services.warmup import run_warmup
+            model_state["warmup_seconds"] = run_warmup(bio)
+        except Exception as e:
+            # Model tetap bisa dipakai; hanya request pertama yang lebih lambat
+            model_state["error"] = f"warm-up failed: {e}"
+            print("⚠️ Warm-up failed:", e)
+
+    model_state["ready_at"] = datetime.now(timezone.utc).isoformat()
+    model_state["load_seconds"] = round(time.time() - start, 3)
+    model_state["status"] = "ready"
+    return bio
+
+
+livekit: LiveKitService | StubLiveKitService | None = None
+
+
+def get_livekit() -> LiveKitService | StubLiveKitService:
+    """Return the per-worker LiveKitService (one pooled API client)."""
+    global livekit
+    if livekit is None and LOCAL_STANDIN:
+        livekit = StubLiveKitService()
+    elif livekit is None:
+        livekit = LiveKitService(
+            url=os.getenv("LIVEKIT_URL"),
+            api_key=LIVEKIT_API_KEY,
+            api_secret=LIVEKIT_API_SECRET,
+        )
+    return livekit
+
+
+register(Gauge(
+    "voiceverification_inference_queue_depth",
+    "Requests waiting for an inference slot.",
+    fn=lambda: get_admission().queue_depth,
+))
+register(Gauge(
+    "voiceverification_inference_active",
+    "Requests currently holding an inference slot.",
+    fn=lambda: get_admission().active,
+))
+register(Gauge(
+    "voiceverification_model_loaded",
+    "1 if the speaker model is loaded in this worker.",
+    fn=lambda: 1.0 if biometric is not None else 0.0,
+))
+
+
+def _load_in_background():
+    try:
+        get_biometric()
+    except Exception as e:
+        print("❌ Model load failed:", e)
+
 
 @app.on_event("startup")
 async def startup_event():
-    get_biometric()
+    if FAST_START:
+        threading.Thread(target=_load_in_background, name="model-loader", daemon=True).start()
+    else:
+        await asyncio.to_thread(get_biometric)
     print("Server startup complete.")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    if livekit is not None:
+        await livekit.aclose()
+    if DECISION_LOG_ENABLED:
+        await asyncio.to_thread(get_decision_log().close)
+    if BEHAVIOR_WRITE_BEHIND:
+        await asyncio.to_thread(get_behavior_writer().close)
+
+
 # JOIN TOKEN (NO VERIFICATION)
 @app.post("/join-token")
 async def join_token(request: Request):
     user_id = get_user_id_from_request(request)
     room_name = f"user-{user_id}"
 
-    grant = VideoGrants(
-        room_join=True,
-        room=room_name,
-        can_publish=True,
-        can_subscribe=True,
-    )
-
-    token = AccessToken(
-        LIVEKIT_API_KEY,
-        LIVEKIT_API_SECRET,
-    )
-
-    token.with_identity(user_id)
-    token.with_grants(grant)
-
-    # Dispatch agent to room
-    async with LiveKitAPI(
-        url=os.getenv("LIVEKIT_URL"),
-        api_key=LIVEKIT_API_KEY,
-        api_secret=LIVEKIT_API_SECRET,
-    ) as lk:
-
-        await lk.agent_dispatch.create_dispatch(
-            CreateAgentDispatchRequest(room=room_name)
-        )
+    lk = get_livekit()
+    token = lk.get_join_token(user_id, room_name)
 
+    # Agent sudah memegang lease room ini → tidak perlu dispatch ulang
+    if not await asyncio.to_thread(get_room_lease_registry().is_live, room_name):
+        await lk.ensure_dispatch(room_name)
 
     return {
         "status": "OK",
-        "token": token.to_jwt(),
+        "token": token,
         "room": room_name,
     }
 
 
+def _upload_pcm_format(request: Request, audio: UploadFile) -> tuple[str, int] | None:
+    """Raw PCM declaration of the upload (None = container, pakai ffmpeg)."""
+    try:
+        return parse_pcm_format(request.headers, audio.content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+
 # VOICE VERIFICATION ONLY
 @app.post("/verify-voice")
 async def verify_voice(request: Request, audio: UploadFile = File(...)):
+    request_start = time.perf_counter()
     user_id = get_user_id_from_request(request)
+    pcm_format = _upload_pcm_format(request, audio)
+    bio = require_biometric()
 
     enroll_embeddings = load_all_embeddings(user_id)
     if not enroll_embeddings:
@@ -130,64 +338,150 @@ async def verify_voice(request: Request, audio: UploadFile = File(...)):
             "status": "ERROR",
             "reason": "No enrollment profile found for user."
         }
-    
-    wav_path = save_audio(audio)
-    normalize_audio(wav_path)
 
-    try:
-        bio = get_biometric()
-
-        behavior_profiles: dict[str, BehaviorProfile] = {}
-        for profile_meta in enroll_embeddings:
-            lbl = profile_meta["label"]
-            bp = load_behavior_profile(user_id, lbl)
-            if bp is not None:
-                behavior_profiles[lbl] = bp
-
-        start = time.time()
-
-        result = await asyncio.to_thread(
-            bio.verify_against_multiple_embeddings,
-            live_wav=wav_path,
-            enroll_embeddings=enroll_embeddings,
-            user_id=user_id,
-            behavior_profiles=behavior_profiles,
-        )
-
-        print("Verify took:", time.time() - start)
+    # Request dari sesi LiveKit yang aktif didahulukan
+    room_live = await asyncio.to_thread(
+        get_room_lease_registry().is_live, f"user-{user_id}"
+    )
+    priority = PRIORITY_LIVE_SESSION if room_live else PRIORITY_VERIFY
+
+    async with get_admission().slot(priority), stage_timer("verify_total"):
+        try:
+            wav_path = await asyncio.to_thread(save_upload, audio, pcm_format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        try:
+            behavior_profiles: dict[str, BehaviorProfile] = {}
+            for profile_meta in enroll_embeddings:
+                lbl = profile_meta["label"]
+                bp = load_behavior_profile(user_id, lbl)
+                if bp is not None:
+                    behavior_profiles[lbl] = bp
+
+            start = time.time()
+
+            result = await asyncio.to_thread(
+                bio.verify_against_multiple_embeddings,
+                live_wav=wav_path,
+                enroll_embeddings=enroll_embeddings,
+                user_id=user_id,
+                behavior_profiles=behavior_profiles,
+            )
 
-        matched_label: str | None = result.get("best_label")
-        updated_profile: BehaviorProfile | None = result.get("updated_behavior_profile")
+            print("Verify took:", time.time() - start)
+            DECISIONS_TOTAL.inc(decision=result["decision"])
+
+            matched_label: str | None = result.get("best_label")
+
+            if DECISION_LOG_ENABLED:
+                spoof_features = result.get("spoof_features") or {}
+                get_decision_log().log({
+                    "ts": time.time(),
+                    "user_id": user_id,
+                    "label": matched_label,
+                    "decision": result["decision"],
+                    "speaker_score": result["score"],
+                    "n_enrollments": len(enroll_embeddings),
+                    "spoof_prob": result["spoof_prob"],
+                    "replay_prob": result.get("replay_prob"),
+                    "replay_votes": result.get("replay_votes"),
+                    "behavior_score": result.get("behavior_score"),
+                    "pitch": result.get("pitch"),
+                    "rate": result.get("rate"),
+                    "flatness": spoof_features.get("flatness"),
+                    "temporal_var": spoof_features.get("temporal_var"),
+                    "highband": spoof_features.get("highband"),
+                    "total_s": time.perf_counter() - request_start,
+                    "stages": dict(current_stages() or {}),
+                })
+            updated_profile: BehaviorProfile | None = result.get("updated_behavior_profile")
+
+            if matched_label and updated_profile:
+                queue_behavior_profile(user_id, matched_label, updated_profile)
+
+            return {
+                "verified": result["verified"],
+                "status": result["decision"],
+                "reason": result["reason"],
+                "score": result["score"],
+                "spoof_prob": result["spoof_prob"],
+                "best_index": result["best_index"],
+                "all_scores": result["all_scores"],
+                "matched_label": matched_label,
+            }
+
+        finally:
+            if os.path.exists(wav_path):
+                os.remove(wav_path)
+
+
+
+# LIVENESS: proses hidup & event loop jalan (tidak menyentuh model)
+@app.get("/livez")
+async def liveness():
+    return {"status": "OK"}
+
+
+# READINESS: model sudah siap dipakai
+@app.get("/readyz")
+async def readiness():
+    ready = model_state["status"] == "ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "READY" if ready else "NOT_READY", "model": model_state},
+    )
 
-        if matched_label and updated_profile:
-            save_behavior_profile(user_id, matched_label, updated_profile)
 
-        return {
-            "verified": result["verified"],
-            "status": result["decision"],
-            "reason": result["reason"],
-            "score": result["score"],
-            "spoof_prob": result["spoof_prob"],
-            "best_index": result["best_index"],
-            "all_scores": result["all_scores"],
-            "matched_label": matched_label,
-        }
+# HEALTH CHECK
+@app.get("/health")
+async def health_check():
+    # Jangan panggil get_biometric() di sini — bisa blocking selama model load
+    return {
+        "status": "OK",
+        "biometric_service": biometric is not None,
+        "model_status": model_state["status"],
+    }
 
-    finally:
-        if os.path.exists(wav_path):
-            os.remove(wav_path)
+# METRICS (Prometheus text format)
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(
+        render_metrics(),
+        media_type="text/plain; version=0.0.4",
+    )
 
+# PROFILES (opt-in + PROFILE_ADMIN_TOKEN, lihat utils/profiler.py)
+def _require_profile_access(request: Request):
+    # Tanpa PROFILE_ADMIN_TOKEN endpoint ini seolah tidak ada
+    if not profiling_enabled() or not PROFILE_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling disabled")
+    if not profile_access_allowed(request.headers.get("X-Admin-Token")):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
 
 
-# HEALTH CHECK
-@app.get("/health")
-async def health_check():
-    bio_service = get_biometric()
+@app.get("/debug/profiles")
+async def list_profiles(request: Request):
+    _require_profile_access(request)
     return {
         "status": "OK",
-        "biometric_service": biometric is not None
+        "profiles": await asyncio.to_thread(profile_store.list),
     }
 
+
+@app.get("/debug/profiles/{profile_id}")
+async def get_profile(request: Request, profile_id: str, format: str = "json"):
+    _require_profile_access(request)
+
+    profile = await asyncio.to_thread(profile_store.get, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    # format=folded → langsung bisa dipakai flamegraph.pl / speedscope
+    if format == "folded":
+        return PlainTextResponse(to_folded(profile))
+    return profile
+
 # VOICE ENROLLMENT
 @app.post("/enroll-voice")
 async def enroll_voice(
@@ -196,6 +490,9 @@ async def enroll_voice(
     label: str = Form(...)
 ):
     user_id = get_user_id_from_request(request)
+    pcm_format = _upload_pcm_format(request, audio)
+    # Pakai model yang sudah di-load, jangan load ulang per request
+    verifier = require_biometric().speaker
 
     if count_enrollments(user_id) >= 3:
         raise HTTPException(
@@ -203,60 +500,59 @@ async def enroll_voice(
             detail="Maximum enrollment reached (3)."
         )
 
-    wav_path = save_audio(audio)
-    normalize_audio(wav_path)
-
-    try:
-        verifier = SpeakerVerifier()
-
-        embedding = verifier.extract_embedding(wav_path)
-
-        existing_label = (
-            get_supabase()
-            .table("speaker_profiles")
-            .select("label")
-            .eq("user_id", user_id)
-            .eq("label", label)
-            .execute()
-        )
-        if existing_label.data:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Enrollment with label '{label}' already exists."
-            )
+    async with get_admission().slot(PRIORITY_ENROLL), stage_timer("enroll_total"):
+        try:
+            wav_path = await asyncio.to_thread(save_upload, audio, pcm_format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        try:
+            embedding = await asyncio.to_thread(verifier.extract_embedding, wav_path)
+
+            with stage_timer("db_check_label"):
+                existing_label = (
+                    get_supabase()
+                    .table("speaker_profiles")
+                    .select("label")
+                    .eq("user_id", user_id)
+                    .eq("label", label)
+                    .execute()
+                )
+            if existing_label.data:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Enrollment with label '{label}' already exists."
+                )
         
-        save_embedding(user_id, embedding, label)
+            save_embedding(user_id, embedding, label)
 
-        behavior_profile = load_behavior_profile(user_id, label)
+            behavior_profile = load_behavior_profile(user_id, label)
 
-        if behavior_profile is None:
-            y, sr = librosa.load(wav_path, sr=16000)
+            if behavior_profile is None:
+                import librosa
+                from core.behavior_features import behavior_pitch_rate
 
-            pitch = float(np.nanmean(
-                librosa.yin(y, fmin=50, fmax=300, sr=sr)
-            ))
-            rate = float(len(y) / sr)
+                y, sr = librosa.load(wav_path, sr=16000)
+                pitch, rate = behavior_pitch_rate(y, sr)
 
-            behavior_profile = BehaviorProfile(
-                n_samples=1,
-                mean_pitch=pitch,
-                var_pitch=0.0,
-                mean_rate=rate,
-                var_rate=0.0,
-                last_update_ts=datetime.now(timezone.utc)
-            )
+                # Fitur tidak lengkap (mis. tanpa pitch voiced): embedding tetap disimpan,
+                # profil behavior menyusul saat verifikasi
+                features = {"pitch": pitch, "rate": rate}
+                if behavior_values_storable(features):
+                    behavior_profile = BehaviorProfile()
+                    behavior_profile.update(features, datetime.now(timezone.utc))
 
-            save_behavior_profile(user_id, label, behavior_profile)
+                    save_behavior_profile(user_id, label, behavior_profile)
 
-        return {
-            "status": "OK",
-            "message": "Voice enrollment successful",
-            "label": label
-        }
+            return {
+                "status": "OK",
+                "message": "Voice enrollment successful",
+                "label": label
+            }
 
-    finally:
-        if os.path.exists(wav_path):
-            os.remove(wav_path)
+        finally:
+            if os.path.exists(wav_path):
+                os.remove(wav_path)
 
 # CONVERSATION LOGS & SESSIONS
 @app.get("/logs/sessions")
@@ -446,12 +742,19 @@ async def delete_enrollment(
         .eq("id", enrollment_id)\
         .execute()
     
-    # Hapus behavior profile terkait
-    sb.table("behavior_profiles")\
-        .delete()\
-        .eq("user_id", user_id)\
-        .eq("label", label)\
-        .execute()
+    # Hapus behavior profile terkait (termasuk yang masih antre di write-behind)
+    def delete_behavior_profile():
+        sb.table("behavior_profiles")\
+            .delete()\
+            .eq("user_id", user_id)\
+            .eq("label", label)\
+            .execute()
+
+    if BEHAVIOR_WRITE_BEHIND:
+        # writer di-pause: batch yang sudah diambil tidak bisa mendarat setelah delete
+        await asyncio.to_thread(get_behavior_writer().delete, user_id, label, delete_behavior_profile)
+    else:
+        delete_behavior_profile()
     
     return {
         "status": "OK",
@@ -514,11 +817,20 @@ async def rename_speaker_label(
         .execute()
 
     # 4️⃣ Update behavior_profiles
-    sb.table("behavior_profiles")\
-        .update({"label": new_label})\
-        .eq("user_id", user_id)\
-        .eq("label", old_label)\
-        .execute()
+    def rename_behavior_profile():
+        sb.table("behavior_profiles")\
+            .update({"label": new_label})\
+            .eq("user_id", user_id)\
+            .eq("label", old_label)\
+            .execute()
+
+    if BEHAVIOR_WRITE_BEHIND:
+        # writer di-pause selama rename; antrean label lama pindah ke label baru
+        await asyncio.to_thread(
+            get_behavior_writer().rename, user_id, old_label, new_label, rename_behavior_profile
+        )
+    else:
+        rename_behavior_profile()
 
     return {
         "status": "OK",
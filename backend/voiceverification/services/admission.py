@@ -0,0 +1,119 @@
+"""Admission control for heavy inference endpoints.
+
+At most INFERENCE_MAX_CONCURRENCY requests run ffmpeg/librosa/torch work at
+the same time. Others wait in a bounded priority queue; when the queue is
+full or a request waits longer than INFERENCE_MAX_QUEUE_WAIT, it is rejected
+immediately with a Retry-After hint instead of piling onto an overloaded box.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+
+from utils.metrics import stage_timer
+
+INFERENCE_MAX_CONCURRENCY = int(os.getenv("INFERENCE_MAX_CONCURRENCY", "2"))
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "16"))
+INFERENCE_MAX_QUEUE_WAIT = float(os.getenv("INFERENCE_MAX_QUEUE_WAIT", "10"))
+
+# Angka kecil = prioritas lebih tinggi
+PRIORITY_LIVE_SESSION = 0
+PRIORITY_VERIFY = 1
+PRIORITY_ENROLL = 2
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrency: int = INFERENCE_MAX_CONCURRENCY,
+        max_queue: int = INFERENCE_MAX_QUEUE,
+        max_wait: float = INFERENCE_MAX_QUEUE_WAIT,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self.active = 0
+        self.rejected = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # EWMA lama satu slot dipakai, untuk estimasi Retry-After
+        self._avg_service_time = 1.0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, f in self._waiters if not f.done())
+
+    def retry_after(self) -> int:
+        backlog = self.queue_depth + 1
+        estimate = self._avg_service_time * backlog / max(self.max_concurrency, 1)
+        return max(1, math.ceil(estimate))
+
+    async def acquire(self, priority: int = PRIORITY_VERIFY):
+        if self.active < self.max_concurrency and self.queue_depth == 0:
+            self.active += 1
+            return
+
+        if self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected("Server busy, inference queue full", self.retry_after())
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            if fut.done() and not fut.cancelled():
+                # Slot diberikan bersamaan dengan timeout — pakai saja
+                return
+            fut.cancel()
+            self.rejected += 1
+            raise AdmissionRejected("Server busy, queue wait exceeded", self.retry_after())
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()
+            else:
+                fut.cancel()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                # Slot langsung dipindahkan ke waiter berikutnya (active tetap)
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_VERIFY):
+        with stage_timer("queue_wait"):
+            await self.acquire(priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            self._avg_service_time = 0.2 * elapsed + 0.8 * self._avg_service_time
+            self.release()
+
+
+_admission: AdmissionController | None = None
+
+
+def get_admission() -> AdmissionController:
+    global _admission
+    if _admission is None:
+        _admission = AdmissionController()
+    return _admission
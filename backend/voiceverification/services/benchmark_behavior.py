@@ -0,0 +1,126 @@
+"""Compare the behavior-feature extractor against the old yin path.
+
+For every clip under ``<dataset>/{genuine,impostor,spoof}`` (already
+decoded, so only feature time is measured):
+
+- old: ``nanmean(librosa.yin(y, fmin=50, fmax=300))`` and clip duration
+- new: ``core.behavior_features.extract_behavior_features``
+
+Reports latency percentiles of both and how far the pitch estimates are
+apart. Duration and syllable rate measure different things, so rates are
+only summarized, not compared.
+
+Usage:
+  python -m services.benchmark_behavior --dataset dataset [--repeat 3] [--out behavior_bench.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import librosa
+import numpy as np
+
+from core.behavior_features import BEHAVIOR_FMAX, BEHAVIOR_FMIN, extract_behavior_features
+
+SR = 16000
+AUDIO_EXTS = (".wav", ".mp3", ".flac", ".webm")
+PERCENTILES = (50, 90, 99)
+
+
+def _yin_features(y: np.ndarray, sr: int) -> tuple[float, float]:
+    pitch = float(np.nanmean(librosa.yin(y, fmin=BEHAVIOR_FMIN, fmax=BEHAVIOR_FMAX, sr=sr)))
+    return pitch, float(len(y) / sr)
+
+
+def _new_features(y: np.ndarray, sr: int) -> tuple[float | None, float | None]:
+    feats = extract_behavior_features(y, sr)
+    return feats.pitch, feats.rate
+
+
+def _timed(fn, signals: list[np.ndarray], repeat: int) -> tuple[list, np.ndarray]:
+    fn(signals[0], SR)  # warm-up
+    outputs, times = [], []
+    for y in signals:
+        best = np.inf
+        for _ in range(repeat):
+            start = time.perf_counter()
+            out = fn(y, SR)
+            best = min(best, time.perf_counter() - start)
+        outputs.append(out)
+        times.append(best * 1000)
+    return outputs, np.asarray(times)
+
+
+def _summary(ms: np.ndarray) -> dict:
+    return {f"p{p}_ms": float(np.percentile(ms, p)) for p in PERCENTILES} | {"mean_ms": float(ms.mean())}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark behavior features vs yin")
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per clip, best time is kept")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    paths = []
+    for sub in ("genuine", "impostor", "spoof"):
+        folder = os.path.join(args.dataset, sub)
+        if os.path.isdir(folder):
+            paths += [os.path.join(folder, f) for f in sorted(os.listdir(folder))
+                      if f.lower().endswith(AUDIO_EXTS)]
+    if not paths:
+        print(f"[BENCH] No audio files found under {args.dataset}")
+        return 1
+
+    signals = [librosa.load(p, sr=SR)[0] for p in paths]
+    seconds = sum(len(y) for y in signals) / SR
+    print(f"[BENCH] {len(signals)} clips, {seconds:.1f} s of audio")
+
+    old, old_ms = _timed(_yin_features, signals, args.repeat)
+    new, new_ms = _timed(_new_features, signals, args.repeat)
+
+    old_pitch = np.array([p for p, _ in old])
+    new_pitch = np.array([np.nan if p is None else p for p, _ in new])
+    both = np.isfinite(old_pitch) & np.isfinite(new_pitch)
+    rel = np.abs(new_pitch[both] - old_pitch[both]) / old_pitch[both]
+    rates = np.array([r for _, r in new if r is not None])
+
+    report = {
+        "n_clips": len(signals),
+        "audio_s": seconds,
+        "yin": _summary(old_ms),
+        "behavior_features": _summary(new_ms),
+        "speedup_mean": float(old_ms.mean() / new_ms.mean()),
+        "pitch": {
+            "n_compared": int(both.sum()),
+            "n_unvoiced_new": int(np.isnan(new_pitch).sum()),
+            "median_rel_diff": float(np.median(rel)) if rel.size else None,
+            "corr": float(np.corrcoef(old_pitch[both], new_pitch[both])[0, 1]) if both.sum() > 2 else None,
+        },
+        "syllable_rate": {
+            "n": int(rates.size),
+            "median": float(np.median(rates)) if rates.size else None,
+            "p10": float(np.percentile(rates, 10)) if rates.size else None,
+            "p90": float(np.percentile(rates, 90)) if rates.size else None,
+        },
+    }
+
+    for name in ("yin", "behavior_features"):
+        r = report[name]
+        print(f"[BENCH] {name:18s} p50={r['p50_ms']:.2f}ms p90={r['p90_ms']:.2f}ms mean={r['mean_ms']:.2f}ms")
+    print(f"[BENCH] speedup x{report['speedup_mean']:.1f}")
+    print(f"[BENCH] pitch: {report['pitch']}")
+    print(f"[BENCH] syllable rate: {report['syllable_rate']}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[BENCH] written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
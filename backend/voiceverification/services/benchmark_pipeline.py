@@ -0,0 +1,233 @@
+"""End-to-end speed benchmark for the biometric pipeline.
+
+Runs the bundled dataset (genuine / impostor / spoof) through
+``BiometricService.verify_against_multiple_embeddings``, ``compute_score``
+and ``replay_heuristic`` and reports:
+
+- cold start (model load) time
+- per-stage and total latency percentiles (p50 / p90 / p99)
+- throughput at several concurrency levels
+
+The feature cache is cleared (and its disk tier ignored) before every run,
+so each concurrency level measures the uncached path.
+
+Results are written as JSON. When a baseline file is given, every latency
+percentile is compared against it and the run exits with status 1 if any
+of them regressed by more than ``--threshold`` (relative).
+
+Usage:
+  python -m services.benchmark_pipeline --dataset dataset --out bench.json \\
+      [--baseline bench_baseline.json] [--threshold 0.2] [--concurrency 1,2,4]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.feature_cache import get_feature_cache
+from utils.metrics import collect_stages
+
+AUDIO_EXTS = (".wav", ".mp3", ".flac", ".webm")
+PERCENTILES = (50, 90, 99)
+
+
+def _dataset_files(base: str) -> list[str]:
+    files = []
+    for sub in ("genuine", "impostor", "spoof"):
+        folder = os.path.join(base, sub)
+        if not os.path.isdir(folder):
+            continue
+        for f in sorted(os.listdir(folder)):
+            if f.lower().endswith(AUDIO_EXTS):
+                files.append(os.path.join(folder, f))
+    return files
+
+
+def _summary(samples: list[float]) -> dict:
+    arr = np.asarray(samples, dtype=np.float64) * 1000.0
+    out = {f"p{p}_ms": float(np.percentile(arr, p)) for p in PERCENTILES}
+    out["mean_ms"] = float(arr.mean())
+    out["n"] = int(arr.size)
+    return out
+
+
+def _run(fn, files: list[str], concurrency: int) -> dict:
+    """Run ``fn`` over ``files``; return total and per-stage latency summaries."""
+    totals: list[float] = []
+    stages: dict[str, list[float]] = {}
+
+    def one(path):
+        with collect_stages() as st:
+            start = time.perf_counter()
+            fn(path)
+            elapsed = time.perf_counter() - start
+        return elapsed, dict(st)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, st in pool.map(one, files):
+            totals.append(elapsed)
+            for name, value in st.items():
+                stages.setdefault(name, []).append(value)
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "concurrency": concurrency,
+        "total": _summary(totals),
+        "stages": {name: _summary(v) for name, v in sorted(stages.items())},
+        "throughput_per_s": len(files) / wall if wall > 0 else 0.0,
+        "wall_s": wall,
+    }
+
+
+def run_benchmark(dataset: str, concurrency_levels: list[int], device: str = "cpu") -> dict:
+    from core.asvspoof import compute_score
+    from core.replay_heuristic import replay_heuristic
+
+    files = _dataset_files(dataset)
+    if not files:
+        raise RuntimeError(f"No audio files found under {dataset}")
+
+    # ---- cold start ----
+    start = time.perf_counter()
+    from services.biometric_service import BiometricService
+    bio = BiometricService(device=device)
+    cold_start = time.perf_counter() - start
+
+    enroll_path = os.path.join(dataset, "enroll.wav")
+    enroll_embeddings = [{
+        "embedding": bio.speaker.extract_embedding(enroll_path),
+        "label": "benchmark",
+    }]
+
+    def verify(path):
+        bio.verify_against_multiple_embeddings(
+            live_wav=path,
+            enroll_embeddings=enroll_embeddings,
+            behavior_profiles={},
+        )
+
+    targets = {
+        "verify_against_multiple_embeddings": verify,
+        "compute_score": compute_score,
+        "replay_heuristic": replay_heuristic,
+    }
+
+    # Feature cache (embedding / fitur spoof) dikosongkan sebelum tiap run,
+    # kalau tidak semua run setelah c=1 hanya mengukur cache hit
+    cache = get_feature_cache()
+    cache.disk_dir = None
+
+    results = {}
+    for name, fn in targets.items():
+        # satu kali lewat tanpa dicatat supaya lazy init tidak ikut terukur
+        fn(files[0])
+        results[name] = []
+        for c in concurrency_levels:
+            cache.clear()
+            results[name].append(_run(fn, files, c))
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "host": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "device": device,
+        },
+        "n_files": len(files),
+        "cold_start_s": cold_start,
+        "results": results,
+    }
+
+
+def _latency_points(report: dict) -> dict[str, float]:
+    """Flatten a report into {metric_key: milliseconds} for comparison."""
+    points = {}
+    for target, runs in report["results"].items():
+        for run in runs:
+            prefix = f"{target}@c{run['concurrency']}"
+            for p in PERCENTILES:
+                points[f"{prefix}.total.p{p}_ms"] = run["total"][f"p{p}_ms"]
+                for stage, summary in run["stages"].items():
+                    points[f"{prefix}.{stage}.p{p}_ms"] = summary[f"p{p}_ms"]
+    return points
+
+
+def compare_to_baseline(report: dict, baseline: dict, threshold: float) -> list[str]:
+    current = _latency_points(report)
+    previous = _latency_points(baseline)
+
+    regressions = []
+    for key, base_value in previous.items():
+        value = current.get(key)
+        if value is None or base_value <= 0:
+            continue
+        change = (value - base_value) / base_value
+        if change > threshold:
+            regressions.append(
+                f"{key}: {base_value:.1f}ms -> {value:.1f}ms (+{change * 100:.0f}%)"
+            )
+
+    base_cold = baseline.get("cold_start_s")
+    if base_cold:
+        change = (report["cold_start_s"] - base_cold) / base_cold
+        if change > threshold:
+            regressions.append(
+                f"cold_start_s: {base_cold:.2f}s -> {report['cold_start_s']:.2f}s (+{change * 100:.0f}%)"
+            )
+
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the biometric pipeline")
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Max allowed relative latency increase vs baseline")
+    parser.add_argument("--concurrency", default="1,2,4")
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args(argv)
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    report = run_benchmark(args.dataset, levels, device=args.device)
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n[BENCHMARK] cold start: {report['cold_start_s']:.2f}s")
+    for target, runs in report["results"].items():
+        for run in runs:
+            t = run["total"]
+            print(
+                f"[BENCHMARK] {target:38s} c={run['concurrency']:<2d} "
+                f"p50={t['p50_ms']:8.1f}ms p90={t['p90_ms']:8.1f}ms "
+                f"p99={t['p99_ms']:8.1f}ms  {run['throughput_per_s']:.2f}/s"
+            )
+    print(f"[BENCHMARK] results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n[BENCHMARK] REGRESSION (> {args.threshold * 100:.0f}%):")
+            for r in regressions:
+                print("  -", r)
+            return 1
+        print("[BENCHMARK] no regression vs baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
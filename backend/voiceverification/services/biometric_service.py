@@ -9,7 +9,16 @@ from models.speaker_verifier import SpeakerVerifier
 from core.asvspoof import compute_score
 from core.decision_engine import decide, Decision
 from core.trusted_update import TrustedUpdatePolicy
-from core.behavior_scoring import compute_behavior_score
+from core.behavior_features import behavior_pitch_rate
+from core.behavior_scoring import score_profiles
+from core.fingerprint import compute_fingerprint
+from db.behavior_repo import behavior_values_storable
+from db.fingerprint_index import (
+    FINGERPRINT_ENABLED,
+    FINGERPRINT_REPLAY_PROB,
+    get_fingerprint_index,
+)
+from utils.metrics import stage_timer
 
 
 
@@ -31,7 +40,8 @@ class BiometricService:
         behavior_profiles = behavior_profiles or {}
 
         # 1. Extract live embedding
-        live_emb = self.speaker.extract_embedding(live_wav)
+        with stage_timer("embedding"):
+            live_emb = self.speaker.extract_embedding(live_wav)
 
         scores = []
         for prof in enroll_embeddings:
@@ -46,59 +56,77 @@ class BiometricService:
         best_label = enroll_embeddings[best_idx]["label"]
 
         # 2. Spoof Score
-        spoof_prob, _ = compute_score(live_wav)
+        with stage_timer("spoof"):
+            spoof_prob, spoof_features = compute_score(live_wav)
+
+        # 2b. Exact replay dari clip verifikasi sebelumnya
+        fingerprint = None
+        replay_match = None
+        replay_prob = spoof_prob
+        if FINGERPRINT_ENABLED and user_id:
+            with stage_timer("fingerprint"):
+                fingerprint = compute_fingerprint(live_wav)
+                replay_match = get_fingerprint_index().match(user_id, fingerprint)
+            if replay_match.is_replay:
+                replay_prob = max(spoof_prob, FINGERPRINT_REPLAY_PROB)
 
         # 3. Decision
         decision, reason = decide(
             speaker_score=best_score,
-            replay_prob=spoof_prob,
+            replay_prob=replay_prob,
         )
 
+        # Hanya clip yang lolos verifikasi (dan bukan replay) yang masuk index;
+        # retry byte-identik setelah REPEAT / DENIED tidak boleh cocok dengan dirinya sendiri
+        if fingerprint is not None and decision == Decision.VERIFIED and not replay_match.is_replay:
+            with stage_timer("fingerprint_store"):
+                get_fingerprint_index().add(user_id, fingerprint)
+
         # 4. Behavior
         behavior_score = None
+        behavior_scores: dict[str, dict] = {}
         pitch, rate = None, None
-        z_pitch = z_rate = None
         updated_behavior_profile: BehaviorProfile | None = None
 
         if decision == Decision.VERIFIED:
-            y, sr = librosa.load(live_wav, sr=16000)
-            pitch = float(np.nanmean(librosa.yin(y, fmin=50, fmax=300, sr=sr)))
-            rate = float(len(y) / sr)
+            with stage_timer("pitch_behavior"):
+                y, sr = librosa.load(live_wav, sr=16000)
+                pitch, rate = behavior_pitch_rate(y, sr)
+                features = {"pitch": pitch, "rate": rate}
+                # Semua label user diskor sekaligus (satu operasi numpy)
+                behavior_scores = score_profiles(features, behavior_profiles)
 
             behavior_profile = behavior_profiles.get(best_label)
+            best_behavior = behavior_scores.get(best_label) or {}
+            behavior_score = best_behavior.get("score")
 
-            if behavior_profile is None:
+            if not behavior_values_storable(features):
+                # fitur tidak lengkap untuk penyimpanan (mis. tanpa pitch voiced) → profil tidak disentuh
+                pass
+            elif behavior_profile is None:
                 behavior_profile = BehaviorProfile()
-                behavior_profile.update(pitch, rate, datetime.now(timezone.utc))
+                behavior_profile.update(features, datetime.now(timezone.utc))
+                updated_behavior_profile = behavior_profile
+            # 🔒 trusted adaptive update
+            elif self.policy.should_update(
+                decision=decision.value,
+                speaker_score=best_score,
+                spoof_prob=spoof_prob,
+                behavior_score=behavior_score,
+                n_samples=behavior_profile.n_samples,
+                zscores=best_behavior.get("z") or {},
+                last_update_time=behavior_profile.last_update_ts.timestamp(),
+                is_retry=is_retry,
+            ):
+                behavior_profile.update(features, datetime.now(timezone.utc))
                 updated_behavior_profile = behavior_profile
-            else:
-                # 🧠 compute behavior score
-                behavior_score, z_pitch, z_rate, _, _ = compute_behavior_score(
-                    pitch,
-                    rate,
-                    behavior_profile
-                )
-
-                # 🔒 trusted adaptive update
-                if self.policy.should_update(
-                    decision=decision.value,
-                    speaker_score=best_score,
-                    spoof_prob=spoof_prob,
-                    behavior_score=behavior_score,
-                    n_samples=behavior_profile.n_samples,
-                    z_pitch=z_pitch,
-                    z_rate=z_rate,
-                    last_update_time=behavior_profile.last_update_ts,
-                    is_retry=is_retry,
-                ):
-                    behavior_profile.update(pitch, rate, datetime.now(timezone.utc))
-                    updated_behavior_profile = behavior_profile 
 
         # 5. Log
         print(
             f"🎯 VERIFY | label='{best_label}' "
             f"| score={best_score:.3f} "
             f"| spoof={spoof_prob:.3f} "
+            f"| replay_votes={replay_match.votes if replay_match else '-'} "
             f"| decision={decision.value}"
         )
 
@@ -110,6 +138,10 @@ class BiometricService:
 
             "score": best_score,
             "spoof_prob": spoof_prob,
+            "replay_prob": replay_prob,
+            "replay_match": replay_match.is_replay if replay_match else False,
+            "replay_votes": replay_match.votes if replay_match else None,
+            "spoof_features": spoof_features,
             
             "best_index": best_idx,
             "best_label": best_label,
@@ -118,6 +150,7 @@ class BiometricService:
             "pitch": pitch,
             "rate": rate,
             "behavior_score": behavior_score,
+            "behavior_scores": {lbl: r["score"] for lbl, r in behavior_scores.items()},
 
             "updated_behavior_profile": updated_behavior_profile,
         } 
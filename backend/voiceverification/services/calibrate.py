@@ -0,0 +1,294 @@
+"""Parallel calibration runner with a persistent feature store.
+
+Replaces walking the dataset file by file in calibrate_biometric,
+calibrate_spoof, train_asvspoof_lite_v2 and roc_analysis:
+
+1. every audio file under ``<dataset>/{genuine,impostor,spoof}`` plus
+   ``<dataset>/enroll.wav`` is hashed (sha256 of the bytes)
+2. files not yet in the feature store are decoded once and their ECAPA
+   embedding, spoof features and replay heuristic are extracted in a
+   process pool (one speaker model per worker)
+3. EER / ROC for speaker, spoof and combined scores, and optionally the
+   spoof logistic model, are computed from the cached matrices
+
+Re-running after adding clips only extracts the new ones.
+
+Usage:
+  python -m services.calibrate --dataset dataset --store calibration_store \\
+      --workers 4 --out calibration.json [--train] [--plot roc.png] \\
+      [--export-spoof-model asvspoof_model.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from core.asvspoof import SPOOF_FEATURE_VERSION, SpoofModel, save_spoof_model, score_features
+from core.calibration import bootstrap_error_rates, det_curve
+from utils.feature_store import FeatureStore, file_digest
+
+SR = 16000
+AUDIO_EXTS = (".wav", ".mp3", ".flac", ".webm")
+# label 1 = genuine speaker / bona fide
+CLASSES = {"genuine": 1, "impostor": 0, "spoof": 0}
+REPLAY_FEATURE_VERSION = "replay-heuristic-v1"
+FLUSH_EVERY = 64
+# File per task worker; fitur spoof satu chunk dihitung sebagai satu batch STFT
+EXTRACT_CHUNK = 16
+
+_worker_verifier = None
+
+
+def _init_worker(device: str):
+    global _worker_verifier
+    import torch
+    # Paralelisme dari jumlah proses, bukan thread torch per proses
+    torch.set_num_threads(1)
+
+    from models.speaker_verifier import SpeakerVerifier
+    _worker_verifier = SpeakerVerifier(device)
+
+
+def _extract_many(paths: list[str]) -> list[dict[str, np.ndarray] | None]:
+    """Decode each file once; spoof features of the whole chunk in one batch."""
+    import librosa
+    from core.asvspoof import extract_features_batch, prepare_signal
+    from core.replay_heuristic import replay_heuristic
+
+    out: list[dict[str, np.ndarray] | None] = []
+    spoof_signals, spoof_rows = [], []
+    for path in paths:
+        try:
+            y, _ = librosa.load(path, sr=SR, mono=True)
+            y_spoof = prepare_signal(y)
+            # compute_score → 0.0 untuk clip hening, fiturnya NaN di sini
+            spoof = np.full(3, np.nan)
+            if np.max(np.abs(y_spoof)) >= 1e-6:
+                spoof_signals.append(y_spoof)
+                spoof_rows.append(len(out))
+
+            out.append({
+                "embedding": np.asarray(_worker_verifier.embed_signal(y), dtype=np.float32),
+                "spoof_features": spoof,
+                "replay_prob": np.array([replay_heuristic(y, SR)["replay_prob"]], dtype=np.float64),
+            })
+        except Exception as e:
+            print(f"[CALIBRATE] Error {path}: {e}")
+            out.append(None)
+
+    for row, feats in zip(spoof_rows, extract_features_batch(spoof_signals, SR)):
+        out[row]["spoof_features"] = feats
+    return out
+
+
+def store_version() -> str:
+    from models.speaker_verifier import artifact_version, embedding_config_version
+    return (
+        f"{artifact_version()}|{embedding_config_version()}"
+        f"|{SPOOF_FEATURE_VERSION}|{REPLAY_FEATURE_VERSION}"
+    )
+
+
+def dataset_files(base: str) -> list[tuple[str, str]]:
+    """[(path, class_name)] for every audio file in the dataset."""
+    files = []
+    for cls in CLASSES:
+        folder = os.path.join(base, cls)
+        if not os.path.isdir(folder):
+            continue
+        for f in sorted(os.listdir(folder)):
+            if f.lower().endswith(AUDIO_EXTS):
+                files.append((os.path.join(folder, f), cls))
+    return files
+
+
+def extract_missing(store: FeatureStore, paths: list[str], workers: int, device: str) -> dict[str, str]:
+    """Hash ``paths``, extract the ones missing from ``store``. Returns {path: key}."""
+    keys = {p: file_digest(p) for p in paths}
+
+    todo: dict[str, str] = {}
+    queued: set[str] = set()
+    for path, key in keys.items():
+        if key not in store and key not in queued:
+            todo[path] = key
+            queued.add(key)
+
+    print(f"[CALIBRATE] {len(paths)} files, {len(paths) - len(todo)} cached, {len(todo)} to extract")
+    if not todo:
+        return keys
+
+    start = time.perf_counter()
+    batch = []
+    done = 0
+    # spawn: torch + fork tidak aman kalau parent sudah pernah pakai thread pool
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(device,),
+    ) as pool:
+        paths = list(todo)
+        chunks = [paths[i: i + EXTRACT_CHUNK] for i in range(0, len(paths), EXTRACT_CHUNK)]
+        for chunk, results in zip(chunks, pool.map(_extract_many, chunks)):
+            for path, feats in zip(chunk, results):
+                if feats is not None:
+                    batch.append((todo[path], feats))
+            done += len(chunk)
+            if len(batch) >= FLUSH_EVERY:
+                store.append(batch)
+                batch = []
+            rate = done / (time.perf_counter() - start)
+            print(f"[CALIBRATE] extracted {done}/{len(todo)} ({rate:.1f} files/s)")
+    store.append(batch)
+
+    return keys
+
+
+def _eer(genuine: np.ndarray, impostor: np.ndarray) -> dict:
+    """EER, operating points at target FARs and bootstrap confidence intervals."""
+    if genuine.size == 0 or impostor.size == 0:
+        return {"threshold": None, "eer": None}
+    report = bootstrap_error_rates(genuine, impostor)
+    report["threshold"] = report.pop("eer_threshold")
+    return report
+
+
+def _roc(labels: np.ndarray, scores: np.ndarray) -> dict:
+    curve = det_curve(scores[labels == 1], scores[labels == 0])
+    return {
+        "fpr": curve.far.tolist(),
+        "tpr": curve.tpr.tolist(),
+        "thresholds": curve.thresholds.tolist(),
+    }
+
+
+def evaluate(store: FeatureStore, files: list[tuple[str, str]], keys: dict[str, str],
+             enroll_key: str) -> dict:
+    files = [(p, cls) for p, cls in files if keys[p] in store]
+    row_keys = [keys[p] for p, _ in files]
+    classes = np.array([cls for _, cls in files])
+    labels = np.array([CLASSES[cls] for cls in classes])
+
+    enroll_emb = store.take("embedding", [enroll_key])[0]
+    speaker = store.take("embedding", row_keys) @ enroll_emb
+
+    spoof_feats = store.take("spoof_features", row_keys)
+    silent = np.isnan(spoof_feats).any(axis=1)
+    spoof = np.where(silent, 0.0, score_features(np.nan_to_num(spoof_feats)))
+
+    replay = store.take("replay_prob", row_keys)[:, 0]
+    combined = 0.7 * speaker + 0.3 * (1 - replay)
+
+    genuine, impostor, spoofed = (classes == "genuine"), (classes == "impostor"), (classes == "spoof")
+
+    return {
+        "counts": {cls: int((classes == cls).sum()) for cls in CLASSES},
+        # sama dengan calibrate_biometric: genuine vs impostor
+        "speaker": _eer(speaker[genuine], speaker[impostor]),
+        # sama dengan calibrate_spoof: genuine vs spoof
+        "spoof": _eer(spoof[genuine], spoof[spoofed]),
+        # sama dengan roc_analysis: genuine vs impostor + spoof
+        "roc": {
+            "speaker": _roc(labels, speaker),
+            "combined": _roc(labels, combined),
+        },
+        "combined": _eer(combined[labels == 1], combined[labels == 0]),
+    }
+
+
+def train_spoof(store: FeatureStore, files: list[tuple[str, str]], keys: dict[str, str]) -> SpoofModel:
+    from services.train_asvspoof_lite_v2 import fit_spoof_model
+
+    # label seperti train_asvspoof_lite_v2: genuine & impostor = 1 (manusia asli), spoof = 0
+    files = [(p, cls) for p, cls in files if keys[p] in store]
+    X = store.take("spoof_features", [keys[p] for p, _ in files])
+    y = np.array([0 if cls == "spoof" else 1 for _, cls in files])
+    ok = ~np.isnan(X).any(axis=1)
+    return fit_spoof_model(X[ok], y[ok])
+
+
+def plot_roc(report: dict, path: str):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(6, 6))
+    for name, roc in report["roc"].items():
+        plt.plot(roc["fpr"], roc["tpr"], label=f"{name} (EER={report[name]['eer'] or 0:.3f})")
+    plt.plot([0, 1], [1, 0], "k--")
+    plt.xlabel("False Positive Rate")
+    plt.ylabel("True Positive Rate")
+    plt.title("Verification ROC")
+    plt.legend()
+    plt.grid()
+    plt.tight_layout()
+    plt.savefig(path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Parallel biometric / spoof calibration")
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--enroll", default=None, help="Default: <dataset>/enroll.wav")
+    parser.add_argument("--store", default="calibration_store")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--out", default="calibration.json")
+    parser.add_argument("--train", action="store_true", help="Also fit the spoof logistic model")
+    parser.add_argument("--export-spoof-model", default=None,
+                        help="With --train, write the model artifact here (e.g. SPOOF_MODEL_PATH)")
+    parser.add_argument("--plot", default=None, help="Save ROC plot to this png")
+    args = parser.parse_args(argv)
+
+    enroll = args.enroll or os.path.join(args.dataset, "enroll.wav")
+    files = dataset_files(args.dataset)
+    if not files:
+        print(f"[CALIBRATE] No audio files found under {args.dataset}")
+        return 1
+
+    store = FeatureStore(args.store, store_version())
+    keys = extract_missing(store, [enroll] + [p for p, _ in files], args.workers, args.device)
+    if keys[enroll] not in store:
+        print(f"[CALIBRATE] Could not extract enrollment {enroll}")
+        return 1
+
+    report = evaluate(store, files, keys, keys[enroll])
+    if args.train:
+        model = train_spoof(store, files, keys)
+        report["spoof_model"] = model.to_dict()
+        if args.export_spoof_model:
+            save_spoof_model(model, args.export_spoof_model)
+            print(f"[CALIBRATE] spoof model {model.version} exported to {args.export_spoof_model}")
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name in ("speaker", "spoof", "combined"):
+        r = report[name]
+        if r["eer"] is not None:
+            lo, hi = r["eer_ci"]
+            print(
+                f"[CALIBRATE] {name:9s} threshold={r['threshold']:.4f} "
+                f"EER={r['eer'] * 100:.2f}% (95% CI {lo * 100:.2f}–{hi * 100:.2f}%)"
+            )
+            for point in r["operating_points"]:
+                if point["threshold"] is not None:
+                    print(
+                        f"[CALIBRATE] {'':9s} FAR<={point['target_far']:g}: "
+                        f"threshold={point['threshold']:.4f} FRR={point['frr'] * 100:.2f}%"
+                    )
+    if args.plot:
+        plot_roc(report, args.plot)
+        print(f"[CALIBRATE] ROC plot written to {args.plot}")
+    print(f"[CALIBRATE] results written to {args.out}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,14 +14,17 @@ def calibrate_biometric(genuine_dir, impostor_dir, enroll_path):
     genuine_scores = []
     impostor_scores = []
 
+    # Enrollment cukup di-decode & di-encode sekali
+    enroll_emb = verifier.extract_embedding(enroll_path)
+    y2, _ = librosa.load(enroll_path, sr=16000)
+
     print("[BIOMETRIC CALIBRATION] Starting calibration...")
     for f in os.listdir(genuine_dir):
         print(f"[BIOMETRIC CALIBRATION] Processing genuine file: {f}")
         live = os.path.join(genuine_dir, f)
-        ecapa = verifier.verify(live, enroll_path)
+        ecapa = verifier.compare_embeddings(verifier.extract_embedding(live), enroll_emb)
 
         y1, sr = librosa.load(live, sr=16000)
-        y2, _  = librosa.load(enroll_path, sr=16000)
 
         score = fuse(
             ecapa,
@@ -33,10 +36,9 @@ def calibrate_biometric(genuine_dir, impostor_dir, enroll_path):
     for f in os.listdir(impostor_dir):
         print(f"[BIOMETRIC CALIBRATION] Processing impostor file: {f}")
         live = os.path.join(impostor_dir, f)
-        ecapa = verifier.verify(live, enroll_path)
+        ecapa = verifier.compare_embeddings(verifier.extract_embedding(live), enroll_emb)
 
         y1, sr = librosa.load(live, sr=16000)
-        y2, _  = librosa.load(enroll_path, sr=16000)
 
         score = fuse(
             ecapa,
@@ -1,21 +1,18 @@
 import os
-from core.asvspoof import compute_score
+from core.asvspoof import compute_scores
 from core.calibration import find_eer_threshold
 
 
 def calibrate_spoof(genuine_dir, spoof_dir):
-    genuine_scores = []
-    spoof_scores = []
     print("[ANTI-SPOOF CALIBRATION] Starting calibration...")
-    for f in os.listdir(genuine_dir):
-        print(f"[ANTI-SPOOF CALIBRATION] Processing genuine file: {f}")
-        score, _ = compute_score(os.path.join(genuine_dir, f))
-        genuine_scores.append(score)
-
-    for f in os.listdir(spoof_dir):
-        print(f"[ANTI-SPOOF CALIBRATION] Processing spoof file: {f}")
-        score, _ = compute_score(os.path.join(spoof_dir, f))
-        spoof_scores.append(score)
+    genuine_files = [os.path.join(genuine_dir, f) for f in sorted(os.listdir(genuine_dir))]
+    spoof_files = [os.path.join(spoof_dir, f) for f in sorted(os.listdir(spoof_dir))]
+    print(f"[ANTI-SPOOF CALIBRATION] Scoring {len(genuine_files)} genuine + {len(spoof_files)} spoof files")
+
+    # Satu batch: STFT per bucket panjang + satu evaluasi logistic
+    scores, _ = compute_scores(genuine_files + spoof_files)
+    genuine_scores = scores[:len(genuine_files)]
+    spoof_scores = scores[len(genuine_files):]
 
     threshold, eer = find_eer_threshold(
         scores_genuine=genuine_scores,
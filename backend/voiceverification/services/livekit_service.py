@@ -0,0 +1,152 @@
+"""Long-lived LiveKit API access for the FastAPI server.
+
+One ``LiveKitAPI`` (and its HTTP session) is reused for the whole worker
+instead of opening a new one per /join-token call. Join tokens are cached
+per (user, room) for a short window and agent dispatch is coalesced per
+room, so a frontend reconnect storm turns into at most one LiveKit API call
+per room per window.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+# livekit.api di-import lazily (lihat FAST_START di server.py)
+if TYPE_CHECKING:
+    from livekit.api import LiveKitAPI
+
+# Masa berlaku JWT LiveKit (default sama dengan AccessToken: 6 jam)
+JOIN_TOKEN_TTL = int(os.getenv("LIVEKIT_JOIN_TOKEN_TTL", str(6 * 60 * 60)))
+# Berapa lama token yang sama boleh dipakai ulang untuk user yang sama
+JOIN_TOKEN_CACHE_TTL = float(os.getenv("LIVEKIT_JOIN_TOKEN_CACHE_TTL", "60"))
+# Token yang sisa umurnya di bawah ini tidak dipakai ulang
+JOIN_TOKEN_MIN_REMAINING = 5 * 60
+# Jendela di mana dispatch ke room yang sama dianggap sudah dilakukan
+DISPATCH_CACHE_TTL = float(os.getenv("LIVEKIT_DISPATCH_CACHE_TTL", "15"))
+
+
+class LiveKitService:
+    def __init__(self, url: str | None, api_key: str, api_secret: str):
+        self.url = url
+        self.api_key = api_key
+        self.api_secret = api_secret
+
+        self._api: "LiveKitAPI | None" = None
+        # (user_id, room) -> (jwt, cached_until, expires_at)
+        self._tokens: dict[tuple[str, str], tuple[str, float, float]] = {}
+        # room -> dispatched_at
+        self._dispatched: dict[str, float] = {}
+        self._room_locks: dict[str, asyncio.Lock] = {}
+
+    @property
+    def api(self) -> "LiveKitAPI":
+        # Dibuat lazily di dalam event loop (aiohttp session butuh loop aktif)
+        if self._api is None:
+            from livekit.api import LiveKitAPI
+
+            self._api = LiveKitAPI(
+                url=self.url,
+                api_key=self.api_key,
+                api_secret=self.api_secret,
+            )
+        return self._api
+
+    def get_join_token(self, user_id: str, room_name: str) -> str:
+        now = time.time()
+        key = (user_id, room_name)
+
+        cached = self._tokens.get(key)
+        if cached:
+            jwt, cached_until, expires_at = cached
+            if now < cached_until and expires_at - now > JOIN_TOKEN_MIN_REMAINING:
+                return jwt
+
+        from livekit.api import AccessToken, VideoGrants
+
+        grant = VideoGrants(
+            room_join=True,
+            room=room_name,
+            can_publish=True,
+            can_subscribe=True,
+        )
+
+        token = AccessToken(self.api_key, self.api_secret)
+        token.with_identity(user_id)
+        token.with_grants(grant)
+        token.with_ttl(timedelta(seconds=JOIN_TOKEN_TTL))
+        jwt = token.to_jwt()
+
+        self._prune(self._tokens, lambda v: v[1] <= now)
+        self._tokens[key] = (jwt, now + JOIN_TOKEN_CACHE_TTL, now + JOIN_TOKEN_TTL)
+        return jwt
+
+    async def ensure_dispatch(self, room_name: str) -> bool:
+        """
+        Dispatch the agent to ``room_name`` at most once per cache window.
+
+        Concurrent callers for the same room wait on one lock, so only the
+        first one talks to LiveKit. Returns True if a dispatch was created.
+        """
+        lock = self._room_locks.setdefault(room_name, asyncio.Lock())
+
+        async with lock:
+            now = time.time()
+            dispatched_at = self._dispatched.get(room_name)
+            if dispatched_at is not None and now - dispatched_at < DISPATCH_CACHE_TTL:
+                return False
+
+            from livekit.api import CreateAgentDispatchRequest
+
+            await self.api.agent_dispatch.create_dispatch(
+                CreateAgentDispatchRequest(room=room_name)
+            )
+
+            self._prune(self._dispatched, lambda v: now - v >= DISPATCH_CACHE_TTL)
+            self._dispatched[room_name] = now
+
+            for r in [r for r, l in self._room_locks.items()
+                      if r not in self._dispatched and not l.locked()]:
+                del self._room_locks[r]
+            return True
+
+    def forget_dispatch(self, room_name: str):
+        self._dispatched.pop(room_name, None)
+
+    @staticmethod
+    def _prune(cache: dict, expired) -> None:
+        for k in [k for k, v in cache.items() if expired(v)]:
+            del cache[k]
+
+    async def aclose(self):
+        if self._api is not None:
+            await self._api.aclose()
+            self._api = None
+
+
+class StubLiveKitService:
+    """
+    LiveKit stand-in for LOCAL_STANDIN mode: no credentials, no network.
+
+    Tokens are opaque fake strings and dispatch only sleeps
+    STANDIN_LIVEKIT_LATENCY_MS to mimic the API round trip.
+    """
+
+    def __init__(self, latency_ms: float | None = None):
+        if latency_ms is None:
+            latency_ms = float(os.getenv("STANDIN_LIVEKIT_LATENCY_MS", "30"))
+        self.latency = latency_ms / 1000.0
+        self.dispatch_count = 0
+
+    def get_join_token(self, user_id: str, room_name: str) -> str:
+        return f"standin.{room_name}.{uuid.uuid4().hex}"
+
+    async def ensure_dispatch(self, room_name: str) -> bool:
+        await asyncio.sleep(self.latency)
+        self.dispatch_count += 1
+        return True
+
+    async def aclose(self):
+        pass
@@ -0,0 +1,156 @@
+"""HTTP load generator for /verify-voice.
+
+Meant to run against a server started in stand-in mode, so no real
+Supabase or LiveKit credentials are needed:
+
+  LOCAL_STANDIN=1 STANDIN_DB_LATENCY_MS=20 uvicorn server:app --port 8000
+
+then:
+
+  python -m services.loadtest --url http://localhost:8000 \\
+      --audio-dir dataset/genuine --rps 1,2,4,8 --duration 30 --out load.json
+
+Each step sends requests open-loop at the target RPS (a slow server does
+not slow the sender down), replaying the given wav/webm files round-robin.
+The report is a latency/error curve: one row per RPS step.
+In stand-in mode the bearer token is the user id, so test users are
+enrolled first with the enroll file.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+AUDIO_EXTS = (".wav", ".webm")
+
+
+def _audio_files(folder: str) -> list[str]:
+    files = [
+        os.path.join(folder, f)
+        for f in sorted(os.listdir(folder))
+        if f.lower().endswith(AUDIO_EXTS)
+    ]
+    if not files:
+        raise RuntimeError(f"No audio files in {folder}")
+    return files
+
+
+def _post_audio(session: requests.Session, url: str, token: str, path: str,
+                data: dict | None = None, timeout: float = 60.0):
+    with open(path, "rb") as f:
+        return session.post(
+            url,
+            headers={"Authorization": f"Bearer {token}"},
+            files={"audio": (os.path.basename(path), f, "application/octet-stream")},
+            data=data,
+            timeout=timeout,
+        )
+
+
+def enroll_users(base_url: str, users: list[str], enroll_file: str):
+    session = requests.Session()
+    for user in users:
+        res = _post_audio(session, f"{base_url}/enroll-voice", user, enroll_file,
+                          data={"label": "loadtest"})
+        # 400 = sudah pernah enroll, tidak masalah
+        if res.status_code not in (200, 400):
+            raise RuntimeError(f"Enroll {user} failed: {res.status_code} {res.text}")
+
+
+def run_step(base_url: str, users: list[str], files: list[str],
+             rps: float, duration: float, max_inflight: int) -> dict:
+    results: list[tuple[float, int]] = []
+    lock = threading.Lock()
+    local = threading.local()
+
+    def one(user: str, path: str):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            status = _post_audio(local.session, f"{base_url}/verify-voice", user, path).status_code
+        except requests.RequestException:
+            status = 0  # timeout / connection error
+        elapsed = time.perf_counter() - start
+        with lock:
+            results.append((elapsed, status))
+
+    n_requests = int(rps * duration)
+    interval = 1.0 / rps
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+        for i in range(n_requests):
+            # open-loop: jadwal kirim tetap walau server lambat
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, users[i % len(users)], files[i % len(files)])
+    wall = time.perf_counter() - start
+
+    latencies = np.array([r[0] for r in results]) * 1000.0
+    statuses: dict[str, int] = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    ok = statuses.get("200", 0)
+
+    return {
+        "target_rps": rps,
+        "sent": len(results),
+        "achieved_rps": ok / wall if wall > 0 else 0.0,
+        "error_rate": 1.0 - ok / len(results) if results else 0.0,
+        "status_counts": statuses,
+        "p50_ms": float(np.percentile(latencies, 50)) if latencies.size else None,
+        "p90_ms": float(np.percentile(latencies, 90)) if latencies.size else None,
+        "p99_ms": float(np.percentile(latencies, 99)) if latencies.size else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test /verify-voice")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--audio-dir", default="dataset/genuine")
+    parser.add_argument("--enroll-file", default="dataset/enroll.wav")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--rps", default="1,2,4")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--max-inflight", type=int, default=64)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    base_url = args.url.rstrip("/")
+    files = _audio_files(args.audio_dir)
+    users = [f"loadtest-user-{i}" for i in range(args.users)]
+
+    print(f"[LOADTEST] enrolling {len(users)} users...")
+    enroll_users(base_url, users, args.enroll_file)
+
+    curve = []
+    for rps in [float(r) for r in args.rps.split(",") if r.strip()]:
+        print(f"[LOADTEST] {rps:g} rps for {args.duration:g}s...")
+        step = run_step(base_url, users, files, rps, args.duration, args.max_inflight)
+        curve.append(step)
+        print(
+            f"[LOADTEST] rps={rps:<5g} ok/s={step['achieved_rps']:.2f} "
+            f"err={step['error_rate'] * 100:.1f}% "
+            f"p50={step['p50_ms'] or 0:.0f}ms p90={step['p90_ms'] or 0:.0f}ms "
+            f"p99={step['p99_ms'] or 0:.0f}ms {step['status_counts']}"
+        )
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"url": base_url, "duration_s": args.duration, "curve": curve}, f, indent=2)
+        print(f"[LOADTEST] results written to {args.out}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,6 @@
+import argparse
 import os
+import sys
 import numpy as np
 import librosa
 import warnings
@@ -9,95 +11,79 @@ from sklearn.pipeline import Pipeline
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix
 
+from core.asvspoof import (
+    SPOOF_MODEL_PATH,
+    SpoofModel,
+    extract_features_batch,
+    new_spoof_model,
+    save_spoof_model,
+)
+
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
 SR = 16000
-N_FFT = 1024
-HOP = 512
+MIN_SAMPLES = 1024
 
-# Feature extraction (same logic as inference)
-def extract_features(path):
+
+# Decode + trim (same as inference); None kalau kosong / terlalu pendek
+def load_signal(path):
     try:
         y, _ = librosa.load(path, sr=SR, mono=True)
         if len(y) == 0:
             return None
 
         y, _ = librosa.effects.trim(y, top_db=25)
-        if len(y) < 1024:
+        if len(y) < MIN_SAMPLES:
             return None
-
-        stft = np.abs(
-            librosa.stft(y, n_fft=N_FFT, hop_length=HOP)
-        ) + 1e-9
-
-        # 1. Spectral Flatness
-        flat = np.mean(
-            librosa.feature.spectral_flatness(S=stft)
-        )
-
-        # 2. Temporal Energy Variance (NORMALIZED)
-        energy = np.mean(stft, axis=0)
-        if np.max(energy) > 0:
-            energy /= np.max(energy)
-        temp_var = np.var(energy)
-
-        # 3. High-band Energy Ratio
-        freqs = librosa.fft_frequencies(sr=SR, n_fft=N_FFT)
-
-        voice_band = stft[(freqs > 300) & (freqs < 3400)]
-        high_band  = stft[(freqs > 10000) & (freqs < 16000)]
-
-        voice = np.mean(voice_band) if voice_band.size > 0 else 0.0
-        high  = np.mean(high_band)  if high_band.size > 0 else 0.0
-
-        high_ratio = high / voice if voice > 1e-6 else 0.0
-
-        return [flat, temp_var, high_ratio]
+        return y
 
     except Exception as e:
         print(f"Error {path}: {e}")
         return None
 
 
+# Feature extraction (same logic as inference)
+def extract_features(path):
+    y = load_signal(path)
+    if y is None:
+        return None
+    return list(extract_features_batch([y], SR)[0])
+
+
 # Load training dataset (genuine, impostor, spoof)
 def load_dataset(base="dataset"):
-    X, y = [], []
-
-    # POSITIVE CLASS: genuine user
-    genuine_dir = os.path.join(base, "genuine")
-    for f in os.listdir(genuine_dir):
-        path = os.path.join(genuine_dir, f)
-        feat = extract_features(path)
-        if feat is not None:
-            X.append(feat)
-            y.append(1)
-
-    # NEGATIVE CLASS: impostor (human lain)
-    impostor_dir = os.path.join(base, "impostor")
-    for f in os.listdir(impostor_dir):
-        path = os.path.join(impostor_dir, f)
-        feat = extract_features(path)
-        if feat is not None:
-            X.append(feat)
-            y.append(1)
-
-    # NEGATIVE CLASS: spoof
-    spoof_dir = os.path.join(base, "spoof")
-    for f in os.listdir(spoof_dir):
-        path = os.path.join(spoof_dir, f)
-        feat = extract_features(path)
-        if feat is not None:
-            X.append(feat)
-            y.append(0)
-
-    return np.array(X), np.array(y)
+    signals, y = [], []
+
+    # POSITIVE CLASS: genuine user, impostor (human lain) → 1, spoof → 0
+    for folder, label in (("genuine", 1), ("impostor", 1), ("spoof", 0)):
+        directory = os.path.join(base, folder)
+        for f in os.listdir(directory):
+            sig = load_signal(os.path.join(directory, f))
+            if sig is not None:
+                signals.append(sig)
+                y.append(label)
+
+    # Semua clip sekaligus: STFT batched per bucket panjang
+    return extract_features_batch(signals, SR), np.array(y)
 
 
 # Train lightweight ASVspoof detector
-def train():
+def train(base="dataset", export=SPOOF_MODEL_PATH) -> SpoofModel:
     print("🔄 Loading dataset...")
-    X, y = load_dataset()
-
+    X, y = load_dataset(base)
+    model = fit_spoof_model(X, y)
+    if export:
+        save_spoof_model(model, export)
+        print(f"\n📦 Spoof model {model.version} exported to {export}")
+    return model
+
+
+def fit_spoof_model(X, y) -> SpoofModel:
+    """
+    Fit the scaler + logistic regression on a feature matrix
+    ([N, 3], label 1 = bona fide, 0 = spoof) and return it as a
+    versioned SpoofModel (see core/asvspoof.py).
+    """
     print(f"Total samples : {len(X)}")
     print(f"Genuine  (1)  : {np.sum(y==1)}")
     print(f"Negative (0)  : {np.sum(y==0)}")
@@ -123,19 +109,37 @@ def train():
     ypred = pipe.predict(Xte)
     print(confusion_matrix(yte, ypred))
     print(classification_report(yte, ypred, digits=4))
+    report = classification_report(yte, ypred, digits=4, output_dict=True)
 
-    # Extract model parameters for inference implementation
     scaler = pipe.named_steps["scaler"]
     clf    = pipe.named_steps["clf"]
 
-    print("\n📌 COPY KE asvspoof.py:")
-    print("-" * 60)
-    print("MODEL_MEANS  =", list(scaler.mean_))
-    print("MODEL_SCALES =", list(scaler.scale_))
-    print("MODEL_COEFFS =", list(clf.coef_[0]))
-    print("MODEL_BIAS   =", float(clf.intercept_[0]))
-    print("-" * 60)
+    model = new_spoof_model(
+        means=scaler.mean_,
+        scales=scaler.scale_,
+        coeffs=clf.coef_[0],
+        bias=clf.intercept_[0],
+        metrics={
+            "n_train": int(len(Xtr)),
+            "n_test": int(len(Xte)),
+            "accuracy": float(report["accuracy"]),
+            "confusion_matrix": confusion_matrix(yte, ypred).tolist(),
+        },
+    )
+    print(f"\n📌 Spoof model {model.version}: means={model.means.tolist()} "
+          f"scales={model.scales.tolist()} coeffs={model.coeffs.tolist()} bias={model.bias}")
+    return model
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Train the lightweight ASVspoof model")
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--export", default=SPOOF_MODEL_PATH,
+                        help="Artifact path loaded by the server (SPOOF_MODEL_PATH)")
+    args = parser.parse_args(argv)
+    train(args.dataset, args.export)
+    return 0
 
 
 if __name__ == "__main__":
-    train()
+    sys.exit(main())
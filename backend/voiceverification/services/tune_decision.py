@@ -0,0 +1,145 @@
+"""Tune DecisionConfig thresholds against historical verification logs.
+
+Loads the log once, then either searches the threshold space or drops
+into an interactive prompt where each change is re-evaluated instantly.
+
+Usage:
+  # grid search, minimize expected retries while keeping >= 20% VERIFIED
+  python -m services.tune_decision --log dataset/verify_log.csv \\
+      --method grid --objective expected_retries --min-verified 0.2 --top 10
+
+  # coordinate search (one parameter at a time, for large grids)
+  python -m services.tune_decision --method coordinate --steps 41
+
+  # interactive: "voice_accept=0.5 replay_warn=0.55", "reset", "quit"
+  python -m services.tune_decision --interactive
+
+``--log`` may also point at the structured decision log directory
+(DECISION_LOG_DIR, see utils/decision_log.py).
+"""
+
+import argparse
+import os
+import sys
+from dataclasses import asdict, replace
+
+import numpy as np
+
+from core.decision_engine import DECISION_CODES, DecisionConfig
+from core.policy_sim import SEARCH_PARAMS, PolicySimulator, load_verify_log
+from utils.decision_log import DecisionLogReader
+
+OBJECTIVES = ("expected_retries", "repeat_rate", "denied_rate", "verified_rate")
+
+
+def load_log(path: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """verify_log.csv, or a decision log directory (speaker / replay / decision)."""
+    if not os.path.isdir(path):
+        return load_verify_log(path)
+
+    cols = DecisionLogReader(path).read(["speaker_score", "replay_prob", "decision"])
+    ok = np.isfinite(cols["speaker_score"]) & np.isfinite(cols["replay_prob"])
+    names = np.array([d.value for d in DECISION_CODES] + [""])
+    # kode -1 (tidak dikenal) → indeks terakhir = ""
+    return cols["speaker_score"][ok], cols["replay_prob"][ok], names[cols["decision"][ok]]
+
+
+def _fmt_stats(stats: dict) -> str:
+    return (
+        f"VERIFIED={stats['verified_rate'] * 100:5.1f}% "
+        f"REPEAT={stats['repeat_rate'] * 100:5.1f}% "
+        f"DENIED={stats['denied_rate'] * 100:5.1f}% "
+        f"E[retries]={stats['expected_retries']:.3f}"
+    )
+
+
+def _fmt_config(config: DecisionConfig) -> str:
+    return " ".join(f"{p}={getattr(config, p):.3f}" for p in SEARCH_PARAMS)
+
+
+def interactive(sim: PolicySimulator):
+    config = DecisionConfig()
+    print("Ketik 'param=value ...', 'reset' atau 'quit'.")
+    while True:
+        print(f"[TUNE] {_fmt_config(config)}")
+        print(f"[TUNE] {_fmt_stats(asdict(sim.evaluate(config)))}")
+        try:
+            line = input("> ").strip()
+        except EOFError:
+            break
+        if line in ("quit", "exit", "q"):
+            break
+        if line == "reset":
+            config = DecisionConfig()
+            continue
+        try:
+            updates = {}
+            for part in line.split():
+                name, value = part.split("=", 1)
+                if name not in SEARCH_PARAMS:
+                    raise ValueError(f"unknown parameter {name}")
+                updates[name] = float(value)
+            config = replace(config, **updates)
+        except ValueError as e:
+            print(f"[TUNE] {e}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tune DecisionConfig on verify logs")
+    parser.add_argument("--log", default="dataset/verify_log.csv")
+    parser.add_argument("--method", choices=("grid", "coordinate"), default="grid")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="expected_retries")
+    parser.add_argument("--min-verified", type=float, default=None)
+    parser.add_argument("--max-verified", type=float, default=None)
+    parser.add_argument("--max-denied", type=float, default=None)
+    parser.add_argument("--max-expected-retries", type=float, default=None)
+    parser.add_argument("--max-retries", type=int, default=None,
+                        help="Cap on retries per user when computing expected retries")
+    parser.add_argument("--low", type=float, default=0.1)
+    parser.add_argument("--high", type=float, default=0.9)
+    parser.add_argument("--steps", type=int, default=17)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--interactive", action="store_true")
+    args = parser.parse_args(argv)
+
+    speaker, replay, logged = load_log(args.log)
+    sim = PolicySimulator(speaker, replay, max_retries=args.max_retries)
+    print(f"[TUNE] {sim.n} trials from {args.log}")
+
+    if logged.size:
+        print("[TUNE] logged   : " + " ".join(
+            f"{d}={np.mean(logged == d) * 100:.1f}%" for d in ("VERIFIED", "REPEAT", "DENIED")
+        ))
+    print(f"[TUNE] current  : {_fmt_stats(asdict(sim.evaluate()))}")
+
+    if args.interactive:
+        interactive(sim)
+        return 0
+
+    values = list(np.round(np.linspace(args.low, args.high, args.steps), 4))
+    grid = {p: values for p in SEARCH_PARAMS}
+    limits = {
+        "min_verified": args.min_verified,
+        "max_verified": args.max_verified,
+        "max_denied": args.max_denied,
+        "max_expected_retries": args.max_expected_retries,
+    }
+
+    if args.method == "grid":
+        results = sim.grid_search(grid, objective=args.objective, top=args.top, **limits)
+    else:
+        best = sim.coordinate_search(grid, objective=args.objective, **limits)
+        results = [best] if best else []
+
+    if not results:
+        print("[TUNE] no config satisfies the constraints")
+        return 1
+
+    for rank, res in enumerate(results, 1):
+        print(f"[TUNE] #{rank:<2d} {_fmt_stats(res)}")
+        print(f"[TUNE]     {_fmt_config(res['config'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
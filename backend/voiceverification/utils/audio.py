@@ -1,29 +1,150 @@
 import os
 import shutil
 import uuid
-import librosa
-import soundfile as sf
+from math import gcd
 
+import numpy as np
 from fastapi import UploadFile
 from utils.ffmpeg import webm_to_wav
+from utils.metrics import stage_timer, timed
 
 UPLOAD_DIR = "tmp_audio"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+TARGET_SR = 16000
+# Batas durasi audio per upload, diterapkan saat decode (ffmpeg -t / PCM
+# dibaca sebagian), jadi semua tahap setelahnya — normalize, spoof,
+# fingerprint, behavior, embedding — hanya melihat clip yang sudah dibatasi.
+UPLOAD_MAX_AUDIO_S = float(os.getenv("UPLOAD_MAX_AUDIO_S", "30"))
+
+# Raw PCM (little-endian, mono) yang diterima tanpa ffmpeg
+PCM_DTYPES = {
+    "s16le": np.dtype("<i2"),
+    "f32le": np.dtype("<f4"),
+}
+PCM_HEADER_FORMATS = {"pcm_s16le": "s16le", "pcm_f32le": "f32le"}
+PCM_MIN_RATE = 8000
+PCM_MAX_RATE = 96000
+
 def save_audio(audio: UploadFile) -> str:
     # ⚠️ Jangan percaya filename
     raw_ext = ".webm"
     raw_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}{raw_ext}")
     wav_path = raw_path.replace(".webm", ".wav")
 
-    with open(raw_path, "wb") as buffer:
+    with stage_timer("upload_read"), open(raw_path, "wb") as buffer:
         shutil.copyfileobj(audio.file, buffer)
 
-    webm_to_wav(raw_path, wav_path)
+    with stage_timer("ffmpeg_decode"):
+        webm_to_wav(raw_path, wav_path, max_seconds=UPLOAD_MAX_AUDIO_S)
     os.remove(raw_path)
 
     return wav_path
 
+def parse_pcm_format(headers, content_type: str | None) -> tuple[str, int] | None:
+    """
+    Detect a raw PCM upload. Returns (format, sample_rate) or None for
+    container formats (webm, wav, ...) that still go through ffmpeg.
+
+    Declared either with request headers:
+        X-Audio-Format: pcm_s16le | pcm_f32le
+        X-Audio-Sample-Rate: 16000        (optional, default 16000)
+    or with the multipart part content type:
+        audio/pcm; format=s16le; rate=16000
+    """
+    fmt, rate = None, None
+
+    header_fmt = (headers.get("x-audio-format") or "").strip().lower()
+    if header_fmt:
+        if header_fmt not in PCM_HEADER_FORMATS:
+            raise ValueError(f"Unsupported X-Audio-Format: {header_fmt}")
+        fmt = PCM_HEADER_FORMATS[header_fmt]
+        rate = headers.get("x-audio-sample-rate")
+
+    elif content_type and content_type.split(";")[0].strip().lower() == "audio/pcm":
+        params = dict(
+            p.strip().lower().split("=", 1)
+            for p in content_type.split(";")[1:]
+            if "=" in p
+        )
+        fmt = params.get("format", "s16le")
+        if fmt not in PCM_DTYPES:
+            raise ValueError(f"Unsupported PCM format: {fmt}")
+        rate = params.get("rate")
+
+    if fmt is None:
+        return None
+
+    try:
+        rate = int(rate) if rate else TARGET_SR
+    except ValueError:
+        raise ValueError(f"Invalid sample rate: {rate}")
+    if not PCM_MIN_RATE <= rate <= PCM_MAX_RATE:
+        raise ValueError(f"Sample rate out of range: {rate}")
+
+    return fmt, rate
+
+
+def decode_pcm(data: bytes, fmt: str) -> np.ndarray:
+    dtype = PCM_DTYPES[fmt]
+    usable = len(data) - len(data) % dtype.itemsize
+    y = np.frombuffer(data[:usable], dtype=dtype)
+
+    if dtype.kind == "i":
+        return y.astype(np.float32) / 32768.0
+    return np.nan_to_num(y.astype(np.float32), nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def resample_to_target(y: np.ndarray, sr: int) -> np.ndarray:
+    """In-process polyphase resampling to 16 kHz."""
+    if sr == TARGET_SR:
+        return y
+    from scipy.signal import resample_poly
+
+    g = gcd(sr, TARGET_SR)
+    return resample_poly(y, TARGET_SR // g, sr // g).astype(np.float32)
+
+
+def save_pcm(audio: UploadFile, fmt: str, sr: int) -> str:
+    """Raw PCM fast-path: bytes → NumPy → 16 kHz wav, no subprocess."""
+    import soundfile as sf
+
+    # Baca hanya sampel sampai UPLOAD_MAX_AUDIO_S; sisa body tidak di-load ke memory
+    max_bytes = int(UPLOAD_MAX_AUDIO_S * sr) * PCM_DTYPES[fmt].itemsize if UPLOAD_MAX_AUDIO_S > 0 else -1
+    with stage_timer("upload_read"):
+        data = audio.file.read(max_bytes)
+
+    with stage_timer("pcm_decode"):
+        y = resample_to_target(decode_pcm(data, fmt), sr)
+
+    if y.size == 0:
+        raise ValueError("Empty audio")
+
+    wav_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}.wav")
+    sf.write(wav_path, y, TARGET_SR)
+    return wav_path
+
+
+def save_upload(audio: UploadFile, pcm_format: tuple[str, int] | None) -> str:
+    """
+    Store an upload as a 16 kHz mono wav ready for the pipeline.
+
+    PCM uploads skip ffmpeg and normalize; everything else is decoded with
+    ffmpeg and normalized as before.
+    """
+    if pcm_format is not None:
+        return save_pcm(audio, *pcm_format)
+
+    wav_path = save_audio(audio)
+    normalize_audio(wav_path)
+    return wav_path
+
+
+@timed("normalize")
 def normalize_audio(path):
-    y, sr = librosa.load(path, sr=16000, mono=True)
+    import librosa
+    import soundfile as sf
+
+    duration = UPLOAD_MAX_AUDIO_S if UPLOAD_MAX_AUDIO_S > 0 else None
+    y, sr = librosa.load(path, sr=16000, mono=True, duration=duration)
     sf.write(path, y, 16000)
\ No newline at end of file
@@ -0,0 +1,300 @@
+"""Append-only, size-rotated columnar log of verification decisions.
+
+Layout under DECISION_LOG_DIR::
+
+    <segment>/schema.json       column names + numpy dtypes
+    <segment>/<column>.bin      raw little-endian values, one file per column
+
+A segment is a directory named ``<unix_ms>-<rand>``, so name order is time
+order. The writer rotates to a new segment once it reaches
+DECISION_LOG_SEGMENT_MB and keeps only the newest DECISION_LOG_MAX_SEGMENTS.
+Every process start opens a fresh segment.
+
+``log()`` only puts the record on a bounded queue; a daemon thread batches
+records and appends them column by column, so the request path never waits
+on disk. When the queue is full the record is dropped and counted in
+``voiceverification_decision_log_dropped_total``.
+
+``DecisionLogReader`` memory-maps the column files; a segment cut off
+mid-batch (crash between column writes) is read up to its shortest column.
+"""
+
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from core.decision_engine import DECISION_CODES
+from utils.metrics import Counter, Gauge, register
+
+DECISION_LOG_ENABLED = os.getenv("DECISION_LOG_ENABLED", "1") == "1"
+DECISION_LOG_DIR = os.getenv("DECISION_LOG_DIR", "decision_logs")
+DECISION_LOG_SEGMENT_MB = float(os.getenv("DECISION_LOG_SEGMENT_MB", "64"))
+DECISION_LOG_MAX_SEGMENTS = int(os.getenv("DECISION_LOG_MAX_SEGMENTS", "20"))
+DECISION_LOG_FLUSH_S = float(os.getenv("DECISION_LOG_FLUSH_S", "1.0"))
+DECISION_LOG_BATCH = int(os.getenv("DECISION_LOG_BATCH", "256"))
+DECISION_LOG_QUEUE = int(os.getenv("DECISION_LOG_QUEUE", "10000"))
+
+SCHEMA_NAME = "schema.json"
+STRING_BYTES = 64
+
+LOGGED_STAGES = (
+    "auth",
+    "db_load_all_embeddings",
+    "db_load_behavior_profile",
+    "queue_wait",
+    "upload_read",
+    "ffmpeg_decode",
+    "pcm_decode",
+    "normalize",
+    "embedding",
+    "spoof",
+    "fingerprint",
+    "fingerprint_store",
+    "pitch_behavior",
+)
+
+SCHEMA: list[tuple[str, str]] = [
+    ("ts", "<f8"),
+    ("user_id", f"S{STRING_BYTES}"),
+    ("label", f"S{STRING_BYTES}"),
+    ("decision", "i1"),  # indeks ke DECISION_CODES, -1 = tidak dikenal
+    ("speaker_score", "<f8"),
+    ("n_enrollments", "<i2"),
+    ("spoof_prob", "<f8"),
+    ("replay_prob", "<f8"),
+    ("replay_votes", "<i4"),
+    ("behavior_score", "<f8"),
+    ("pitch", "<f8"),
+    ("rate", "<f8"),
+    ("flatness", "<f8"),
+    ("temporal_var", "<f8"),
+    ("highband", "<f8"),
+    ("total_s", "<f8"),
+] + [(f"stage_{s}", "<f8") for s in LOGGED_STAGES]
+
+_DECISION_INDEX = {d.value: i for i, d in enumerate(DECISION_CODES)}
+
+DECISION_LOG_DROPPED = register(Counter(
+    "voiceverification_decision_log_dropped_total",
+    "Decision log records dropped because the writer queue was full.",
+))
+
+
+def _missing(dtype: np.dtype):
+    if dtype.kind == "f":
+        return np.nan
+    if dtype.kind in "iu":
+        return -1
+    return b""
+
+
+def _value(record: dict, name: str):
+    if name.startswith("stage_"):
+        return (record.get("stages") or {}).get(name[len("stage_"):])
+    if name == "decision":
+        return _DECISION_INDEX.get(record.get("decision"), -1)
+    value = record.get(name)
+    if isinstance(value, str):
+        return value.encode()[:STRING_BYTES]
+    return value
+
+
+def records_to_columns(records: list[dict]) -> dict[str, np.ndarray]:
+    columns = {}
+    for name, dtype in SCHEMA:
+        dt = np.dtype(dtype)
+        miss = _missing(dt)
+        values = [_value(r, name) for r in records]
+        columns[name] = np.array([miss if v is None else v for v in values], dtype=dt)
+    return columns
+
+
+class DecisionLogWriter:
+    def __init__(
+        self,
+        directory: str = DECISION_LOG_DIR,
+        segment_bytes: int = int(DECISION_LOG_SEGMENT_MB * 1024 * 1024),
+        max_segments: int = DECISION_LOG_MAX_SEGMENTS,
+        flush_interval: float = DECISION_LOG_FLUSH_S,
+        batch_size: int = DECISION_LOG_BATCH,
+        queue_size: int = DECISION_LOG_QUEUE,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._segment: str | None = None
+        self._segment_size = 0
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    # ---- request path ----
+    def log(self, record: dict) -> bool:
+        """Queue one record; never blocks. False if it had to be dropped."""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            DECISION_LOG_DROPPED.inc()
+            return False
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self, timeout: float = 5.0):
+        """Block until everything queued so far is on disk."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    # ---- writer thread ----
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="decision-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        batch: list[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(deadline - time.monotonic(), 0.0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ...
+
+            if isinstance(item, dict):
+                batch.append(item)
+                if len(batch) < self.batch_size:
+                    continue
+
+            # flush: batch penuh, timer habis, flush() atau close()
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError as e:
+                    print(f"⚠️ Decision log write failed: {e}")
+                batch = []
+            deadline = time.monotonic() + self.flush_interval
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                return
+
+    def _rotate(self):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:6]}"
+        path = os.path.join(self.directory, name)
+        os.makedirs(path)
+        with open(os.path.join(path, SCHEMA_NAME), "w") as f:
+            json.dump({"columns": SCHEMA}, f)
+        self._segment, self._segment_size = path, 0
+
+        segments = list_segments(self.directory)
+        for old in segments[: max(len(segments) - self.max_segments, 0)]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def _write(self, records: list[dict]):
+        if self._segment is None or self._segment_size >= self.segment_bytes:
+            self._rotate()
+
+        for name, arr in records_to_columns(records).items():
+            with open(os.path.join(self._segment, f"{name}.bin"), "ab") as f:
+                arr.tofile(f)
+            self._segment_size += arr.nbytes
+
+
+def list_segments(directory: str) -> list[str]:
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if os.path.exists(os.path.join(directory, name, SCHEMA_NAME))
+    ]
+
+
+class DecisionLogReader:
+    def __init__(self, directory: str = DECISION_LOG_DIR):
+        self.directory = directory
+
+    def _open_segment(self, segment: str, names: list[str] | None) -> dict[str, np.ndarray] | None:
+        with open(os.path.join(segment, SCHEMA_NAME)) as f:
+            schema = [(n, np.dtype(d)) for n, d in json.load(f)["columns"]]
+
+        def rows(name, dtype):
+            path = os.path.join(segment, f"{name}.bin")
+            return os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+
+        n = min(rows(name, dtype) for name, dtype in schema)
+        if n == 0:
+            return None
+
+        wanted = [(name, dtype) for name, dtype in schema if names is None or name in names]
+        return {
+            name: np.memmap(os.path.join(segment, f"{name}.bin"), dtype=dtype, mode="r", shape=(n,))
+            for name, dtype in wanted
+        }
+
+    def iter_segments(self, columns: list[str] | None = None):
+        """Yield {column: memmap} per segment, oldest first (no copies)."""
+        for segment in list_segments(self.directory):
+            cols = self._open_segment(segment, columns)
+            if cols is not None:
+                yield cols
+
+    def read(self, columns: list[str] | None = None, since: float | None = None) -> dict[str, np.ndarray]:
+        """Concatenate columns over all segments, optionally only rows with ts >= since."""
+        names = None if columns is None else list(dict.fromkeys(list(columns) + ["ts"]))
+        parts: dict[str, list[np.ndarray]] = {}
+        for cols in self.iter_segments(names):
+            mask = None if since is None else cols["ts"] >= since
+            for name, arr in cols.items():
+                parts.setdefault(name, []).append(arr[mask] if mask is not None else np.asarray(arr))
+
+        wanted = columns or [name for name, _ in SCHEMA]
+        return {
+            name: np.concatenate(parts[name]) if name in parts else np.empty(0, dtype=dict(SCHEMA)[name])
+            for name in wanted
+        }
+
+
+_writer: DecisionLogWriter | None = None
+
+
+def get_decision_log() -> DecisionLogWriter:
+    global _writer
+    if _writer is None:
+        _writer = DecisionLogWriter()
+    return _writer
+
+
+register(Gauge(
+    "voiceverification_decision_log_queue_depth",
+    "Decision log records waiting for the writer thread.",
+    fn=lambda: _writer.queue_depth() if _writer is not None else 0,
+))
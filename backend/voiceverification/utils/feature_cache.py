@@ -0,0 +1,180 @@
+"""Content-addressed cache for embeddings and spoof features.
+
+Retries from the frontend / agent often upload the same audio again, and
+calibration scripts embed the same enrollment file over and over. Results
+are cached under ``feature_key(pcm, namespace, version)``: a hash of the
+*decoded* float32 PCM (so a re-encoded container with identical samples
+still hits) plus the producer name and its model version.
+
+Two tiers:
+- memory: LRU bounded by FEATURE_CACHE_MAX_MB
+- disk (optional, FEATURE_CACHE_DIR): one ``.npy`` per key, read back with
+  ``np.load(mmap_mode="r")`` and promoted to memory; bounded by
+  FEATURE_CACHE_DISK_MAX_FILES
+
+Cached arrays are returned read-only.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from utils.metrics import Counter, register
+
+FEATURE_CACHE_MAX_MB = float(os.getenv("FEATURE_CACHE_MAX_MB", "64"))
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR")
+FEATURE_CACHE_DISK_MAX_FILES = int(os.getenv("FEATURE_CACHE_DISK_MAX_FILES", "100000"))
+_DISK_PRUNE_EVERY = 256
+
+FEATURE_CACHE_TOTAL = register(Counter(
+    "voiceverification_feature_cache_total",
+    "Feature cache lookups by namespace and result (memory_hit, disk_hit, miss).",
+    labelnames=("namespace", "result"),
+))
+
+
+def feature_key(pcm: np.ndarray, namespace: str, version: str) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{namespace}\0{version}\0".encode())
+    h.update(np.ascontiguousarray(pcm, dtype=np.float32).tobytes())
+    return h.hexdigest()
+
+
+class FeatureCache:
+    def __init__(self, max_bytes: int = int(FEATURE_CACHE_MAX_MB * 1024 * 1024),
+                 disk_dir: str | None = FEATURE_CACHE_DIR,
+                 disk_max_files: int = FEATURE_CACHE_DISK_MAX_FILES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_files = disk_max_files
+        self._mem: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._mem_bytes = 0
+        self._disk_writes = 0
+        self._lock = threading.Lock()
+
+    # ---- memory tier ----
+    def _mem_get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            value = self._mem.get(key)
+            if value is not None:
+                self._mem.move_to_end(key)
+            return value
+
+    def _mem_put(self, key: str, value: np.ndarray):
+        if value.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._mem_bytes -= old.nbytes
+            self._mem[key] = value
+            self._mem_bytes += value.nbytes
+            while self._mem_bytes > self.max_bytes:
+                _, evicted = self._mem.popitem(last=False)
+                self._mem_bytes -= evicted.nbytes
+
+    # ---- disk tier ----
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.npy")
+
+    def _disk_get(self, key: str) -> np.ndarray | None:
+        if not self.disk_dir:
+            return None
+        try:
+            return np.load(self._disk_path(key), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key: str, value: np.ndarray):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # tulis ke file sementara lalu rename → pembaca tidak pernah lihat file setengah jadi
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, value)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % _DISK_PRUNE_EVERY == 0
+        if prune:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith(".npy"):
+                    path = os.path.join(root, name)
+                    try:
+                        files.append((os.path.getmtime(path), path))
+                    except OSError:
+                        continue
+        excess = len(files) - self.disk_max_files
+        if excess <= 0:
+            return
+        for _, path in sorted(files)[:excess]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # ---- public ----
+    def get(self, key: str, namespace: str = "default") -> np.ndarray | None:
+        value = self._mem_get(key)
+        if value is not None:
+            FEATURE_CACHE_TOTAL.inc(namespace=namespace, result="memory_hit")
+            return value
+
+        mapped = self._disk_get(key)
+        if mapped is not None:
+            value = np.array(mapped)
+            value.setflags(write=False)
+            self._mem_put(key, value)
+            FEATURE_CACHE_TOTAL.inc(namespace=namespace, result="disk_hit")
+            return value
+
+        FEATURE_CACHE_TOTAL.inc(namespace=namespace, result="miss")
+        return None
+
+    def put(self, key: str, value: np.ndarray) -> np.ndarray:
+        value = np.array(value, copy=True)
+        value.setflags(write=False)
+        self._mem_put(key, value)
+        self._disk_put(key, value)
+        return value
+
+    def get_or_compute(self, pcm: np.ndarray, namespace: str, version: str,
+                       compute: Callable[[], np.ndarray]) -> np.ndarray:
+        key = feature_key(pcm, namespace, version)
+        value = self.get(key, namespace)
+        if value is None:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            self._mem_bytes = 0
+
+
+_cache: FeatureCache | None = None
+
+
+def get_feature_cache() -> FeatureCache:
+    global _cache
+    if _cache is None:
+        _cache = FeatureCache()
+    return _cache
@@ -0,0 +1,182 @@
+"""Persistent per-file feature matrices for calibration runs.
+
+A store is a directory holding, per feature (``embedding``,
+``spoof_features``, ...), one raw row-major ``<name>.bin`` file, plus
+``keys.txt`` (one row key per line: sha256 of the file bytes) and
+``meta.json`` with the store version, the row count and each feature's
+dtype / row shape.
+
+Appending only writes the new rows to the end of every file and then
+rewrites the small ``meta.json``, so a calibration run costs O(N) I/O in
+total. Matrices are opened with ``np.memmap`` over exactly ``n_rows`` rows,
+so a calibration over thousands of clips reads only the rows it needs and
+never re-decodes audio that is already stored. Rows written by a run that
+died before updating ``meta.json`` are ignored and truncated on the next
+append.
+
+The version string captures the models / feature code that produced the
+rows; opening a store with a different version starts it from scratch.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+META_NAME = "meta.json"
+KEYS_NAME = "keys.txt"
+STORE_FORMAT = 2  # 1 = satu .npy per fitur yang ditulis ulang tiap append
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FeatureStore:
+    def __init__(self, directory: str, version: str):
+        self.directory = directory
+        self.version = version
+        self.keys: list[str] = []
+        # nama fitur → {"dtype": str, "shape": [dimensi per baris]}
+        self.layout: dict[str, dict] = {}
+        os.makedirs(directory, exist_ok=True)
+
+        meta_path = os.path.join(directory, META_NAME)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get("version") == version and meta.get("format") == STORE_FORMAT:
+                self.layout = meta["features"]
+                self.keys = self._read_keys(meta["n_rows"])
+            else:
+                print(f"[FEATURE STORE] version / format changed ({meta.get('version')} → {version}), rebuilding")
+
+        self._rows = {k: i for i, k in enumerate(self.keys)}
+        # file di disk mungkin berisi sisa run lama / run yang terputus
+        self._needs_truncate = True
+
+    @property
+    def features(self) -> list[str]:
+        return sorted(self.layout)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _bin_path(self, name: str) -> str:
+        return self._path(f"{name}.bin")
+
+    def _read_keys(self, n_rows: int) -> list[str]:
+        keys = []
+        try:
+            with open(self._path(KEYS_NAME)) as f:
+                for line in f:
+                    if len(keys) == n_rows:
+                        break
+                    keys.append(line.rstrip("\n"))
+        except FileNotFoundError:
+            pass
+        if len(keys) != n_rows:
+            raise ValueError(f"{KEYS_NAME} has {len(keys)} keys, meta expects {n_rows}")
+        return keys
+
+    def _row_bytes(self, name: str) -> int:
+        spec = self.layout[name]
+        return int(np.prod(spec["shape"], dtype=np.int64)) * np.dtype(spec["dtype"]).itemsize
+
+    def matrix(self, name: str) -> np.ndarray:
+        """Whole feature matrix, memory-mapped read-only."""
+        spec = self.layout[name]
+        shape = (len(self.keys), *spec["shape"])
+        if not self.keys:
+            return np.empty(shape, dtype=spec["dtype"])
+        return np.memmap(self._bin_path(name), dtype=spec["dtype"], mode="r", shape=shape)
+
+    def rows(self, keys: list[str]) -> np.ndarray:
+        return np.array([self._rows[k] for k in keys], dtype=np.int64)
+
+    def take(self, name: str, keys: list[str]) -> np.ndarray:
+        """Rows for ``keys`` (in that order) copied out of the mapped matrix."""
+        return np.asarray(self.matrix(name)[self.rows(keys)])
+
+    def _truncate(self):
+        """Cut every file back to the rows recorded in meta.json."""
+        for name in self.layout:
+            path = self._bin_path(name)
+            size = len(self.keys) * self._row_bytes(name)
+            if os.path.exists(path):
+                if os.path.getsize(path) != size:
+                    os.truncate(path, size)
+            else:
+                open(path, "wb").close()
+
+        keys_path = self._path(KEYS_NAME)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.writelines(f"{k}\n" for k in self.keys)
+        os.replace(tmp, keys_path)
+        self._needs_truncate = False
+
+    def append(self, records: list[tuple[str, dict[str, np.ndarray]]]):
+        """Add ``(key, {feature: vector})`` rows; keys already stored are skipped."""
+        records = [(k, f) for k, f in records if k not in self._rows]
+        if not records:
+            return
+
+        names = sorted(records[0][1])
+        if self.layout and names != self.features:
+            raise ValueError(f"Feature set mismatch: {names} vs {self.features}")
+
+        blocks = {}
+        for name in names:
+            new = np.stack([np.asarray(f[name]) for _, f in records])
+            if name in self.layout:
+                spec = self.layout[name]
+                if list(new.shape[1:]) != spec["shape"]:
+                    raise ValueError(f"{name}: row shape {new.shape[1:]} vs {tuple(spec['shape'])}")
+                new = new.astype(spec["dtype"], copy=False)
+            blocks[name] = np.ascontiguousarray(new)
+
+        if not self.layout:
+            self.layout = {
+                name: {"dtype": block.dtype.str, "shape": list(block.shape[1:])}
+                for name, block in blocks.items()
+            }
+        if self._needs_truncate:
+            self._truncate()
+
+        for name, block in blocks.items():
+            with open(self._bin_path(name), "ab") as f:
+                f.write(block.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        with open(self._path(KEYS_NAME), "a") as f:
+            f.writelines(f"{k}\n" for k, _ in records)
+            f.flush()
+            os.fsync(f.fileno())
+
+        for k, _ in records:
+            self._rows[k] = len(self.keys)
+            self.keys.append(k)
+
+        # meta ditulis terakhir: hanya n_rows baris pertama yang dianggap valid
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({
+                "format": STORE_FORMAT,
+                "version": self.version,
+                "n_rows": len(self.keys),
+                "features": self.layout,
+            }, f)
+        os.replace(tmp, self._path(META_NAME))
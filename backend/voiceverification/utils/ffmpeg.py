@@ -5,13 +5,16 @@ def ensure_ffmpeg():
     if os.system("which ffmpeg > /dev/null") != 0:
         raise RuntimeError("ffmpeg not installed")
 
-def webm_to_wav(src: str, dst: str):
+def webm_to_wav(src: str, dst: str, max_seconds: float | None = None):
     ensure_ffmpeg()
 
+    # -t: berhenti decode setelah max_seconds, sisa upload tidak pernah di-decode
+    limit = ["-t", f"{max_seconds:g}"] if max_seconds else []
     subprocess.run(
         [
             "ffmpeg", "-y",
             "-i", src,
+            *limit,
             "-ar", "16000",   # sample rate
             "-ac", "1",       # mono
             "-f", "wav",
@@ -0,0 +1,218 @@
+"""Minimal in-process metrics with Prometheus text exposition.
+
+Counters, gauges and histograms are kept in memory and rendered by the
+``/metrics`` endpoint. Pipeline stages are timed with ``stage_timer`` /
+``timed`` into a single histogram labelled by stage name, so a latency
+regression can be pinned to ffmpeg, the model or Supabase.
+"""
+
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _fmt_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, doc, labelnames=()):
+        super().__init__(name, doc, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_fmt_labels(self.labelnames, k)} {v}" for k, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """Gauge that is either set directly or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, doc, fn: Callable[[], float] | None = None, labelnames=()):
+        super().__init__(name, doc, labelnames)
+        self._fn = fn
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def render(self) -> list[str]:
+        if self._fn is not None:
+            return self.header() + [f"{self.name} {float(self._fn())}"]
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_fmt_labels(self.labelnames, k)} {v}" for k, v in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, doc, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(buckets)
+        # key -> (bucket counts, sum, count)
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = [[0] * len(self.buckets), 0.0, 0]
+                self._values[key] = entry
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            for b, c in zip(self.buckets, counts):
+                le = _fmt_labels(self.labelnames, key, f'le="{b}"')
+                lines.append(f"{self.name}_bucket{le} {c}")
+            inf = _fmt_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {count}")
+            lbl = _fmt_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{lbl} {total}")
+            lines.append(f"{self.name}_count{lbl} {count}")
+        return lines
+
+
+_registry: list[_Metric] = []
+
+
+def register(metric: _Metric) -> _Metric:
+    _registry.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ================= PIPELINE METRICS =================
+STAGE_SECONDS = register(Histogram(
+    "voiceverification_stage_seconds",
+    "Latency of each verification pipeline stage in seconds.",
+    labelnames=("stage",),
+))
+
+DECISIONS_TOTAL = register(Counter(
+    "voiceverification_decisions_total",
+    "Verification decisions by outcome.",
+    labelnames=("decision",),
+))
+
+WARMUP_SECONDS = register(Gauge(
+    "voiceverification_warmup_seconds",
+    "Latency of each startup warm-up run through the verify path.",
+    labelnames=("clip",),
+))
+
+
+# Per-request stage timings (dipakai profiler untuk memberi tag pada profile).
+# asyncio.to_thread menyalin context, jadi stage di worker thread ikut tercatat.
+_request_stages: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "request_stages", default=None
+)
+
+
+@contextmanager
+def collect_stages():
+    """
+    Collect stage timings of the current request into a dict.
+
+    Nested collectors are allowed; on exit the inner timings are added to
+    the outer one as well.
+    """
+    outer = _request_stages.get()
+    stages: dict[str, float] = {}
+    token = _request_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _request_stages.reset(token)
+        if outer is not None:
+            for name, value in stages.items():
+                outer[name] = outer.get(name, 0.0) + value
+
+
+def current_stages() -> dict[str, float] | None:
+    """Stage timings collected so far for the current request, if any."""
+    return _request_stages.get()
+
+
+@contextmanager
+def stage_timer(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+
+        stages = _request_stages.get()
+        if stages is not None:
+            stages[stage] = stages.get(stage, 0.0) + elapsed
+
+
+def timed(stage: str):
+    """Decorator version of ``stage_timer`` for plain functions."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
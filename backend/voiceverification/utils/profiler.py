@@ -0,0 +1,189 @@
+"""Opt-in sampling profiler for slow requests.
+
+A daemon thread samples the Python stacks of every thread with
+``sys._current_frames()`` while at least one profiled request is in
+flight. Stacks are aggregated in collapsed ("folded") form, which
+flamegraph.pl and speedscope read directly.
+
+Enabled through env:
+- PROFILE_SAMPLE_EVERY_N: keep a profile for 1 in N requests (0 = off)
+- PROFILE_SLOW_MS: keep a profile for every request slower than this (0 = off)
+
+Stored profiles are served by ``/debug/profiles`` only when
+PROFILE_ADMIN_TOKEN is set, and only to requests that send it in the
+``X-Admin-Token`` header; the stacks expose code paths and file names.
+
+Profiles are written as JSON to PROFILE_DIR, keeping only the newest
+PROFILE_MAX_FILES files. Because sampling covers all threads, concurrent
+requests show up in each other's profiles; the stage timings stored with
+each profile belong to the profiled request only.
+"""
+
+import hmac
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+PROFILE_SAMPLE_EVERY_N = int(os.getenv("PROFILE_SAMPLE_EVERY_N", "0"))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000.0
+PROFILE_DIR = os.getenv("PROFILE_DIR", "tmp_profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+PROFILE_MAX_DEPTH = 64
+# Kosong = endpoint /debug/profiles tidak tersedia (profil tetap disimpan ke disk)
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+
+
+def profiling_enabled() -> bool:
+    return PROFILE_SAMPLE_EVERY_N > 0 or PROFILE_SLOW_MS > 0
+
+
+def profile_access_allowed(token: str | None) -> bool:
+    """True if ``token`` matches PROFILE_ADMIN_TOKEN (never when it is unset)."""
+    if not PROFILE_ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), PROFILE_ADMIN_TOKEN.encode())
+
+
+def _fold(frame) -> str:
+    parts = []
+    while frame is not None and len(parts) < PROFILE_MAX_DEPTH:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class StackSampler:
+    """Shared sampling thread; runs only while someone is subscribed."""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._subscribers: set[int] = set()
+        self._samples: dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._ids = itertools.count()
+
+    def start(self) -> int:
+        sub_id = next(self._ids)
+        with self._lock:
+            self._subscribers.add(sub_id)
+            self._samples[sub_id] = Counter()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="stack-sampler", daemon=True
+                )
+                self._thread.start()
+        return sub_id
+
+    def stop(self, sub_id: int) -> Counter:
+        with self._lock:
+            self._subscribers.discard(sub_id)
+            return self._samples.pop(sub_id, Counter())
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            stacks = [
+                _fold(frame)
+                for tid, frame in sys._current_frames().items()
+                if tid != me
+            ]
+
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+                for s in self._subscribers:
+                    self._samples[s].update(stacks)
+
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """Bounded on-disk ring of profile files."""
+
+    def __init__(self, directory: str = PROFILE_DIR, max_files: int = PROFILE_MAX_FILES):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def _files(self) -> list[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        files = [f for f in os.listdir(self.directory) if f.endswith(".json")]
+        # nama file diawali timestamp → urutan nama = urutan waktu
+        return sorted(files)
+
+    def save(self, profile: dict) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+        profile["id"] = profile_id
+
+        with self._lock:
+            with open(os.path.join(self.directory, f"{profile_id}.json"), "w") as f:
+                json.dump(profile, f)
+
+            files = self._files()
+            for old in files[: max(len(files) - self.max_files, 0)]:
+                os.remove(os.path.join(self.directory, old))
+
+        return profile_id
+
+    def list(self) -> list[dict]:
+        out = []
+        for name in reversed(self._files()):
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    p = json.load(f)
+            except (OSError, ValueError):
+                continue
+            out.append({k: p.get(k) for k in ("id", "path", "duration_ms", "reason", "stages", "ts")})
+        return out
+
+    def get(self, profile_id: str) -> dict | None:
+        # id hanya berisi angka, huruf hex dan "-" → aman dari path traversal
+        if not all(c.isalnum() or c == "-" for c in profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+
+def to_folded(profile: dict) -> str:
+    return "\n".join(f"{stack} {count}" for stack, count in profile.get("samples", {}).items()) + "\n"
+
+
+sampler = StackSampler()
+profile_store = ProfileStore()
+
+_request_counter = 0
+_counter_lock = threading.Lock()
+
+
+def should_profile() -> tuple[bool, bool]:
+    """
+    Return (profile_this_request, sampled_by_n).
+
+    With PROFILE_SLOW_MS set every request is sampled, because slowness is
+    only known at the end; fast ones are discarded afterwards.
+    """
+    global _request_counter
+    if not profiling_enabled():
+        return False, False
+
+    sampled = False
+    if PROFILE_SAMPLE_EVERY_N > 0:
+        with _counter_lock:
+            _request_counter += 1
+            sampled = _request_counter % PROFILE_SAMPLE_EVERY_N == 0
+
+    return sampled or PROFILE_SLOW_MS > 0, sampled